@@ -0,0 +1,127 @@
+"""
+视频目录快照基准测试
+
+生成一批模拟的 VideoInfo（带标签和相关视频），对比两种重启后恢复目录的方式：
+逐条 JSON 反序列化后重新加入目录，以及内存映射打开二进制快照。
+输出文件大小、恢复耗时、首次查找耗时、查找和搜索的平均耗时，并校验快照中的每条记录与原始数据一致。
+
+用法: python benchmarks/bench_catalog_snapshot.py [记录数]
+"""
+
+import sys
+import json
+import time
+import random
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_videoinfo_memory import make_fields  # noqa: E402
+from modules.core import VideoInfo  # noqa: E402
+from modules.catalog import VideoCatalog, tokenize  # noqa: E402
+from modules.snapshot import CatalogSnapshot, write_snapshot  # noqa: E402
+
+
+def build_videos(count: int) -> list:
+    """生成视频，每个视频带 3 个之前生成的视频作为相关视频"""
+    rng = random.Random(42)
+    videos = []
+    for i in range(count):
+        related = [
+            VideoInfo(video_id=card.video_id, url=card.url, title=card.title, thumbnail=card.thumbnail)
+            for card in rng.sample(videos, min(3, len(videos)))
+        ]
+        videos.append(VideoInfo(**make_fields(i, rng), related=related))
+    return videos
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    videos = build_videos(count)
+    source = VideoCatalog(max_videos=count)
+    source.add(videos)
+    rng = random.Random(7)
+    lookups = [rng.choice(videos).video_id for _ in range(1000)]
+    queries = [f"number {rng.randrange(count)}" for _ in range(200)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "catalog.json"
+        snapshot_path = Path(tmp) / "catalog.snapshot"
+
+        _, json_write = timed(lambda: json_path.write_text(
+            json.dumps([video.to_dict() for video in source.videos()]), "utf-8"
+        ))
+        _, snapshot_write = timed(lambda: write_snapshot(source.videos(), snapshot_path))
+
+        def load_json() -> VideoCatalog:
+            catalog = VideoCatalog(max_videos=count)
+            catalog.add(VideoInfo.from_dict(item) for item in json.loads(json_path.read_text("utf-8")))
+            return catalog
+
+        def open_snapshot() -> VideoCatalog:
+            catalog = VideoCatalog(max_videos=count)
+            catalog.attach(CatalogSnapshot(snapshot_path))
+            return catalog
+
+        results = {}
+        for name, load in (("json", load_json), ("snapshot", open_snapshot)):
+            catalog, restore = timed(load)
+            _, first = timed(catalog.get, lookups[0])
+            _, get_total = timed(lambda: [catalog.get(video_id) for video_id in lookups])
+            _, search_total = timed(lambda: [catalog.search(query) for query in queries])
+            results[name] = (catalog, restore, first, get_total / len(lookups), search_total / len(queries))
+
+        # 相关视频在快照中指向完整记录，只比较 ID
+        def comparable(video: VideoInfo) -> dict:
+            data = video.to_dict()
+            data["related"] = [item["video_id"] for item in data["related"]]
+            return data
+
+        # 反复查找同一批热门视频：首次解码，之后命中快照的解码记录缓存
+        hot = lookups[:100]
+        with CatalogSnapshot(snapshot_path) as snapshot:
+            _, cold_total = timed(lambda: [snapshot.get(video_id) for video_id in hot])
+            _, hot_total = timed(lambda: [snapshot.get(video_id) for _ in range(10) for video_id in hot])
+
+        snapshot = CatalogSnapshot(snapshot_path)
+        mismatches = sum(
+            1 for video in source.videos() if comparable(snapshot.get(video.video_id)) != comparable(video)
+        )
+        snapshot.close()
+        # 得分相同的结果顺序和取舍不固定（如 "number 4" 只匹配到每个标题都有的 "number"），
+        # 比较每个结果的匹配词元数
+        def ranking(catalog: VideoCatalog, query: str) -> list:
+            tokens = tokenize(query)
+            return [len(tokens & tokenize(video.title)) for video in catalog.search(query)]
+
+        same_search = all(
+            ranking(results["json"][0], query) == ranking(results["snapshot"][0], query) for query in queries
+        )
+
+        print(f"records:     {count}")
+        print(f"file size:   json {json_path.stat().st_size / 1024:.0f} KB, "
+              f"snapshot {snapshot_path.stat().st_size / 1024:.0f} KB")
+        print(f"write:       json {json_write * 1000:.0f} ms, snapshot {snapshot_write * 1000:.0f} ms")
+        print(f"{'':<10}{'restore':>12}{'first get':>12}{'get':>12}{'search':>12}")
+        for name, (_, restore, first, get_avg, search_avg) in results.items():
+            print(f"{name:<10}{restore * 1000:>10.1f}ms{first * 1e6:>10.0f}us"
+                  f"{get_avg * 1e6:>10.1f}us{search_avg * 1e6:>10.1f}us")
+        print(f"snapshot get: cold {cold_total / len(hot) * 1e6:.1f}us, "
+              f"cached {hot_total / (10 * len(hot)) * 1e6:.1f}us")
+        print(f"round trip:  {count - mismatches}/{count} records identical, "
+              f"search results {'identical' if same_search else 'DIFFER'}")
+        results["snapshot"][0].close()
+        if mismatches or not same_search:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
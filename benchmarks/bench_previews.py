@@ -0,0 +1,112 @@
+"""
+动画预览基准测试
+
+用 Pillow 生成一段模拟的预览片段（GIF，安装了 av 时另外生成 MP4），通过模拟传输层交给 PreviewRenderer，
+分别测量首次生成、并发请求同一片段（只生成一次）和缓存命中的耗时，以及渲染期间事件循环的最大停顿。
+
+用法: python benchmarks/bench_previews.py [帧数]
+"""
+
+import sys
+import time
+import asyncio
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image  # noqa: E402
+from modules.previews import PREVIEW_FORMATS, PreviewRenderer  # noqa: E402
+from modules.transport import TransportResponse  # noqa: E402
+
+
+def make_frames(count: int) -> list:
+    return [
+        Image.new("RGB", (640, 360), ((i * 7) % 255, (i * 3) % 255, 160)) for i in range(count)
+    ]
+
+
+def make_gif(count: int) -> bytes:
+    frames = make_frames(count)
+    buffer = BytesIO()
+    frames[0].save(buffer, "GIF", save_all=True, append_images=frames[1:], duration=33, loop=0)
+    return buffer.getvalue()
+
+
+def make_mp4(count: int) -> bytes:
+    import av
+    buffer = BytesIO()
+    with av.open(buffer, "w", format="mp4") as container:
+        stream = container.add_stream("h264", rate=30)
+        stream.width, stream.height, stream.pix_fmt = 640, 360, "yuv420p"
+        for frame in make_frames(count):
+            for packet in stream.encode(av.VideoFrame.from_image(frame)):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    return buffer.getvalue()
+
+
+class ClipTransport:
+    """所有请求都返回同一段片段，并记录请求次数"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.requests = 0
+
+    async def request(self, method: str, url: str, proxy=None) -> TransportResponse:
+        self.requests += 1
+        return TransportResponse(200, {}, self.body)
+
+
+async def max_stall(stop: asyncio.Event) -> float:
+    """事件循环的最大停顿（秒）"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        worst = max(worst, time.perf_counter() - started - 0.005)
+    return worst
+
+
+async def bench(name: str, clip: bytes, fmt: str, cache_dir: Path):
+    transport = ClipTransport(clip)
+    renderer = PreviewRenderer(cache_dir / fmt, fmt=fmt)
+    url = f"https://example.invalid/{name}.preview"
+    stop = asyncio.Event()
+    watcher = asyncio.ensure_future(max_stall(stop))
+    started = time.perf_counter()
+    paths = await asyncio.gather(*[renderer.render(url, 2, transport=transport) for _ in range(8)])
+    first = time.perf_counter() - started
+    stop.set()
+    stall = await watcher
+    started = time.perf_counter()
+    for _ in range(1000):
+        await renderer.render(url, 2, transport=transport)
+    hit = (time.perf_counter() - started) / 1000
+    renderer.close()
+    with Image.open(paths[0]) as image:
+        frames = image.n_frames
+    print(f"{name:<5}{fmt:<6}{len(clip) / 1024:>8.0f}KB{first * 1000:>10.0f}ms{hit * 1e6:>10.1f}us"
+          f"{stall * 1000:>10.1f}ms{frames:>8}{Path(paths[0]).stat().st_size / 1024:>8.0f}KB"
+          f"{transport.requests:>6}")
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 90
+    clips = {"gif": make_gif(count)}
+    try:
+        clips["mp4"] = make_mp4(count)
+    except ImportError:
+        print("av 未安装，跳过 MP4")
+    print(f"{'clip':<5}{'out':<6}{'size':>10}{'first x8':>12}{'hit':>12}{'stall':>12}"
+          f"{'frames':>8}{'output':>10}{'gets':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, clip in clips.items():
+            for fmt in PREVIEW_FORMATS:
+                await bench(name, clip, fmt, Path(tmp))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+插件启动与首条命令延迟基准测试
+
+每次测量都在新的解释器进程中进行，统计：
+- 导入 modules 包的耗时，以及导入后 bs4 / PIL 是否已被加载
+- 延迟导入的依赖（bs4、PIL）本身的导入耗时
+- 首次解析详情页的耗时（快速路径不需要 bs4，纯 DOM 页面会在此时导入 bs4）
+
+用法: python benchmarks/bench_startup.py [重复次数]
+"""
+
+import sys
+import json
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+IMPORT_SNIPPET = """
+import sys, time, json
+start = time.perf_counter()
+import modules
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "bs4": "bs4" in sys.modules, "PIL": "PIL.Image" in sys.modules}))
+"""
+
+DEPENDENCY_SNIPPET = """
+import time, json
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1000}}))
+"""
+
+FIRST_PARSE_SNIPPET = """
+import sys, time, json, asyncio
+from pathlib import Path
+start = time.perf_counter()
+from modules.core import Client
+imported = time.perf_counter()
+
+async def main():
+    client = Client()
+    video = client.get_video("bench")
+    video._set_html(Path({path!r}).read_text(encoding="utf-8"))
+    await video.get_info()
+    await client.close()
+
+asyncio.run(main())
+done = time.perf_counter()
+print(json.dumps({{"import_ms": (imported - start) * 1000, "parse_ms": (done - imported) * 1000,
+                  "bs4": "bs4" in sys.modules}}))
+"""
+
+
+def run(snippet: str) -> dict:
+    """在新进程中执行代码片段并读取其输出的 JSON"""
+    output = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median(samples: list, key: str) -> float:
+    return statistics.median(sample[key] for sample in samples)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    samples = [run(IMPORT_SNIPPET) for _ in range(repeat)]
+    print(f"import modules:        {median(samples, 'ms'):8.1f} ms"
+          f"  (bs4 loaded: {samples[0]['bs4']}, PIL loaded: {samples[0]['PIL']})")
+
+    for module in ("bs4", "PIL.Image"):
+        samples = [run(DEPENDENCY_SNIPPET.format(module=module)) for _ in range(repeat)]
+        print(f"deferred {module:<13} {median(samples, 'ms'):8.1f} ms")
+
+    for path in sorted(FIXTURES_DIR.glob("detail*.html")):
+        samples = [run(FIRST_PARSE_SNIPPET.format(path=str(path))) for _ in range(repeat)]
+        print(f"first parse {path.stem:<11} {median(samples, 'parse_ms'):7.1f} ms"
+              f"  (bs4 loaded: {samples[0]['bs4']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+JSON-LD / OpenGraph 快速路径基准测试
+
+对保存的详情页统计快速路径完全跳过 DOM 的比例，并对比快速路径与纯 DOM 解析的耗时。
+
+用法: python benchmarks/bench_structured_fastpath.py [页面目录] [重复次数]
+页面目录默认为 benchmarks/fixtures，读取其中所有 detail*.html
+"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from modules.core import Client, DOM_FIELDS  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+async def parse_with_fastpath(client: Client, name: str, html: str):
+    """走 get_info 的完整流程（快速路径 + 必要时的 DOM 补齐）"""
+    client._video_cache.clear()
+    video = client.get_video(name)
+    video._set_html(html)
+    return await video.get_info()
+
+
+def parse_dom_only(client: Client, name: str, html: str):
+    """旧流程：始终构建 DOM 并查找全部字段"""
+    video = client.get_video(name)
+    soup = BeautifulSoup(html, 'html.parser')
+    return video._extract_from_dom(soup, html, set(DOM_FIELDS))
+
+
+async def main():
+    pages_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else FIXTURES_DIR
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    pages = {path.stem: path.read_text(encoding="utf-8") for path in sorted(pages_dir.glob("detail*.html"))}
+    if not pages:
+        print(f"没有找到详情页: {pages_dir}")
+        return
+
+    client = Client(video_cache_size=1)
+    for name, html in pages.items():
+        await parse_with_fastpath(client, name, html)
+    stats = dict(client.parse_stats)
+    total = stats["structured_only"] + stats["dom_fallback"]
+    print(f"pages:              {total}")
+    print(f"structured only:    {stats['structured_only']} ({stats['structured_only'] / total * 100:.0f}%)")
+    print(f"dom fallback:       {stats['dom_fallback']}")
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name, html in pages.items():
+            await parse_with_fastpath(client, name, html)
+    fast = (time.perf_counter() - start) / (repeat * len(pages))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name, html in pages.items():
+            parse_dom_only(client, name, html)
+    dom = (time.perf_counter() - start) / (repeat * len(pages))
+
+    print(f"fast path ms/page:  {fast * 1000:.3f}")
+    print(f"dom only ms/page:   {dom * 1000:.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""
+VideoInfo 内存占用基准测试
+
+用 tracemalloc 统计每条记录占用的字节数，对比旧版（带 __dict__、标签为独立列表）
+与当前 __slots__ + 字符串驻留实现。
+
+用法: python benchmarks/bench_videoinfo_memory.py [记录数]
+"""
+
+import gc
+import sys
+import random
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.core import VideoInfo  # noqa: E402
+from modules.consts import POPULAR_TAGS  # noqa: E402
+
+
+class LegacyVideoInfo:
+    """旧版 VideoInfo 实现（每个实例带 __dict__，标签为独立列表）"""
+
+    def __init__(self, video_id, url, title="", duration="", thumbnail="", preview="",
+                 views="", rating="", likes=0, dislikes=0, uploader="", upload_date="",
+                 tags=None, description=""):
+        self.video_id = video_id
+        self.url = url
+        self.title = title
+        self.duration = duration
+        self.thumbnail = thumbnail
+        self.preview = preview
+        self.views = views
+        self.rating = rating
+        self.likes = likes
+        self.dislikes = dislikes
+        self.uploader = uploader
+        self.upload_date = upload_date
+        self.tags = tags if tags is not None else []
+        self.description = description
+
+
+def make_fields(i: int, rng: random.Random) -> dict:
+    """
+    生成一条模拟解析结果
+
+    所有字符串都在运行时拼接，模拟 BeautifulSoup get_text() 每次返回新对象的情况
+    """
+    video_id = f"sample-video-{i}-{rng.randint(0, 1 << 30)}"
+    tags = ["".join(tag) for tag in rng.sample(POPULAR_TAGS, 6)]
+    return dict(
+        video_id=video_id,
+        url=f"https://3dporndude.com/video/{video_id}",
+        title=f"Sample video title number {i}",
+        duration="".join(f"{rng.randint(1, 30)}:{rng.randint(0, 59):02d}"),
+        thumbnail=f"https://3dporndude.com/contents/thumbs/{i}.jpg",
+        preview=f"https://3dporndude.com/contents/previews/{i}.mp4",
+        views="".join(f"{rng.randint(1, 999)}K"),
+        rating="".join(f"{rng.randint(50, 100)}%"),
+        uploader="".join(f"creator{rng.randint(0, 50)}"),
+        upload_date="".join(f"{rng.randint(1, 12)} months ago"),
+        tags=tags,
+    )
+
+
+def measure(cls, count: int) -> float:
+    """返回每条记录平均占用的字节数"""
+    rng = random.Random(42)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    # 在统计窗口内完成“解析 -> 构造”，只保留最终记录引用的对象
+    records = [cls(**make_fields(i, rng)) for i in range(count)]
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # 保持引用直到统计完成
+    assert len(records) == count
+    return total / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    legacy = measure(LegacyVideoInfo, count)
+    compact = measure(VideoInfo, count)
+    print(f"records:            {count}")
+    print(f"legacy bytes/rec:   {legacy:.0f}")
+    print(f"compact bytes/rec:  {compact:.0f}")
+    print(f"saved:              {(1 - compact / legacy) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+端到端负载测试
+
+启动本地替身站点（见 standin_site.py），用模拟的聊天事件以指定并发直接调用插件 Main 的命令处理函数，
+统计吞吐量、p50/p99 延迟、回复结果分布、上游请求数和进程峰值 RSS。
+
+需要在安装了 AstrBot 的环境中运行（插件主文件依赖 astrbot.api），例如：
+    python benchmarks/load_test.py --requests 1000 --concurrency 200 --mix random=1,popular=1
+    python benchmarks/load_test.py --latency 0.2 --jitter 0.1 --error-rate 0.05 --set max_concurrent_commands=8
+    python benchmarks/load_test.py --latency 1.5 --mix detail=1 --set command_deadline=2
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import statistics
+import importlib
+import importlib.util
+from pathlib import Path
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from standin_site import StandInSite  # noqa: E402
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+PLUGIN_PACKAGE = "plugin_under_test"
+
+# 命令名 -> (处理函数名, 参数)
+COMMANDS = {
+    "detail": ("cmd_video_info", None),
+    "random": ("cmd_random", ()),
+    "popular": ("cmd_popular", ("1",)),
+    "latest": ("cmd_latest", ("1",)),
+    "search": ("cmd_search", ("dragon",)),
+    "tag": ("cmd_videos_by_tag", ("animation",)),
+}
+
+
+class FakeEvent:
+    """模拟的消息事件，只实现命令处理函数用到的接口"""
+
+    def __init__(self, user_id: str, group_id: str):
+        self.user_id = user_id
+        self.group_id = group_id
+        self.unified_msg_origin = f"loadtest:GroupMessage:{group_id}" if group_id else f"loadtest:FriendMessage:{user_id}"
+
+    def get_sender_id(self) -> str:
+        return self.user_id
+
+    def get_group_id(self) -> str:
+        return self.group_id
+
+    def plain_result(self, text: str) -> Tuple[str, Any]:
+        return ("plain", text)
+
+    def chain_result(self, chain: list) -> Tuple[str, Any]:
+        return ("chain", chain)
+
+
+class FakeContext:
+    """模拟的插件上下文，提供配置并吞掉主动推送的消息"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = {"3dporndude": config}
+        self.sent = 0
+
+    async def send_message(self, session: str, chain: Any) -> bool:
+        self.sent += 1
+        return True
+
+
+def load_plugin(data_dir: Path):
+    """
+    以独立包名加载插件，并把缓存和数据目录指向临时目录
+
+    Returns:
+        插件 main 模块
+    """
+    spec = importlib.util.spec_from_loader(PLUGIN_PACKAGE, loader=None, is_package=True)
+    spec.submodule_search_locations = [str(ROOT_DIR)]
+    sys.modules[PLUGIN_PACKAGE] = importlib.util.module_from_spec(spec)
+
+    try:
+        plugin = importlib.import_module(f"{PLUGIN_PACKAGE}.main")
+    except ImportError as e:
+        sys.exit(f"无法加载插件（需要 AstrBot 运行环境）: {e}")
+
+    # 插件目录下的所有路径常量（缓存、数据、快照、存档、分析报告等）都移到临时目录，
+    # 保持相对位置不变，新增的常量也不会写入源码目录
+    plugin_dir = Path(plugin.__file__).parent
+    for name, value in list(vars(plugin).items()):
+        if name.isupper() and isinstance(value, Path):
+            try:
+                setattr(plugin, name, data_dir / value.relative_to(plugin_dir))
+            except ValueError:
+                pass
+    return plugin
+
+
+def parse_mix(text: str) -> List[Tuple[str, int]]:
+    """解析 "random=1,popular=2" 形式的命令权重"""
+    mix = []
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in COMMANDS:
+            raise SystemExit(f"未知命令: {name}，可选: {', '.join(COMMANDS)}")
+        mix.append((name, int(weight or 1)))
+    return mix
+
+
+def parse_settings(items: List[str]) -> Dict[str, Any]:
+    """解析 --set key=value 形式的插件配置"""
+    config: Dict[str, Any] = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        if value.lower() in ("true", "false"):
+            config[key] = value.lower() == "true"
+        else:
+            try:
+                config[key] = int(value)
+            except ValueError:
+                config[key] = value
+    return config
+
+
+def classify(results: List[Tuple[str, Any]]) -> str:
+    """按回复内容归类：ok / rejected（限流或排队）/ timeout（超出时间预算）/ error"""
+    for kind, payload in results:
+        text = payload if kind == "plain" else ""
+        if text.startswith("⏳"):
+            return "rejected"
+        if text.startswith("⏱️"):
+            return "timeout"
+        if text.startswith("❌"):
+            return "error"
+    return "ok" if results else "empty"
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(args) -> None:
+    site = StandInSite(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    base_url = await site.start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plugin = load_plugin(Path(tmp))
+        config = {"base_url": base_url, "mosaic_level": 2}
+        config.update(parse_settings(args.set))
+        context = FakeContext(config)
+        main = plugin.Main(context)
+        await main.initialize()
+
+        # 预先取一页视频ID供 detail 命令使用（不计入统计）
+        detail_ids = [video.video_id for video in await main.client.get_latest_videos(page=1)]
+        warmup_requests = site.total_requests
+
+        mix = parse_mix(args.mix)
+        schedule = [name for name, weight in mix for _ in range(weight)]
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies: Dict[str, List[float]] = {name: [] for name, _ in mix}
+        outcomes: Counter = Counter()
+
+        async def one(index: int):
+            name = schedule[index % len(schedule)]
+            handler_name, handler_args = COMMANDS[name]
+            if handler_args is None:
+                handler_args = (detail_ids[index % len(detail_ids)],)
+            event = FakeEvent(f"user{index % args.users}", f"group{index % args.groups}" if args.groups else "")
+            async with semaphore:
+                start = time.perf_counter()
+                results = [result async for result in getattr(main, handler_name)(event, *handler_args)]
+                latencies[name].append(time.perf_counter() - start)
+            outcomes[(name, classify(results))] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+        # 等待仍在处理的缩略图补发
+        if main._followups:
+            await asyncio.wait(main._followups)
+        followups = {
+            dict(labels)["outcome"]: value
+            for labels, value in main.metrics.counters("thumbnail_followups_total").items()
+        }
+        await main.terminate()
+
+    await site.stop()
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"requests:        {args.requests} (concurrency {args.concurrency}, "
+          f"{args.users} users, {args.groups} groups)")
+    print(f"duration:        {elapsed:.2f} s")
+    print(f"throughput:      {args.requests / elapsed:.1f} cmd/s")
+    print(f"latency p50/p99: {percentile(all_latencies, 0.5) * 1000:.0f} / "
+          f"{percentile(all_latencies, 0.99) * 1000:.0f} ms")
+    for name, values in latencies.items():
+        counts = ", ".join(f"{kind}={count}" for (cmd, kind), count in sorted(outcomes.items()) if cmd == name)
+        print(f"  {name:<8} p50 {percentile(values, 0.5) * 1000:6.0f} ms  "
+              f"p99 {percentile(values, 0.99) * 1000:6.0f} ms  "
+              f"mean {statistics.fmean(values) * 1000 if values else 0:6.0f} ms  ({counts})")
+    upstream = site.total_requests - warmup_requests
+    print(f"upstream:        {upstream} requests ({upstream / args.requests:.2f} per command), "
+          f"{site.errors} injected errors")
+    print(f"  by route:      {dict(site.requests)}")
+    if followups:
+        print(f"thumbnails:      deferred past deadline {sum(followups.values()):g} ({followups}), "
+              f"{context.sent} follow-up messages")
+    print(f"peak RSS:        {peak_rss_mb:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="插件端到端负载测试")
+    parser.add_argument("--requests", type=int, default=400, help="命令总数")
+    parser.add_argument("--concurrency", type=int, default=200, help="同时发出的命令数")
+    parser.add_argument("--mix", default="random=1,popular=1", help="命令权重，如 random=1,popular=1,detail=2")
+    parser.add_argument("--users", type=int, default=200, help="模拟用户数")
+    parser.add_argument("--groups", type=int, default=10, help="模拟群组数，0 表示全部为私聊")
+    parser.add_argument("--latency", type=float, default=0.05, help="替身站点基础延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.05, help="替身站点随机延迟上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="替身站点返回 503 的比例")
+    parser.add_argument("--seed", type=int, default=0, help="页面生成随机种子")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="覆盖插件配置项")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+HTML 解析器一致性检查
+
+用 benchmarks/fixtures 中的列表页和详情页，分别以每个已安装的树构建器解析，
+比较得到的 VideoInfo（含相关视频）是否完全一致，并输出各构建器的解析耗时。
+详情页同时检查结构化快速路径和强制 DOM 回退两种路径。
+快速路径不构建 DOM 提取的相关视频卡片也与各构建器 DOM 中的结果比较。
+另外检查未找到页面的判断：not_found*.html 必须被识别为未找到，列表页和详情页
+（包括标题中含有 "404" 的视频）都不能被误判。
+有不一致时以非零状态退出，可在 CI 中运行。
+
+用法:
+    python benchmarks/parser_parity.py [--rounds 次数]
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules import core  # noqa: E402
+from modules.core import Client, KNOWN_PARSERS, parser_available, resolve_parser  # noqa: E402
+from modules.errors import VideoNotFound  # noqa: E402
+from modules.extract import IncrementalExtractor, is_not_found_page  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+def parse_list(client: Client, html: str) -> List[Dict[str, Any]]:
+    return [video.to_dict() for video in client._parse_video_list(html)]
+
+
+def parse_detail(client: Client, html: str, force_dom: bool) -> Dict[str, Any]:
+    video = client.get_video("parity")
+    video._set_html(html)
+    if force_dom:
+        # 去掉结构化数据，使所有字段都走 DOM 回退
+        original = core.extract_structured
+        core.extract_structured = lambda html_content: {}
+        try:
+            return asyncio.run(video.get_info()).to_dict()
+        finally:
+            core.extract_structured = original
+    return asyncio.run(video.get_info()).to_dict()
+
+
+def build_cases() -> Dict[str, Callable[[Client], Any]]:
+    cases: Dict[str, Callable[[Client], Any]] = {}
+    for path in sorted(FIXTURES_DIR.glob("list*.html")):
+        html = path.read_text(encoding="utf-8")
+        cases[path.stem] = lambda client, html=html: parse_list(client, html)
+    for path in sorted(FIXTURES_DIR.glob("detail*.html")):
+        html = path.read_text(encoding="utf-8")
+        cases[path.stem] = lambda client, html=html: parse_detail(client, html, False)
+        cases[f"{path.stem}[dom]"] = lambda client, html=html: parse_detail(client, html, True)
+    return cases
+
+
+def detect_not_found(html: str) -> Dict[str, bool]:
+    """分别用整页判断、流式提取和 Video 解析判断页面是否为未找到页面"""
+    extractor = IncrementalExtractor({"title"})
+    # 按网络读取时的大小分块输入
+    for start in range(0, len(html), 1024):
+        extractor.feed(html[start:start + 1024])
+    try:
+        Client(video_cache_size=0).get_video("not-found-check")._set_html(html)
+        raised = False
+    except VideoNotFound:
+        raised = True
+    return {"page": is_not_found_page(html), "stream": extractor.not_found, "video": raised}
+
+
+def check_not_found() -> List[str]:
+    """检查 fixtures 中每个页面的未找到判断，返回错误信息"""
+    errors = []
+    for path in sorted(FIXTURES_DIR.glob("*.html")):
+        expected = path.stem.startswith("not_found")
+        for method, detected in detect_not_found(path.read_text(encoding="utf-8")).items():
+            if detected != expected:
+                errors.append(f"NOT-FOUND {path.name} [{method}] 应为 {expected}，实际为 {detected}")
+    return errors
+
+
+def check_related(parsers: List[str]) -> List[str]:
+    """比较快速路径扫描出的相关视频和在各构建器的 DOM 中查找的结果，返回错误信息"""
+    errors = []
+    for path in sorted(FIXTURES_DIR.glob("detail*.html")):
+        html = path.read_text(encoding="utf-8")
+        for parser_name in parsers:
+            client = Client(parser=parser_name)
+            scanned = [video.to_dict() for video in client._parse_related(html)]
+            from_dom = [video.to_dict() for video in client._parse_related(html, core.make_soup(html, parser_name))]
+            if scanned != from_dom:
+                errors.append(f"RELATED {path.stem} [{parser_name}] {first_difference(from_dom, scanned)}")
+    return errors
+
+
+def first_difference(expected: Any, actual: Any, path: str = "") -> str:
+    """找出第一个不同的位置，便于定位"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(set(expected) | set(actual)):
+            if expected.get(key) != actual.get(key):
+                return first_difference(expected.get(key), actual.get(key), f"{path}.{key}")
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return f"{path}: {len(expected)} 项 != {len(actual)} 项"
+        for index, (left, right) in enumerate(zip(expected, actual)):
+            if left != right:
+                return first_difference(left, right, f"{path}[{index}]")
+    return f"{path}: {json.dumps(expected, ensure_ascii=False)[:80]} != {json.dumps(actual, ensure_ascii=False)[:80]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML 解析器一致性检查")
+    parser.add_argument("--rounds", type=int, default=20, help="计时时每项重复次数")
+    args = parser.parse_args()
+
+    parsers = [name for name in KNOWN_PARSERS if parser_available(name)]
+    missing = [name for name in KNOWN_PARSERS if name not in parsers]
+    print(f"parsers: {', '.join(parsers)} (auto -> {resolve_parser('auto')})")
+    if missing:
+        print(f"not installed: {', '.join(missing)}")
+
+    cases = build_cases()
+    baseline = "html.parser"
+    failures = 0
+    timings: Dict[str, Dict[str, float]] = {}
+    for name, case in cases.items():
+        results = {}
+        timings[name] = {}
+        for parser_name in parsers:
+            client = Client(parser=parser_name, video_cache_size=0, list_cache_size=0)
+            results[parser_name] = case(client)
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                case(client)
+            timings[name][parser_name] = (time.perf_counter() - start) / args.rounds * 1000
+        for parser_name in parsers:
+            if results[parser_name] != results[baseline]:
+                failures += 1
+                print(f"MISMATCH {name} [{parser_name}] {first_difference(results[baseline], results[parser_name])}")
+
+    print()
+    print(f"{'case':<24}" + "".join(f"{name:>14}" for name in parsers))
+    for name, row in timings.items():
+        print(f"{name:<24}" + "".join(f"{row[parser_name]:>12.2f}ms" for parser_name in parsers))
+    print()
+    check_errors = check_related(parsers) + check_not_found()
+    for error in check_errors:
+        print(error)
+    failures += len(check_errors)
+    if failures:
+        print(f"{failures} mismatch(es)")
+        sys.exit(1)
+    print(f"all {len(parsers)} parsers produce identical VideoInfo for {len(cases)} cases")
+    print("related cards match the DOM and not-found detection matches every fixture")
+
+
+if __name__ == "__main__":
+    main()
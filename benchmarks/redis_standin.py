@@ -0,0 +1,184 @@
+"""
+本地 Redis 替身
+
+用 asyncio 实现 RESP 协议中共享缓存用到的少量命令（HELLO/GET/MGET/SET NX PX/DEL/EXISTS/PING，
+以及解锁脚本的 SCRIPT LOAD/EVALSHA/EVAL），数据只保存在内存中，
+用于在没有 Redis 服务的环境中测试 RedisBackend 和多实例共享缓存。
+
+单独运行时启动服务:
+    python benchmarks/redis_standin.py [端口]
+"""
+
+import sys
+import time
+import asyncio
+import hashlib
+from pathlib import Path
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.backends import UNLOCK_SCRIPT  # noqa: E402
+
+
+class RedisStandIn:
+    """内存中的最小 Redis 服务"""
+
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.scripts: Dict[str, bytes] = {}
+        self.commands: Counter = Counter()
+        self.url = ""
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def _set(self, args: List[bytes], null: bytes) -> bytes:
+        key, value, options = args[0], args[1], [arg.upper() for arg in args[2:]]
+        expires_at = None
+        if b"PX" in options:
+            expires_at = time.monotonic() + int(args[2 + options.index(b"PX") + 1]) / 1000
+        elif b"EX" in options:
+            expires_at = time.monotonic() + int(args[2 + options.index(b"EX") + 1])
+        if b"NX" in options and self._get(key) is not None:
+            return null
+        self.data[key] = (value, expires_at)
+        return b"+OK\r\n"
+
+    def _unlock(self, key: bytes, token: bytes) -> bytes:
+        if self._get(key) == token:
+            del self.data[key]
+            return b":1\r\n"
+        return b":0\r\n"
+
+    def _eval(self, script: bytes, args: List[bytes]) -> bytes:
+        count = int(args[0])
+        keys, argv = args[1:1 + count], args[1 + count:]
+        if script.decode("utf-8") == UNLOCK_SCRIPT:
+            return self._unlock(keys[0], argv[0])
+        return b"-ERR unsupported script\r\n"
+
+    def execute(self, command: List[bytes], resp3: bool = False) -> bytes:
+        """
+        执行一条命令
+
+        Args:
+            command: 命令和参数
+            resp3: 连接是否已通过 HELLO 切换到 RESP3（空值的编码不同）
+
+        Returns:
+            编码后的回复
+        """
+        name, args = command[0].upper().decode(), command[1:]
+        null = b"_\r\n" if resp3 else b"$-1\r\n"
+        self.commands[name] += 1
+        if name == "PING":
+            return b"+PONG\r\n"
+        if name in ("CLIENT", "SELECT"):
+            return b"+OK\r\n"
+        if name == "HELLO":
+            fields = [b"server", b"redis", b"version", b"7.0.0", b"proto"]
+            proto = int(args[0]) if args else 2
+            head = b"%%%d\r\n" % 3 if proto == 3 else b"*6\r\n"
+            return head + b"".join(_bulk(field) for field in fields) + b":%d\r\n" % proto
+        if name == "GET":
+            return _bulk(self._get(args[0]), null)
+        if name == "MGET":
+            return b"*%d\r\n" % len(args) + b"".join(_bulk(self._get(key), null) for key in args)
+        if name == "SET":
+            return self._set(args, null)
+        if name == "DEL":
+            removed = sum(1 for key in args if self._get(key) is not None and self.data.pop(key))
+            return b":%d\r\n" % removed
+        if name == "EXISTS":
+            return b":%d\r\n" % sum(1 for key in args if self._get(key) is not None)
+        if name == "SCRIPT" and args and args[0].upper() == b"LOAD":
+            sha = hashlib.sha1(args[1]).hexdigest()
+            self.scripts[sha] = args[1]
+            return _bulk(sha.encode())
+        if name == "EVALSHA":
+            script = self.scripts.get(args[0].decode())
+            if script is None:
+                return b"-NOSCRIPT No matching script. Please use EVAL.\r\n"
+            return self._eval(script, args[1:])
+        if name == "EVAL":
+            return self._eval(args[0], args[1:])
+        return b"-ERR unknown command '%s'\r\n" % name.encode()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        resp3 = False
+        try:
+            while True:
+                command = await _read_command(reader)
+                if command is None:
+                    break
+                writer.write(self.execute(command, resp3))
+                if command[0].upper() == b"HELLO" and len(command) > 1:
+                    resp3 = command[1] == b"3"
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        启动服务
+
+        Returns:
+            Redis 地址，如 redis://127.0.0.1:12345/0
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"redis://{host}:{port}/0"
+        return self.url
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+def _bulk(value: Optional[bytes], null: bytes = b"$-1\r\n") -> bytes:
+    if value is None:
+        return null
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    """读取一条 RESP 数组命令，连接关闭时返回 None"""
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # 内联命令
+        return line.strip().split()
+    args = []
+    for _ in range(int(line[1:])):
+        size = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(size + 2))[:-2])
+    return args
+
+
+async def _serve(port: int):
+    server = RedisStandIn()
+    print(f"redis stand-in: {await server.start(port=port)}")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(_serve(int(sys.argv[1]) if len(sys.argv) > 1 else 6379))
@@ -0,0 +1,232 @@
+"""
+离线微基准测试套件
+
+使用 benchmarks/fixtures 中保存的列表页、详情页和缩略图，不访问网络，统计：
+- 列表页解析 (_parse_video_list)
+- 详情页解析 (Video.get_info，结构化快速路径和 DOM 回退两种页面)
+- 消息格式化 (format_video_list / format_video_info)
+- 马赛克 (apply_mosaic，每个级别)
+- 图片处理 (process_image，每个级别) 和完整的下载处理流程 (fetch_thumbnail，由本地 HTTP 服务提供图片)
+
+每项输出 ops/sec、单次平均耗时、单次峰值内存和单次净增内存块数，可保存为 JSON 供不同提交间对比。
+
+用法:
+    python benchmarks/run_suite.py [--filter 名称] [--min-time 秒] [--json 结果.json] [--compare 旧结果.json]
+"""
+
+import gc
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.core import Client  # noqa: E402
+from modules.formatting import format_video_info, format_video_list  # noqa: E402
+from modules.images import MOSAIC_BLOCK_SIZES, apply_mosaic, process_image, fetch_thumbnail  # noqa: E402
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+# 统计内存时重复执行的次数
+ALLOC_ROUNDS = 5
+
+
+class Case:
+    """一个基准测试项"""
+
+    def __init__(self, name: str, func: Callable[[], object]):
+        self.name = name
+        self.func = func
+
+
+def measure(case: Case, min_time: float) -> Dict[str, float]:
+    """
+    测量单个测试项
+
+    Args:
+        case: 测试项
+        min_time: 最短计时时间（秒）
+
+    Returns:
+        ops_per_sec、mean_us、peak_kib、retained_blocks
+    """
+    case.func()  # 预热，触发延迟导入和首次缓存
+
+    iterations = 0
+    gc.collect()
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time or iterations < 3:
+        case.func()
+        iterations += 1
+        elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    peak = 0
+    before = tracemalloc.take_snapshot()
+    for _ in range(ALLOC_ROUNDS):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        case.func()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+    return {
+        "iterations": iterations,
+        "ops_per_sec": iterations / elapsed,
+        "mean_us": elapsed / iterations * 1e6,
+        "peak_kib": peak / 1024,
+        "retained_blocks": blocks / ALLOC_ROUNDS,
+    }
+
+
+def build_cases(loop: asyncio.AbstractEventLoop, work_dir: Path, image_url: str) -> List[Case]:
+    """根据夹具构建所有测试项"""
+    client = Client(video_cache_size=0, list_cache_size=0)
+    list_html = (FIXTURES_DIR / "list_latest.html").read_text(encoding="utf-8")
+    details = {
+        path.stem: path.read_text(encoding="utf-8") for path in sorted(FIXTURES_DIR.glob("detail*.html"))
+    }
+    thumb_data = (FIXTURES_DIR / "thumb.jpg").read_bytes()
+
+    from PIL import Image
+    from io import BytesIO
+    thumb_image = Image.open(BytesIO(thumb_data)).convert("RGB")
+
+    videos = client._parse_video_list(list_html)
+
+    def parse_detail(html: str):
+        video = client.get_video("bench")
+        video._set_html(html)
+        return loop.run_until_complete(video.get_info())
+
+    infos = {name: parse_detail(html) for name, html in details.items()}
+
+    cases = [Case("parse_video_list", lambda: client._parse_video_list(list_html))]
+    for name, html in details.items():
+        cases.append(Case(f"get_info[{name}]", lambda html=html: parse_detail(html)))
+    cases.append(Case("format_video_list", lambda: format_video_list(videos, "最新视频 (第1页)")))
+    for name, info in infos.items():
+        cases.append(Case(f"format_video_info[{name}]", lambda info=info: format_video_info(info)))
+
+    levels = [0] + sorted(MOSAIC_BLOCK_SIZES)
+    for level in levels:
+        block_size = MOSAIC_BLOCK_SIZES.get(level, 1)
+        cases.append(Case(f"apply_mosaic[{level}]", lambda b=block_size: apply_mosaic(thumb_image, b)))
+    for level in levels:
+        target = work_dir / f"process_{level}.jpg"
+        cases.append(Case(f"process_image[{level}]", lambda lv=level, t=target: process_image(thumb_data, lv, t)))
+
+    pipeline_dir = work_dir / "pipeline"
+
+    def pipeline(level: int, cached: bool):
+        if not cached:
+            for file in pipeline_dir.glob("*.jpg"):
+                file.unlink()
+        return loop.run_until_complete(fetch_thumbnail(image_url, pipeline_dir, level))
+
+    for level in levels:
+        cases.append(Case(f"fetch_thumbnail[{level}]", lambda lv=level: pipeline(lv, False)))
+    cases.append(Case("fetch_thumbnail[cached]", lambda: pipeline(2, True)))
+
+    loop.run_until_complete(client.close())
+    return cases
+
+
+async def start_image_server(data: bytes):
+    """启动只提供缩略图的本地 HTTP 服务"""
+    from aiohttp import web
+
+    async def handler(request):
+        return web.Response(body=data, content_type="image/jpeg")
+
+    app = web.Application()
+    app.router.add_get("/thumb.jpg", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/thumb.jpg"
+
+
+def git_revision() -> Optional[str]:
+    """当前提交，不在 git 仓库中时返回 None"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]]):
+    """打印结果表格，提供旧结果时附带 ops/sec 变化"""
+    header = f"{'case':<30} {'ops/sec':>12} {'mean':>12} {'peak KiB':>10} {'blocks':>8}"
+    if baseline:
+        header += f" {'vs base':>9}"
+    print(header)
+    for name, result in results.items():
+        line = (
+            f"{name:<30} {result['ops_per_sec']:>12.1f} {result['mean_us']:>10.1f}us "
+            f"{result['peak_kib']:>10.1f} {result['retained_blocks']:>8.1f}"
+        )
+        if baseline and name in baseline:
+            ratio = result["ops_per_sec"] / baseline[name]["ops_per_sec"]
+            line += f" {ratio:>8.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线微基准测试")
+    parser.add_argument("--filter", default="", help="只运行名称包含该字符串的测试项")
+    parser.add_argument("--min-time", type=float, default=0.5, help="每项最短计时时间（秒）")
+    parser.add_argument("--json", dest="json_path", help="将结果保存为 JSON")
+    parser.add_argument("--compare", help="与之前保存的 JSON 结果对比")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))["results"]
+
+    loop = asyncio.new_event_loop()
+    runner, image_url = loop.run_until_complete(start_image_server((FIXTURES_DIR / "thumb.jpg").read_bytes()))
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cases = build_cases(loop, Path(tmp), image_url)
+            results = {}
+            for case in cases:
+                if args.filter and args.filter not in case.name:
+                    continue
+                results[case.name] = measure(case, args.min_time)
+    finally:
+        loop.run_until_complete(runner.cleanup())
+        loop.close()
+
+    print_results(results, baseline)
+
+    if args.json_path:
+        payload = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "results": results,
+        }
+        Path(args.json_path).write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
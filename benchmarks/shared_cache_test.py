@@ -0,0 +1,129 @@
+"""
+多实例共享缓存测试
+
+启动本地替身站点，创建若干个各自独立的 Client（模拟多个 bot 实例），共用一个缓存后端，
+所有实例同时请求相同的列表页、详情页和缩略图，统计上游请求数。
+共享缓存生效时上游请求数不随实例数增加。
+
+默认使用 SQLite 后端。Redis 后端需要安装 redis (redis-py)，默认使用本地 Redis 替身（见 redis_standin.py），
+也可用 --redis-url 指向真实服务:
+    python benchmarks/shared_cache_test.py --instances 1,2,4,8
+    python benchmarks/shared_cache_test.py --backend redis --latency 0.1
+    python benchmarks/shared_cache_test.py --backend none
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from standin_site import StandInSite  # noqa: E402
+from redis_standin import RedisStandIn  # noqa: E402
+from modules.core import Client  # noqa: E402
+from modules.backends import SharedCache, make_backend  # noqa: E402
+from modules.errors import CacheBackendError  # noqa: E402
+from modules.images import fetch_thumbnail  # noqa: E402
+
+
+async def run_instances(
+    count: int, base_url: str, backend: str, location: str, work_dir: Path, details: int
+) -> Dict[str, float]:
+    """
+    创建 count 个实例并同时执行同一组请求
+
+    Returns:
+        各实例共享缓存统计之和与耗时
+    """
+    clients: List[Client] = []
+    for index in range(count):
+        kind = "" if backend == "none" else backend
+        instance_backend = make_backend(kind, location)
+        shared = SharedCache(instance_backend) if instance_backend is not None else None
+        clients.append(Client(base_url=base_url, shared_cache=shared))
+
+    async def instance(index: int, client: Client):
+        videos = await client.get_latest_videos(page=1)
+        await client.get_popular_videos(page=1)
+        infos = await asyncio.gather(*(client.get_video(video.video_id).get_info() for video in videos[:details]))
+        cache_dir = work_dir / f"thumbs{count}_{index}"
+        await asyncio.gather(*(
+            fetch_thumbnail(info.thumbnail, cache_dir, 2, metrics=client.metrics, shared_cache=client.shared_cache)
+            for info in infos
+        ))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(instance(index, client) for index, client in enumerate(clients)))
+    elapsed = time.perf_counter() - started
+
+    totals: Dict[str, float] = {"seconds": elapsed}
+    for client in clients:
+        if client.shared_cache is not None:
+            for name, value in client.shared_cache.stats.items():
+                totals[name] = totals.get(name, 0) + value
+        await client.close()
+    return totals
+
+
+async def run(args):
+    site = StandInSite(latency=args.latency, jitter=args.jitter, seed=args.seed)
+    base_url = await site.start()
+    redis_server = None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        print(f"backend: {args.backend}")
+        print(f"{'instances':>9} {'upstream':>9} {'per inst':>9} {'seconds':>8} "
+              f"{'loads':>6} {'waits':>6} {'hits':>6} {'batches':>8}")
+        for count in args.instances:
+            # 每轮使用新的缓存，保证各轮从冷缓存开始
+            if args.backend == "sqlite":
+                location = str(work_dir / f"shared{count}.db")
+            elif args.backend == "redis" and args.redis_url:
+                location = args.redis_url
+                print("注意: 使用外部 Redis 时各轮之间不会清空缓存")
+            elif args.backend == "redis":
+                if redis_server is not None:
+                    await redis_server.stop()
+                redis_server = RedisStandIn()
+                location = await redis_server.start()
+            else:
+                location = ""
+
+            before = site.total_requests
+            totals = await run_instances(count, base_url, args.backend, location, work_dir, args.details)
+            upstream = site.total_requests - before
+            print(f"{count:>9} {upstream:>9} {upstream / count:>9.1f} {totals['seconds']:>8.2f} "
+                  f"{totals.get('loads', 0):>6g} {totals.get('waits', 0):>6g} "
+                  f"{totals.get('hits', 0):>6g} {totals.get('batches', 0):>8g}")
+
+    if redis_server is not None:
+        await redis_server.stop()
+    await site.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多实例共享缓存测试")
+    parser.add_argument("--backend", default="sqlite", choices=("none", "memory", "sqlite", "redis"),
+                        help="缓存后端；memory 为每个实例各自的进程内缓存，用作对照")
+    parser.add_argument("--redis-url", default="", help="真实 Redis 地址，默认启动本地 Redis 替身")
+    parser.add_argument("--instances", default="1,2,4,8", help="依次测试的实例数")
+    parser.add_argument("--details", type=int, default=8, help="每个实例请求的详情页数")
+    parser.add_argument("--latency", type=float, default=0.05, help="替身站点基础延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.02, help="替身站点随机延迟上限（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="页面生成随机种子")
+    args = parser.parse_args()
+    args.instances = [int(value) for value in args.instances.split(",")]
+    try:
+        asyncio.run(run(args))
+    except CacheBackendError as e:
+        sys.exit(f"无法创建 {args.backend} 缓存后端: {e}")
+
+
+if __name__ == "__main__":
+    main()
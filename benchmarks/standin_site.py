@@ -0,0 +1,202 @@
+"""
+本地替身站点
+
+用 aiohttp 提供与 3dporndude.com 结构相同的合成页面（首页/热门/标签/搜索列表页、详情页和缩略图），
+支持模拟延迟和按比例注入错误，并统计收到的请求数，供负载测试使用。
+
+单独运行时启动服务，便于手动调试:
+    python benchmarks/standin_site.py [端口]
+"""
+
+import sys
+import json
+import random
+import asyncio
+from collections import Counter
+from html import escape
+from pathlib import Path
+from typing import Optional
+
+from aiohttp import web
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+WORDS = (
+    "futa hentai kpop demon hunters animation elf dragon cyber night city "
+    "overwatch raider sfm blender yoga gym beach neon episode queen"
+).split()
+
+CARDS_PER_PAGE = 24
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(3, 6)))
+
+
+def _slug(title: str, number: int) -> str:
+    return "-".join(title.lower().split()) + f"-{number}"
+
+
+class StandInSite:
+    """合成的 3dporndude 站点"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        """
+        初始化站点
+
+        Args:
+            latency: 每个请求的基础延迟（秒）
+            jitter: 额外的随机延迟上限（秒）
+            error_rate: 返回 503 的请求比例 (0~1)
+            seed: 随机数种子，相同种子生成相同的页面
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.requests: Counter = Counter()
+        self.errors = 0
+        self.base_url = ""
+        self._random = random.Random(seed)
+        self._thumb = (FIXTURES_DIR / "thumb.jpg").read_bytes()
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        kind = request.match_info.route.name or "other"
+        self.requests[kind] += 1
+        delay = self.latency + (self._random.random() * self.jitter if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="Service Unavailable")
+        return await handler(request)
+
+    def _list_page(self, key: str, page: int) -> str:
+        rng = random.Random(f"{self.seed}:{key}:{page}")
+        cards = []
+        for _ in range(CARDS_PER_PAGE):
+            number = rng.randint(1000, 99999)
+            title = _title(rng)
+            slug = _slug(title, number)
+            cards.append(
+                f'<div class="item video-item">'
+                f'<a href="{self.base_url}/video/{slug}/" title="{escape(title)}">'
+                f'<img class="thumb" src="{self.base_url}/thumb/{number}.jpg" alt="">'
+                f'<span class="duration">{rng.randint(0, 25)}:{rng.randint(0, 59):02d}</span>'
+                f'<strong class="title">{escape(title)}</strong></a>'
+                f'<span class="views">{rng.randint(100, 900000):,} views</span>'
+                f'<span class="rating">{rng.randint(50, 100)}%</span>'
+                f'</div>'
+            )
+        return (
+            f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{escape(key)} - page {page}</title></head>"
+            f"<body><div class=\"list-videos\">{''.join(cards)}</div></body></html>"
+        )
+
+    def _detail_page(self, slug: str) -> str:
+        rng = random.Random(f"{self.seed}:video:{slug}")
+        title = " ".join(word.capitalize() for word in slug.split("-")[:-1]) or slug
+        number = slug.rsplit("-", 1)[-1]
+        thumb = f"{self.base_url}/thumb/{number}.jpg"
+        tags = rng.sample(WORDS, 4)
+        minutes, seconds = rng.randint(1, 25), rng.randint(0, 59)
+        views = rng.randint(100, 900000)
+        ld = {
+            "@context": "https://schema.org",
+            "@type": "VideoObject",
+            "name": title,
+            "description": f"Synthetic page for {title}.",
+            "thumbnailUrl": [thumb],
+            "uploadDate": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00+00:00",
+            "duration": f"PT{minutes}M{seconds}S",
+            "author": {"@type": "Person", "name": rng.choice(WORDS).capitalize() + "Studio"},
+            "keywords": ", ".join(tag.capitalize() for tag in tags),
+            "interactionStatistic": [{
+                "@type": "InteractionCounter",
+                "interactionType": {"@type": "WatchAction"},
+                "userInteractionCount": views,
+            }],
+        }
+        tag_links = "".join(f'<a href="/tag/{tag}/">{tag.capitalize()}</a>' for tag in tags)
+        related = []
+        for _ in range(4):
+            other = _title(rng)
+            related.append(
+                f'<div class="video-item"><a href="/video/{_slug(other, rng.randint(1000, 99999))}/" '
+                f'title="{escape(other)}"><img src="{thumb}" alt=""></a>'
+                f'<span class="title">{escape(other)}</span></div>'
+            )
+        return (
+            "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+            f"<title>{escape(title)} - 3DPornDude</title>"
+            f'<meta property="og:title" content="{escape(title)}">'
+            f'<meta property="og:image" content="{thumb}">'
+            f'<script type="application/ld+json">{json.dumps(ld)}</script>'
+            "</head><body>"
+            f'<div class="video-page"><h1 class="video-title">{escape(title)}</h1>'
+            f'<video><source src="{self.base_url}/get_file/{number}_720p.mp4" type="video/mp4" label="720p"></video>'
+            f'<div class="tags">{tag_links}</div>'
+            f'<div class="related-videos related">{"".join(related)}</div>'
+            "</div></body></html>"
+        )
+
+    async def _list_handler(self, request: web.Request) -> web.Response:
+        page = int(request.query.get("page", "1") or 1)
+        key = request.path + "?" + request.query.get("q", "") + request.query.get("sort", "")
+        return web.Response(text=self._list_page(key, page), content_type="text/html")
+
+    async def _detail_handler(self, request: web.Request) -> web.Response:
+        return web.Response(text=self._detail_page(request.match_info["slug"]), content_type="text/html")
+
+    async def _thumb_handler(self, request: web.Request) -> web.Response:
+        return web.Response(body=self._thumb, content_type="image/jpeg")
+
+    def make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/", self._list_handler, name="latest")
+        app.router.add_get("/most-viewed", self._list_handler, name="popular")
+        app.router.add_get("/search", self._list_handler, name="search")
+        app.router.add_get("/tag/{tag}", self._list_handler, name="tag")
+        app.router.add_get("/video/{slug:[^/]+}{slash:/?}", self._detail_handler, name="detail")
+        app.router.add_get("/thumb/{name}", self._thumb_handler, name="thumb")
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        启动服务
+
+        Returns:
+            站点地址，如 http://127.0.0.1:12345
+        """
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve(port: int):
+    site = StandInSite()
+    print(f"stand-in site: {await site.start(port=port)}")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await site.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(_serve(int(sys.argv[1]) if len(sys.argv) > 1 else 8080))
@@ -3,70 +3,123 @@
 用于解析和查询 https://3dporndude.com/ 网站视频信息
 """
 
-import aiohttp
-import random
-from io import BytesIO
-from PIL import Image
+import asyncio
+import functools
+import re
+import time
 from pathlib import Path
-from typing import Optional, List
+from urllib.parse import urljoin
+from typing import Iterable, Optional, List, Set, Tuple
 
-from astrbot.api.event import filter, AstrMessageEvent
+from astrbot.api.event import filter, AstrMessageEvent, MessageChain
 from astrbot.api.star import Context, Star, register
 from astrbot.api import logger
 import astrbot.api.message_components as Comp
 
-from .modules.core import Client, VideoInfo
+from .modules.core import Client, VideoInfo, resolve_parser
 from .modules.errors import (
-    VideoNotFound, NetworkError, TagNotFound, NoResultsFound
+    VideoNotFound, NetworkError, TagNotFound, NoResultsFound, InvalidSortOption,
+    RateLimitError, ServiceBusy, CacheBackendError, DeadlineExceeded, PreviewError
+)
+from .modules.consts import ROOT_URL
+from .modules.tags import TagCatalog, normalize_tag
+from .modules.catalog import VideoCatalog
+from .modules.snapshot import CatalogSnapshot, write_snapshot
+from .modules.subscriptions import SubscriptionManager
+from .modules.sessions import SessionStore
+from .modules.cache import RenderCache
+from .modules.metrics import Metrics
+from .modules.images import fetch_thumbnail
+from .modules.profiling import Profiler
+from .modules.previews import PreviewRenderer
+from .modules.deadline import deadline_scope, current_deadline, bounded
+from .modules.backends import SharedCache, make_backend
+from .modules.transport import Transport, ReplayTransport, HttpArchive, make_transport
+from .modules.formatting import (
+    format_video_info, format_video_list, format_subscription_update, format_stats
+)
+from .modules.admission import (
+    AdmissionController, PRIORITY_DETAIL, PRIORITY_LIST, PRIORITY_RANDOM
 )
-from .modules.consts import POPULAR_TAGS
 
 
 # 缓存目录
 CACHE_DIR = Path(__file__).parent / "cache"
 
+# 动画预览目录（在缓存目录下，按数量轮换，不会被 clean_cache 清理）
+PREVIEW_DIR = CACHE_DIR / "previews"
+
+# 详情命令展示的字段；开启 fast_info 时这些字段可从页面头部获得则提前停止读取
+INFO_FIELDS = ("title", "thumbnail", "duration", "views", "rating", "uploader", "upload_date", "tags")
+
+# 持久化数据目录（不会被 clean_cache 清理）
+DATA_DIR = Path(__file__).parent / "data"
+TAG_CATALOG_FILE = DATA_DIR / "tags.json"
+SUBSCRIPTIONS_FILE = DATA_DIR / "subscriptions.json"
+HTTP_ARCHIVE_FILE = DATA_DIR / "http_archive.zip"
+SHARED_CACHE_FILE = DATA_DIR / "shared_cache.db"
+CATALOG_SNAPSHOT_FILE = DATA_DIR / "catalog.snapshot"
+
+# 命令采样分析报告目录
+PROFILE_DIR = Path(__file__).parent / "profiles"
+
+# 管理员开启采样分析但未指定比例时使用的采样比例
+DEFAULT_PROFILE_SAMPLE_RATE = 0.05
+
+# 命令时间预算和缩略图补发等待时间的默认值（秒）
+DEFAULT_COMMAND_DEADLINE = 15
+DEFAULT_THUMBNAIL_FOLLOWUP = 30
+
+# 订阅轮询间隔下限（秒）
+MIN_SUBSCRIPTION_INTERVAL = 60
+
+# 详情命令中引用上一次列表结果的序号，如 "#3"；不带 # 的纯数字按视频ID处理
+REGEX_RESULT_INDEX = re.compile(r'#(\d{1,3})')
+
+# 缓存图片的最短保留时间（秒），保证正在发送的图片不会被其他命令清理
+CACHE_FILE_MAX_AGE = 300
+
+# 指标文件导出间隔（秒）
+METRICS_DUMP_INTERVAL = 60
+
+# 列表结果后的翻页提示
+LIST_HINT = "使用 /3DPornDude #序号 查看详情，/3DPornDude_next 下一页"
+
 
 def ensure_cache_dir():
     """确保缓存目录存在"""
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def clean_cache():
-    """清理缓存文件"""
-    if CACHE_DIR.exists():
-        for file in CACHE_DIR.iterdir():
-            try:
-                file.unlink()
-            except Exception:
-                pass
-
-
-def apply_mosaic(image: Image.Image, block_size: int = 10) -> Image.Image:
+def clean_cache(keep: Iterable[str] = (), max_age: float = 0):
     """
-    对图片应用马赛克效果
+    清理缓存文件
     
     Args:
-        image: PIL Image对象
-        block_size: 马赛克块大小，越大越模糊
-        
-    Returns:
-        处理后的图片
+        keep: 需要保留的文件路径（仍被渲染缓存引用的图片）
+        max_age: 只清理超过该时间（秒）未使用的文件，避免删除其他命令正在发送的图片
     """
-    if block_size <= 1:
-        return image
-    
-    # 缩小然后放大实现马赛克效果
-    small = image.resize(
-        (max(1, image.width // block_size), max(1, image.height // block_size)),
-        Image.Resampling.BILINEAR
-    )
-    return small.resize(image.size, Image.Resampling.NEAREST)
+    if not CACHE_DIR.exists():
+        return
+    keep = set(keep)
+    deadline = time.time() - max_age
+    for file in CACHE_DIR.iterdir():
+        if str(file) in keep:
+            continue
+        try:
+            if max_age <= 0 or file.stat().st_mtime < deadline:
+                file.unlink()
+        except Exception:
+            pass
 
 
 async def download_and_process_image(
     url: str, 
     mosaic_level: int = 0,
-    proxy: Optional[str] = None
+    proxy: Optional[str] = None,
+    metrics: Optional[Metrics] = None,
+    transport: Optional[Transport] = None,
+    shared_cache: Optional[SharedCache] = None
 ) -> Optional[str]:
     """
     下载并处理图片
@@ -75,121 +128,58 @@ async def download_and_process_image(
         url: 图片URL
         mosaic_level: 马赛克级别 (0=无, 1=轻度, 2=中度, 3=重度)
         proxy: 代理地址
+        metrics: 指标注册表，记录下载和处理耗时
+        transport: 传输层（录制/回放）
+        shared_cache: 多个实例共用的缓存
         
     Returns:
         处理后图片的本地路径
     """
-    if not url:
-        return None
-    
-    ensure_cache_dir()
-    
     try:
-        timeout = aiohttp.ClientTimeout(total=30)
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(url, proxy=proxy) as response:
-                if response.status != 200:
-                    return None
-                
-                image_data = await response.read()
-        
-        # 打开图片
-        image = Image.open(BytesIO(image_data))
-        
-        # 转换为RGB模式（处理RGBA等情况）
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # 应用马赛克
-        if mosaic_level > 0:
-            block_sizes = {1: 8, 2: 15, 3: 25}
-            block_size = block_sizes.get(mosaic_level, 15)
-            image = apply_mosaic(image, block_size)
-        
-        # 保存到缓存
-        filename = f"thumb_{random.randint(100000, 999999)}.jpg"
-        filepath = CACHE_DIR / filename
-        image.save(filepath, "JPEG", quality=85)
-        
-        return str(filepath)
-        
+        return await fetch_thumbnail(
+            url, CACHE_DIR, mosaic_level, proxy, metrics, transport, shared_cache
+        )
+    except DeadlineExceeded as e:
+        logger.warning(f"缩略图未能在时间预算内完成: {e}")
+        return None
     except Exception as e:
         logger.error(f"下载处理图片失败: {e}")
         return None
 
 
-def format_video_info(info: VideoInfo, show_url: bool = True) -> str:
-    """
-    格式化视频信息为文本
-    
-    Args:
-        info: VideoInfo对象
-        show_url: 是否显示URL
-        
-    Returns:
-        格式化的文本
+def admitted(priority: int):
     """
-    lines = []
-    lines.append(f"🎬 {info.title or '无标题'}")
-    
-    if info.duration:
-        lines.append(f"⏱️ 时长: {info.duration}")
-    
-    if info.views:
-        lines.append(f"👁️ 播放: {info.views}")
-    
-    # 过滤无效评分值（-1 通常表示无评分数据）
-    if info.rating and info.rating not in ["-1", "-1%", "N/A", "0"]:
-        lines.append(f"👍 评分: {info.rating}")
-    elif info.likes > 0 or info.dislikes > 0:
-        # 如果有点赞/踩数据，显示点赞数
-        lines.append(f"👍 点赞: {info.likes}")
+    命令准入装饰器：限流并占用一个执行名额，被拒绝时直接回复提示
     
-    if info.uploader:
-        lines.append(f"👤 作者: {info.uploader}")
-    
-    if info.upload_date:
-        lines.append(f"📅 日期: {info.upload_date}")
-    
-    if info.tags:
-        tags_str = ", ".join(info.tags[:5])
-        if len(info.tags) > 5:
-            tags_str += f" (+{len(info.tags) - 5})"
-        lines.append(f"🏷️ 标签: {tags_str}")
-    
-    if show_url:
-        lines.append(f"🔗 {info.url}")
-    
-    # 添加零宽字符防止strip
-    return "\n".join(lines) + "\u200E"
-
-
-def format_video_list(videos: List[VideoInfo], title: str = "视频列表") -> str:
-    """
-    格式化视频列表
+    命令的时间预算从收到命令开始计算，排队时间也计入其中
     
     Args:
-        videos: VideoInfo列表
-        title: 列表标题
-        
-    Returns:
-        格式化的文本
+        priority: 优先级，数值越小越先执行
     """
-    if not videos:
-        return f"📭 {title}: 没有找到视频\u200E"
-    
-    lines = [f"📋 {title} ({len(videos)}个结果):", ""]
-    
-    for i, video in enumerate(videos[:10], 1):
-        duration_str = f" [{video.duration}]" if video.duration else ""
-        views_str = f" 👁️{video.views}" if video.views else ""
-        lines.append(f"{i}. {video.title or video.video_id}{duration_str}{views_str}")
-        lines.append(f"   ID: {video.video_id}")
-    
-    if len(videos) > 10:
-        lines.append(f"\n... 还有 {len(videos) - 10} 个视频")
-    
-    return "\n".join(lines) + "\u200E"
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(self, event: AstrMessageEvent, *args, **kwargs):
+            with deadline_scope(self._get_command_deadline()) as deadline:
+                try:
+                    await self.admission.acquire(
+                        event.get_sender_id(), event.get_group_id() or None, priority
+                    )
+                except (RateLimitError, ServiceBusy) as e:
+                    self.metrics.inc("commands_rejected_total", command=handler.__name__, reason=type(e).__name__)
+                    yield event.plain_result(f"⏳ {e}\u200E")
+                    return
+                try:
+                    with self.metrics.in_flight("commands_in_flight"), \
+                            self.metrics.timer("command_seconds", command=handler.__name__), \
+                            self.profiler.sample(handler.__name__):
+                        async for result in handler(self, event, *args, **kwargs):
+                            yield result
+                finally:
+                    self.admission.release()
+                    if deadline is not None and deadline.expired:
+                        self.metrics.inc("command_deadline_exceeded_total", command=handler.__name__)
+        return wrapper
+    return decorator
 
 
 @register("3dporndude", "vmoranv", "3DPornDude视频解析插件", "1.0.1")
@@ -200,8 +190,29 @@ class Main(Star):
         super().__init__(context)
         self.context = context
         self._plugin_config = {}
-        # 初始时创建默认客户端
-        self.client = Client(proxy=None, timeout=30)
+        # 标签目录和视频目录在客户端重建时保持不变
+        self.tag_catalog = TagCatalog()
+        self.catalog = VideoCatalog()
+        # 导出时在线程中读取已挂载的快照，导入和卸载会关闭它，两者需要串行
+        self._catalog_lock = asyncio.Lock()
+        self.subscriptions = SubscriptionManager()
+        self._poll_task: Optional[asyncio.Task] = None
+        # 等待补发缩略图的后台任务
+        self._followups: Set[asyncio.Task] = set()
+        self.admission = AdmissionController()
+        self.sessions = SessionStore()
+        # 渲染好的回复（文本和处理后的图片路径）
+        self.rendered = RenderCache()
+        # 运行指标，在客户端重建时保持不变
+        self.metrics = Metrics()
+        self.metrics.add_collector(self._collect_metrics)
+        self._metrics_task: Optional[asyncio.Task] = None
+        # 命令采样分析，默认关闭
+        self.profiler = Profiler(PROFILE_DIR)
+        # 动画预览渲染器，开启 preview_enabled 时创建
+        self.previews: Optional[PreviewRenderer] = None
+        # 客户端在首次使用时按当前配置创建
+        self._client: Optional[Client] = None
     
     async def initialize(self):
         """插件初始化"""
@@ -217,42 +228,201 @@ class Main(Star):
         
         self._plugin_config = plugin_config
         
-        # 获取配置
-        proxy = plugin_config.get("proxy", "")
-        timeout = plugin_config.get("timeout", 30)
-        
-        # 关闭旧客户端
-        if self.client:
+        # 配置可能已变化，关闭旧客户端，下次使用时按新配置创建
+        if self._client:
             try:
-                await self.client.close()
+                await self._client.close()
             except Exception:
                 pass
+            self._client = None
         
-        # 创建新客户端
-        self.client = Client(proxy=proxy if proxy else None, timeout=timeout)
+        # 加载持久化的标签目录，并挂载视频目录快照
+        self.tag_catalog.load(TAG_CATALOG_FILE)
+        await self._load_catalog_snapshot(self._get_catalog_snapshot_path())
+        
+        # 命令准入控制
+        self.admission = AdmissionController(
+            max_concurrent=plugin_config.get("max_concurrent_commands", 4),
+            max_queue=plugin_config.get("command_queue_size", 16),
+            user_rate=plugin_config.get("user_rate_per_minute", 10),
+            group_rate=plugin_config.get("group_rate_per_minute", 30)
+        )
+        
+        # 列表结果会话
+        self.sessions.clear()
+        self.sessions = SessionStore(prefetch=plugin_config.get("prefetch_next_page", True))
         
         # 确保缓存目录存在
         ensure_cache_dir()
         
+        # 加载订阅并启动共享的轮询任务
+        self.subscriptions.load(SUBSCRIPTIONS_FILE)
+        if self._poll_task is None or self._poll_task.done():
+            self._poll_task = asyncio.create_task(self._poll_subscriptions())
+        
+        # 按配置定期导出指标文件
+        if self._metrics_task:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+        if plugin_config.get("metrics_file"):
+            self._metrics_task = asyncio.create_task(self._dump_metrics_loop())
+        
+        # 命令采样分析
+        self.profiler.max_files = max(1, plugin_config.get("profile_max_files", 50))
+        try:
+            self.profiler.configure(
+                plugin_config.get("profile_sample_rate", 0.0),
+                plugin_config.get("profile_mode", "cpu") or "cpu"
+            )
+        except ValueError as e:
+            logger.warning(f"采样分析配置无效: {e}")
+        
+        # 动画预览
+        if self.previews is not None:
+            self.previews.close()
+            self.previews = None
+        if plugin_config.get("preview_enabled", False):
+            try:
+                self.previews = PreviewRenderer(
+                    PREVIEW_DIR,
+                    workers=plugin_config.get("preview_workers", 1),
+                    max_frames=plugin_config.get("preview_max_frames", 16),
+                    max_side=plugin_config.get("preview_max_side", 240),
+                    time_budget=plugin_config.get("preview_time_budget", 10),
+                    fmt=plugin_config.get("preview_format", "gif") or "gif",
+                    metrics=self.metrics
+                )
+            except ValueError as e:
+                logger.warning(f"动画预览配置无效: {e}")
+        
         logger.info("3DPornDude 插件已初始化")
     
     async def terminate(self):
         """插件销毁"""
+        # 停止订阅轮询
+        if self._poll_task:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+        if self._metrics_task:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+        for task in list(self._followups):
+            task.cancel()
+        self._followups.clear()
+        if self.previews is not None:
+            self.previews.close()
+            self.previews = None
+        self._save_subscriptions()
+        self.sessions.clear()
+        self.rendered.clear()
+        
         # 关闭客户端
-        if self.client:
-            await self.client.close()
+        if self._client:
+            await self._client.close()
+            self._client = None
+        
+        # 保存标签目录和视频目录快照
+        self._save_tag_catalog()
+        if self._plugin_config.get("save_catalog_snapshot", True) and len(self.catalog):
+            try:
+                await self._save_catalog_snapshot(self._get_catalog_snapshot_path())
+            except OSError as e:
+                logger.error(f"保存视频目录快照失败: {e}")
+        async with self._catalog_lock:
+            self.catalog.close()
         
         # 清理缓存
         clean_cache()
         
         logger.info("3DPornDude 插件已销毁")
     
+    @property
+    def client(self) -> Client:
+        """按当前配置创建的客户端，首次访问时才构建"""
+        if self._client is None:
+            config = self._plugin_config
+            self._client = Client(
+                proxy=self._get_proxy(),
+                timeout=config.get("timeout", 30),
+                tag_catalog=self.tag_catalog,
+                catalog=self.catalog,
+                keep_dom=config.get("keep_dom", False),
+                memory_budget=config.get("memory_budget_mb", 32) * 1024 * 1024,
+                negative_ttl=config.get("negative_cache_ttl", 120),
+                metrics=self.metrics,
+                base_url=config.get("base_url") or ROOT_URL,
+                transport=self._make_transport(),
+                shared_cache=self._make_shared_cache(),
+                shared_ttl=config.get("shared_cache_ttl", 300),
+                parser=self._get_html_parser()
+            )
+            logger.info(f"HTML 解析器: {self._client.parser}")
+        return self._client
+    
+    def _get_html_parser(self) -> str:
+        """获取 HTML 解析器配置，无效或未安装时回退到自动选择"""
+        name = self._plugin_config.get("html_parser", "auto") or "auto"
+        try:
+            resolved = resolve_parser(name)
+        except ValueError as e:
+            logger.warning(f"{e}，改为自动选择")
+            return "auto"
+        if name not in ("auto", resolved):
+            logger.warning(f"HTML 解析器 {name} 未安装，使用 {resolved}")
+        return resolved
+    
+    def _make_shared_cache(self) -> Optional[SharedCache]:
+        """按配置创建多实例共享缓存，未配置或后端不可用时返回 None"""
+        config = self._plugin_config
+        kind = config.get("cache_backend", "")
+        location = config.get("cache_url", "")
+        if kind == "sqlite" and not location:
+            location = str(SHARED_CACHE_FILE)
+        try:
+            backend = make_backend(kind, location)
+        except CacheBackendError as e:
+            logger.error(f"共享缓存不可用，仅使用本地缓存: {e}")
+            return None
+        if backend is None:
+            return None
+        logger.info(f"共享缓存后端: {kind}")
+        return SharedCache(backend)
+    
+    def _make_transport(self) -> Optional[Transport]:
+        """按配置创建录制/回放传输层，直接访问网络时返回 None"""
+        config = self._plugin_config
+        archive = config.get("transport_archive") or HTTP_ARCHIVE_FILE
+        latency = config.get("replay_latency_ms", 0) / 1000
+        try:
+            transport, mode = make_transport(
+                config.get("transport_mode", ""), archive, latency, config.get("timeout", 30)
+            )
+        except ValueError as e:
+            # 回放模式下存档不可用时也不访问网络，所有请求都会失败
+            logger.error(f"传输层配置无效: {e}")
+            return ReplayTransport(HttpArchive()) if config.get("transport_mode") == "replay" else None
+        if transport is not None:
+            logger.info(f"HTTP 传输模式: {mode}，存档: {archive}")
+        return transport
+    
     def _get_mosaic_level(self) -> int:
         """获取马赛克级别配置"""
         if hasattr(self, '_plugin_config'):
             return self._plugin_config.get("mosaic_level", 2)
         return 2
     
+    def _get_command_deadline(self) -> float:
+        """获取命令时间预算配置，0 表示不限制"""
+        return max(0, self._plugin_config.get("command_deadline", DEFAULT_COMMAND_DEADLINE))
+    
+    def _get_thumbnail_followup(self) -> float:
+        """获取缩略图补发等待时间配置，0 表示超出预算的缩略图直接放弃"""
+        return max(0, self._plugin_config.get("thumbnail_followup_timeout", DEFAULT_THUMBNAIL_FOLLOWUP))
+    
     def _get_proxy(self) -> Optional[str]:
         """获取代理配置"""
         if hasattr(self, '_plugin_config'):
@@ -260,14 +430,294 @@ class Main(Star):
             return proxy if proxy else None
         return None
     
+    def _save_tag_catalog(self):
+        """保存标签目录到数据目录"""
+        if not self.tag_catalog.dirty:
+            return
+        try:
+            self.tag_catalog.save(TAG_CATALOG_FILE)
+        except OSError as e:
+            logger.error(f"保存标签目录失败: {e}")
+    
+    def _get_catalog_snapshot_path(self) -> Path:
+        """获取视频目录快照路径配置"""
+        return Path(self._plugin_config.get("catalog_snapshot") or CATALOG_SNAPSHOT_FILE)
+    
+    async def _load_catalog_snapshot(self, path: Path) -> Optional[CatalogSnapshot]:
+        """
+        以内存映射挂载视频目录快照，替换之前挂载的快照
+        
+        正在导出时等待导出完成，再关闭之前的快照
+        
+        Args:
+            path: 快照路径
+            
+        Returns:
+            挂载的快照，文件不存在或无效时返回 None（保持当前目录不变）
+        """
+        if not path.exists():
+            return None
+        started = time.perf_counter()
+        try:
+            snapshot = CatalogSnapshot(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"加载视频目录快照失败: {e}")
+            return None
+        async with self._catalog_lock:
+            self.catalog.attach(snapshot)
+        logger.info(
+            f"已挂载视频目录快照 {path}: {len(snapshot)} 个视频，"
+            f"耗时 {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+        return snapshot
+    
+    async def _save_catalog_snapshot(self, path: Path) -> int:
+        """
+        把视频目录（快照和内存中的视频）写入快照文件
+        
+        构造记录和写文件在线程中进行，不阻塞事件循环；导出期间不会挂载或卸载快照
+        
+        Returns:
+            写入的视频数
+            
+        Raises:
+            OSError: 写入失败
+        """
+        loop = asyncio.get_running_loop()
+        async with self._catalog_lock:
+            return await loop.run_in_executor(None, lambda: write_snapshot(self.catalog.videos(), path))
+    
+    def _save_subscriptions(self):
+        """保存订阅到数据目录"""
+        if not self.subscriptions.dirty:
+            return
+        try:
+            self.subscriptions.save(SUBSCRIPTIONS_FILE)
+        except OSError as e:
+            logger.error(f"保存订阅失败: {e}")
+    
+    def _get_subscription_interval(self) -> int:
+        """获取订阅轮询间隔配置"""
+        interval = self._plugin_config.get("subscription_interval", 600)
+        return max(MIN_SUBSCRIPTION_INTERVAL, interval)
+    
+    async def _poll_subscriptions(self):
+        """定时轮询订阅的标签，每个标签每轮只请求一次并分发给所有订阅会话"""
+        while True:
+            await asyncio.sleep(self._get_subscription_interval())
+            if not len(self.subscriptions):
+                continue
+            try:
+                updates = await self.subscriptions.poll(self.client)
+            except Exception as e:
+                logger.error(f"轮询订阅失败: {e}")
+                continue
+            for session, items in updates.items():
+                try:
+                    await self.context.send_message(
+                        session, MessageChain().message(format_subscription_update(items))
+                    )
+                except Exception as e:
+                    logger.error(f"推送订阅失败 ({session}): {e}")
+            self._save_subscriptions()
+    
+    def _collect_metrics(self):
+        """导出指标时采集各缓存命中率、排队情况等瞬时值"""
+        samples = []
+        if self._client is not None:
+            stats = self._client.memory_stats()
+            samples.append(("page_retained_bytes", {}, stats["retained_bytes"]))
+            for name in ("video_cache", "list_cache", "negative_cache"):
+                samples.append(("cache_hit_ratio", {"cache": name}, stats[name]["hit_ratio"]))
+                samples.append(("cache_entries", {"cache": name}, stats[name]["size"]))
+        rendered = self.rendered.stats()
+        samples.append(("cache_hit_ratio", {"cache": "rendered"}, rendered["hit_ratio"]))
+        samples.append(("cache_entries", {"cache": "rendered"}, rendered["size"]))
+        admission = self.admission.snapshot()
+        samples.append(("commands_waiting", {}, admission["waiting"]))
+        samples.append(("result_sessions", {}, len(self.sessions)))
+        samples.append(("subscribed_tags", {}, len(self.subscriptions)))
+        if self._client is not None and self._client.shared_cache is not None:
+            for event, count in self._client.shared_cache.stats.items():
+                samples.append(("shared_cache_events", {"event": event}, count))
+        return samples
+    
+    def _write_metrics_file(self):
+        """将指标写入配置的文件（Prometheus 文本格式）"""
+        path = Path(self._plugin_config.get("metrics_file", ""))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            tmp_path.write_text(self.metrics.render_prometheus(), encoding="utf-8")
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.error(f"写入指标文件失败: {e}")
+    
+    async def _dump_metrics_loop(self):
+        """定期导出指标文件"""
+        while True:
+            await asyncio.sleep(METRICS_DUMP_INTERVAL)
+            self._write_metrics_file()
+    
+    def _clean_cache(self):
+        """清理不再被渲染缓存引用的过期图片"""
+        keep = [image for _, image in self.rendered.values() if image]
+        clean_cache(keep, max_age=CACHE_FILE_MAX_AGE)
+    
+    async def _reply_info(self, event: AstrMessageEvent, info: VideoInfo, prefix: str = ""):
+        """
+        回复视频详情和缩略图，相同视频数据和马赛克级别直接复用之前的结果
+        
+        缩略图在命令的时间预算内没有处理好时先发送文字，图片处理好后单独补发，
+        补发等待时间为 0 时放弃图片
+        
+        Args:
+            event: 消息事件
+            info: VideoInfo对象
+            prefix: 文字前的说明
+        """
+        mosaic_level = self._get_mosaic_level()
+        key = ("detail", info.video_id, mosaic_level)
+        rendered = self.rendered.get(key, (info,))
+        if rendered is None or (rendered[1] and not Path(rendered[1]).exists()):
+            text = format_video_info(info)
+            task = asyncio.ensure_future(self._render_thumbnail(info, mosaic_level))
+            deadline = current_deadline()
+            try:
+                done, _ = await asyncio.wait({task}, timeout=deadline.remaining() if deadline else None)
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            if task not in done:
+                self._defer_thumbnail(event.unified_msg_origin, key, info, text, task)
+                yield event.plain_result(prefix + text)
+                return
+            rendered = (text, task.result())
+            self.rendered.set(key, (info,), rendered)
+        
+        text, thumb_path = rendered
+        if thumb_path:
+            chain = [
+                Comp.Plain(prefix + text),
+                Comp.Image.fromFileSystem(thumb_path)
+            ]
+            yield event.chain_result(chain)
+        else:
+            yield event.plain_result(prefix + text)
+    
+    async def _render_thumbnail(self, info: VideoInfo, mosaic_level: int) -> Optional[str]:
+        """
+        下载处理缩略图，可用时间为命令剩余的时间预算加上补发等待时间
+        
+        Args:
+            info: VideoInfo对象
+            mosaic_level: 马赛克级别
+            
+        Returns:
+            处理后图片的本地路径，失败或超时时返回 None
+        """
+        deadline = current_deadline()
+        followup = self._get_thumbnail_followup()
+        budget = deadline.remaining() + followup if deadline is not None and followup > 0 else 0
+        # 不设补发时间时沿用命令的时间预算
+        with deadline_scope(budget, inherit=False):
+            return await download_and_process_image(
+                info.thumbnail,
+                mosaic_level,
+                self._get_proxy(),
+                self.metrics,
+                self.client.transport,
+                self.client.shared_cache
+            )
+    
+    def _defer_thumbnail(self, origin: str, key: tuple, info: VideoInfo, text: str, task: asyncio.Future):
+        """文字已发送，缩略图处理好后补发；补发等待时间为 0 时直接放弃"""
+        if self._get_thumbnail_followup() <= 0:
+            task.cancel()
+            self.metrics.inc("thumbnail_followups_total", outcome="dropped")
+            return
+        followup = asyncio.ensure_future(self._send_thumbnail_later(origin, key, info, text, task))
+        self._followups.add(followup)
+        followup.add_done_callback(self._followups.discard)
+    
+    async def _send_thumbnail_later(
+        self, origin: str, key: tuple, info: VideoInfo, text: str, task: asyncio.Future
+    ):
+        """等待缩略图处理完成后单独发送，并写入渲染缓存供下次直接使用"""
+        try:
+            thumb_path = await task
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        self.rendered.set(key, (info,), (text, thumb_path))
+        if not thumb_path:
+            self.metrics.inc("thumbnail_followups_total", outcome="failed")
+            return
+        try:
+            await self.context.send_message(origin, MessageChain().file_image(thumb_path))
+            self.metrics.inc("thumbnail_followups_total", outcome="sent")
+        except Exception as e:
+            self.metrics.inc("thumbnail_followups_total", outcome="failed")
+            logger.error(f"补发缩略图失败 ({origin}): {e}")
+    
+    def _render_list(self, videos: List[VideoInfo], title: str) -> str:
+        """渲染列表，相同标题且视频数据未变化时直接复用之前的文本"""
+        key = ("list", title)
+        rendered = self.rendered.get(key, videos)
+        if rendered is None:
+            # 与详情一致保存为 (文本, 图片路径)，列表没有图片
+            rendered = (format_video_list(videos, title, LIST_HINT if videos else ""), None)
+            self.rendered.set(key, videos, rendered)
+        return rendered[0]
+    
+    def _session_key(self, event: AstrMessageEvent) -> str:
+        """列表结果会话的键，同一会话中的不同用户互不影响"""
+        return f"{event.unified_msg_origin}:{event.get_sender_id()}"
+    
+    async def _open_list(self, event: AstrMessageEvent, fetch, title, page: int) -> str:
+        """
+        获取一页列表并保存为当前用户的结果会话
+        
+        Args:
+            event: 消息事件
+            fetch: 按页码获取列表的函数
+            title: 按页码生成列表标题的函数
+            page: 页码
+            
+        Returns:
+            格式化的列表文本
+        """
+        videos = await fetch(page)
+        self.sessions.open(self._session_key(event), fetch, title, page, videos)
+        return self._render_list(videos, title(page))
+    
+    def _resolve_video_id(self, event: AstrMessageEvent, video_id: str) -> Tuple[str, str]:
+        """
+        把 "#3" 形式的序号解析为上一次列表结果中的视频ID，其他参数原样返回
+        
+        Returns:
+            (视频ID, 错误提示)，解析成功时错误提示为空
+        """
+        match = REGEX_RESULT_INDEX.fullmatch(video_id)
+        if not match:
+            return video_id, ""
+        session = self.sessions.get(self._session_key(event))
+        if session is None:
+            return video_id, "❌ 没有可引用的列表结果，请先使用搜索或列表命令\u200E"
+        item = session.item(int(match.group(1)))
+        if item is None:
+            return video_id, f"❌ 序号超出范围: 1-{len(session.videos)}\u200E"
+        return item.video_id, ""
+    
     @filter.command("3DPornDude")
+    @admitted(PRIORITY_DETAIL)
     async def cmd_video_info(self, event: AstrMessageEvent, video_id: str = ""):
         """
         获取视频详细信息
         用法: /3DPornDude <视频ID>
         """
         # 清理上次缓存
-        clean_cache()
+        self._clean_cache()
         
         if not video_id:
             yield event.plain_result(
@@ -277,32 +727,25 @@ class Main(Star):
             )
             return
         
+        video_id, error = self._resolve_video_id(event, video_id)
+        if error:
+            yield event.plain_result(error)
+            return
+        
         try:
             video = self.client.get_video(video_id)
-            info = await video.get_info()
+            # 流式读取只得到页面头部，不会收集标签和相关视频、缓存视频源或写入共享缓存，默认关闭
+            fast_info = self._plugin_config.get("fast_info", False)
+            info = await video.get_info(fields=INFO_FIELDS if fast_info else None)
             
-            # 格式化信息
-            text = format_video_info(info)
-            
-            # 下载并处理缩略图
-            mosaic_level = self._get_mosaic_level()
-            thumb_path = await download_and_process_image(
-                info.thumbnail, 
-                mosaic_level,
-                self._get_proxy()
-            )
-            
-            if thumb_path:
-                chain = [
-                    Comp.Plain(text),
-                    Comp.Image.fromFileSystem(thumb_path)
-                ]
-                yield event.chain_result(chain)
-            else:
-                yield event.plain_result(text)
+            # 格式化信息并下载处理缩略图
+            async for result in self._reply_info(event, info):
+                yield result
                 
         except VideoNotFound:
             yield event.plain_result(f"❌ 视频不存在: {video_id}\u200E")
+        except DeadlineExceeded as e:
+            yield event.plain_result(f"⏱️ 请求超时，请稍后重试: {e}\u200E")
         except NetworkError as e:
             yield event.plain_result(f"❌ 网络错误: {e}\u200E")
         except Exception as e:
@@ -310,18 +753,22 @@ class Main(Star):
             yield event.plain_result(f"❌ 获取失败: {e}\u200E")
     
     @filter.command("3DPornDude_tag")
-    async def cmd_videos_by_tag(self, event: AstrMessageEvent, tag: str = "", page: str = "1"):
+    @admitted(PRIORITY_LIST)
+    async def cmd_videos_by_tag(
+        self, event: AstrMessageEvent, tag: str = "", page: str = "1", sort: str = "most-viewed"
+    ):
         """
         按标签获取视频列表
-        用法: /3DPornDude_tag <标签> [页码]
+        用法: /3DPornDude_tag <标签> [页码] [排序: most-viewed/newest/top-rated/longest/shortest]
         """
-        clean_cache()
+        self._clean_cache()
         
         if not tag:
-            tags_list = ", ".join(POPULAR_TAGS[:10])
+            tags_list = ", ".join(self.tag_catalog.top(10))
             yield event.plain_result(
                 "❌ 请提供标签名称\n"
-                "用法: /3DPornDude_tag <标签> [页码]\n"
+                "用法: /3DPornDude_tag <标签> [页码] [排序]\n"
+                "排序: most-viewed(默认), newest, top-rated, longest, shortest\n"
                 f"常用标签: {tags_list}\u200E"
             )
             return
@@ -331,11 +778,39 @@ class Main(Star):
         except ValueError:
             page_num = 1
         
+        def open_tag(tag: str):
+            return self._open_list(
+                event,
+                lambda p: self.client.get_videos_by_tag(tag, page=p, sort=sort),
+                lambda p: f"标签: {tag} (第{p}页, {sort})",
+                page_num
+            )
+        
+        # 先原样请求用户输入的标签，站点确认不存在后才基于已知标签更正
+        notice = ""
         try:
-            videos = await self.client.get_videos_by_tag(tag, page=page_num)
-            text = format_video_list(videos, f"标签: {tag} (第{page_num}页)")
-            yield event.plain_result(text)
+            try:
+                text = await open_tag(tag)
+            except TagNotFound:
+                corrected, suggestions = self.tag_catalog.correct(tag)
+                if corrected is None:
+                    hint = f"\n你是不是想找: {', '.join(suggestions)}" if suggestions else ""
+                    yield event.plain_result(f"❌ 标签不存在: {tag}{hint}\u200E")
+                    return
+                notice = f"🔤 标签 \"{tag}\" 不存在，已更正为 \"{corrected}\"\n\n"
+                tag = corrected
+                text = await open_tag(tag)
             
+            # 没有结果时只给出建议，不自动改写
+            session = self.sessions.get(self._session_key(event))
+            if page_num == 1 and session is not None and not session.videos:
+                suggestions = self.tag_catalog.suggest(tag)
+                if suggestions:
+                    text += f"\n你是不是想找: {', '.join(suggestions)}"
+            yield event.plain_result(notice + text)
+            
+        except InvalidSortOption as e:
+            yield event.plain_result(f"❌ {e}\u200E")
         except TagNotFound:
             yield event.plain_result(f"❌ 标签不存在: {tag}\u200E")
         except Exception as e:
@@ -343,12 +818,13 @@ class Main(Star):
             yield event.plain_result(f"❌ 获取失败: {e}\u200E")
     
     @filter.command("3DPornDude_search")
+    @admitted(PRIORITY_LIST)
     async def cmd_search(self, event: AstrMessageEvent, query: str = "", page: str = "1"):
         """
         搜索视频
         用法: /3DPornDude_search <关键词> [页码]
         """
-        clean_cache()
+        self._clean_cache()
         
         if not query:
             yield event.plain_result(
@@ -365,21 +841,33 @@ class Main(Star):
             page_num = 1
         
         try:
-            videos = await self.client.search(query, page=page_num)
-            text = format_video_list(videos, f"搜索: {query} (第{page_num}页)")
+            text = await self._open_list(
+                event,
+                lambda p: self.client.search(query, page=p),
+                lambda p: f"搜索: {query} (第{p}页)",
+                page_num
+            )
             yield event.plain_result(text)
             
+        except NetworkError as e:
+            # 网络不可用时退回本地目录搜索
+            videos = self.client.search_local(query)
+            if not videos:
+                yield event.plain_result(f"❌ 搜索失败: {e}\u200E")
+                return
+            yield event.plain_result(format_video_list(videos, f"搜索: {query} (本地缓存)"))
         except Exception as e:
             logger.error(f"搜索视频失败: {e}")
             yield event.plain_result(f"❌ 搜索失败: {e}\u200E")
     
     @filter.command("3DPornDude_latest")
+    @admitted(PRIORITY_LIST)
     async def cmd_latest(self, event: AstrMessageEvent, page: str = "1"):
         """
         获取最新视频
         用法: /3DPornDude_latest [页码]
         """
-        clean_cache()
+        self._clean_cache()
         
         try:
             page_num = int(page)
@@ -387,8 +875,12 @@ class Main(Star):
             page_num = 1
         
         try:
-            videos = await self.client.get_latest_videos(page=page_num)
-            text = format_video_list(videos, f"最新视频 (第{page_num}页)")
+            text = await self._open_list(
+                event,
+                lambda p: self.client.get_latest_videos(page=p),
+                lambda p: f"最新视频 (第{p}页)",
+                page_num
+            )
             yield event.plain_result(text)
             
         except Exception as e:
@@ -396,12 +888,13 @@ class Main(Star):
             yield event.plain_result(f"❌ 获取失败: {e}\u200E")
     
     @filter.command("3DPornDude_popular")
+    @admitted(PRIORITY_LIST)
     async def cmd_popular(self, event: AstrMessageEvent, page: str = "1"):
         """
         获取热门视频
         用法: /3DPornDude_popular [页码]
         """
-        clean_cache()
+        self._clean_cache()
         
         try:
             page_num = int(page)
@@ -409,44 +902,70 @@ class Main(Star):
             page_num = 1
         
         try:
-            videos = await self.client.get_popular_videos(page=page_num)
-            text = format_video_list(videos, f"热门视频 (第{page_num}页)")
+            text = await self._open_list(
+                event,
+                lambda p: self.client.get_popular_videos(page=p),
+                lambda p: f"热门视频 (第{p}页)",
+                page_num
+            )
             yield event.plain_result(text)
             
         except Exception as e:
             logger.error(f"获取热门视频失败: {e}")
             yield event.plain_result(f"❌ 获取失败: {e}\u200E")
     
+    async def _turn_page(self, event: AstrMessageEvent, step: int):
+        """在当前用户的结果会话中翻页"""
+        session = self.sessions.get(self._session_key(event))
+        if session is None:
+            yield event.plain_result("❌ 没有可翻页的列表结果，请先使用搜索或列表命令\u200E")
+            return
+        page = session.page + step
+        if page < 1:
+            yield event.plain_result("❌ 已经是第一页\u200E")
+            return
+        try:
+            videos = await self.sessions.turn(session, page)
+            yield event.plain_result(self._render_list(videos, session.title(page)))
+        except Exception as e:
+            logger.error(f"翻页失败: {e}")
+            yield event.plain_result(f"❌ 获取失败: {e}\u200E")
+    
+    @filter.command("3DPornDude_next")
+    @admitted(PRIORITY_LIST)
+    async def cmd_next(self, event: AstrMessageEvent):
+        """
+        上一次列表结果的下一页
+        用法: /3DPornDude_next
+        """
+        async for result in self._turn_page(event, 1):
+            yield result
+    
+    @filter.command("3DPornDude_prev")
+    @admitted(PRIORITY_LIST)
+    async def cmd_prev(self, event: AstrMessageEvent):
+        """
+        上一次列表结果的上一页
+        用法: /3DPornDude_prev
+        """
+        async for result in self._turn_page(event, -1):
+            yield result
+    
     @filter.command("3DPornDude_random")
+    @admitted(PRIORITY_RANDOM)
     async def cmd_random(self, event: AstrMessageEvent):
         """
         获取随机视频
         用法: /3DPornDude_random
         """
-        clean_cache()
+        self._clean_cache()
         
         try:
             info = await self.client.get_random_video()
             
-            # 格式化信息
-            text = format_video_info(info)
-            
-            # 下载并处理缩略图
-            mosaic_level = self._get_mosaic_level()
-            thumb_path = await download_and_process_image(
-                info.thumbnail, 
-                mosaic_level,
-                self._get_proxy()
-            )
-            
-            if thumb_path:
-                chain = [
-                    Comp.Plain("🎲 随机视频:\n\n" + text),
-                    Comp.Image.fromFileSystem(thumb_path)
-                ]
-                yield event.chain_result(chain)
-            else:
-                yield event.plain_result("🎲 随机视频:\n\n" + text)
+            # 格式化信息并下载处理缩略图
+            async for result in self._reply_info(event, info, "🎲 随机视频:\n\n"):
+                yield result
                 
         except NoResultsFound:
             yield event.plain_result("❌ 无法获取随机视频\u200E")
@@ -454,14 +973,226 @@ class Main(Star):
             logger.error(f"获取随机视频失败: {e}")
             yield event.plain_result(f"❌ 获取失败: {e}\u200E")
     
+    @filter.command("3DPornDude_preview")
+    @admitted(PRIORITY_RANDOM)
+    async def cmd_preview(self, event: AstrMessageEvent, video_id: str = ""):
+        """
+        获取视频的动画预览
+        用法: /3DPornDude_preview <视频ID|#序号>
+        """
+        if self.previews is None:
+            yield event.plain_result("❌ 动画预览未开启\u200E")
+            return
+        if not video_id:
+            yield event.plain_result("❌ 请提供视频ID\n用法: /3DPornDude_preview <视频ID|#序号>\u200E")
+            return
+        video_id, error = self._resolve_video_id(event, video_id)
+        if error:
+            yield event.plain_result(error)
+            return
+        
+        try:
+            # 列表卡片带有预览地址，目录中没有时请求详情页
+            info = self.catalog.get(video_id)
+            if info is None or not info.preview:
+                info = await self.client.get_video(video_id).get_info()
+            if not info.preview:
+                yield event.plain_result(f"❌ 该视频没有预览片段: {video_id}\u200E")
+                return
+            
+            # 超出时间预算时渲染在后台继续，完成后写入缓存
+            try:
+                path = await bounded(
+                    self.previews.render(
+                        urljoin(self.client.base_url, info.preview),
+                        self._get_mosaic_level(),
+                        self._get_proxy(),
+                        self.client.transport
+                    ),
+                    stage="生成预览"
+                )
+            except DeadlineExceeded:
+                yield event.plain_result("⏱️ 预览仍在生成中，稍后重试即可直接获取\u200E")
+                return
+            yield event.chain_result([Comp.Image.fromFileSystem(path)])
+            
+        except VideoNotFound:
+            yield event.plain_result(f"❌ 视频不存在: {video_id}\u200E")
+        except DeadlineExceeded as e:
+            yield event.plain_result(f"⏱️ 请求超时，请稍后重试: {e}\u200E")
+        except PreviewError as e:
+            yield event.plain_result(f"❌ 无法生成预览: {e}\u200E")
+        except NetworkError as e:
+            yield event.plain_result(f"❌ 网络错误: {e}\u200E")
+        except Exception as e:
+            logger.error(f"生成预览失败: {e}")
+            yield event.plain_result(f"❌ 获取失败: {e}\u200E")
+    
     @filter.command("3DPornDude_tags")
     async def cmd_tags(self, event: AstrMessageEvent):
         """
         列出常用标签
         用法: /3DPornDude_tags
         """
-        tags_list = "\n".join([f"• {tag}" for tag in POPULAR_TAGS])
+        tags = self.tag_catalog.top_with_counts(20)
+        tags_list = "\n".join(
+            [f"• {tag} ({count})" if count else f"• {tag}" for tag, count in tags]
+        )
+        self._save_tag_catalog()
         yield event.plain_result(
             f"🏷️ 常用标签:\n\n{tags_list}\n\n"
             f"使用 /3DPornDude_tag <标签> 查看该标签下的视频\u200E"
         )
+
+    @filter.command("3DPornDude_sub")
+    async def cmd_subscribe(self, event: AstrMessageEvent, tag: str = ""):
+        """
+        订阅标签，有新视频时推送到当前会话
+        用法: /3DPornDude_sub <标签>
+        """
+        if not tag:
+            yield event.plain_result(
+                "❌ 请提供标签名称\n"
+                "用法: /3DPornDude_sub <标签>\u200E"
+            )
+            return
+        
+        # 原样订阅用户输入的标签，未收录的标签只附带建议
+        try:
+            added = self.subscriptions.subscribe(tag, event.unified_msg_origin)
+        except (TagNotFound, ValueError) as e:
+            yield event.plain_result(f"❌ {e}\u200E")
+            return
+        tag = normalize_tag(tag)
+        hint = ""
+        if tag not in self.tag_catalog:
+            suggestions = self.tag_catalog.suggest(tag)
+            if suggestions:
+                hint = f"\n❓ 未收录的标签，你是不是想找: {', '.join(suggestions)}"
+        
+        self._save_subscriptions()
+        if added:
+            minutes = self._get_subscription_interval() // 60
+            yield event.plain_result(f"🔔 已订阅标签: {tag}（约每 {minutes} 分钟检查一次）{hint}\u200E")
+        else:
+            yield event.plain_result(f"ℹ️ 已经订阅过标签: {tag}\u200E")
+    
+    @filter.command("3DPornDude_unsub")
+    async def cmd_unsubscribe(self, event: AstrMessageEvent, tag: str = ""):
+        """
+        取消订阅标签
+        用法: /3DPornDude_unsub <标签>
+        """
+        if not tag:
+            yield event.plain_result(
+                "❌ 请提供标签名称\n"
+                "用法: /3DPornDude_unsub <标签>\u200E"
+            )
+            return
+        
+        if self.subscriptions.unsubscribe(tag, event.unified_msg_origin):
+            self._save_subscriptions()
+            yield event.plain_result(f"🔕 已取消订阅: {tag}\u200E")
+        else:
+            yield event.plain_result(f"❌ 未订阅标签: {tag}\u200E")
+    
+    @filter.command("3DPornDude_subs")
+    async def cmd_subscriptions(self, event: AstrMessageEvent):
+        """
+        列出当前会话订阅的标签
+        用法: /3DPornDude_subs
+        """
+        tags = self.subscriptions.subscriptions_of(event.unified_msg_origin)
+        if not tags:
+            yield event.plain_result("📭 当前会话没有订阅标签\n使用 /3DPornDude_sub <标签> 订阅\u200E")
+            return
+        tags_list = "\n".join(f"• {tag}" for tag in tags)
+        yield event.plain_result(f"🔔 已订阅的标签:\n\n{tags_list}\u200E")
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("3DPornDude_stats")
+    async def cmd_stats(self, event: AstrMessageEvent, fmt: str = ""):
+        """
+        查看运行统计（仅管理员）
+        用法: /3DPornDude_stats [prometheus]
+        """
+        if fmt == "prometheus":
+            if self._plugin_config.get("metrics_file"):
+                self._write_metrics_file()
+            yield event.plain_result(self.metrics.render_prometheus())
+            return
+        yield event.plain_result(format_stats(self.metrics, self._collect_metrics()))
+    
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("3DPornDude_profile")
+    async def cmd_profile(self, event: AstrMessageEvent, action: str = "", rate: str = "", mode: str = ""):
+        """
+        开关命令采样分析（仅管理员）
+        用法: /3DPornDude_profile [on [比例] [cpu|memory|both] | off]
+        """
+        profiler = self.profiler
+        if action == "on":
+            try:
+                sample_rate = float(rate) if rate else (profiler.sample_rate or DEFAULT_PROFILE_SAMPLE_RATE)
+                profiler.configure(sample_rate, mode or None)
+            except ValueError as e:
+                yield event.plain_result(f"❌ {e}\u200E")
+                return
+        elif action == "off":
+            profiler.configure(0.0)
+        elif action not in ("", "status"):
+            yield event.plain_result("用法: /3DPornDude_profile [on [比例] [cpu|memory|both] | off]\u200E")
+            return
+        
+        if profiler.enabled:
+            state = f"开启，采样比例 {profiler.sample_rate:.1%}，模式 {profiler.mode}"
+        else:
+            state = "关闭"
+        reports = profiler.reports()
+        lines = [
+            f"🔬 采样分析: {state}",
+            f"已采样 {profiler.stats['sampled']} 次，"
+            f"因已有分析在进行跳过 {profiler.stats['skipped_busy']} 次",
+            f"报告: {len(reports)} 份，保存在 {profiler.directory}",
+        ]
+        if reports:
+            lines.append(f"最新: {reports[-1].name}")
+        yield event.plain_result("\n".join(lines) + "\u200E")
+    
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("3DPornDude_catalog")
+    async def cmd_catalog(self, event: AstrMessageEvent, action: str = "", path: str = ""):
+        """
+        导出或导入视频目录快照（仅管理员）
+        用法: /3DPornDude_catalog [export [路径] | import [路径]]
+        """
+        target = Path(path) if path else self._get_catalog_snapshot_path()
+        if action == "export":
+            try:
+                count = await self._save_catalog_snapshot(target)
+            except OSError as e:
+                yield event.plain_result(f"❌ 导出失败: {e}\u200E")
+                return
+            yield event.plain_result(f"✅ 已导出 {count} 个视频到 {target}\u200E")
+            return
+        if action == "import":
+            if not target.exists():
+                yield event.plain_result(f"❌ 快照不存在: {target}\u200E")
+                return
+            snapshot = await self._load_catalog_snapshot(target)
+            if snapshot is None:
+                yield event.plain_result(f"❌ 无效的快照: {target}\u200E")
+                return
+            yield event.plain_result(f"✅ 已挂载 {len(snapshot)} 个视频的快照 {target}\u200E")
+            return
+        if action not in ("", "status"):
+            yield event.plain_result("用法: /3DPornDude_catalog [export [路径] | import [路径]]\u200E")
+            return
+        
+        snapshot = self.catalog.snapshot
+        lines = [f"📚 视频目录: {len(self.catalog)} 个视频"]
+        if snapshot is not None:
+            lines.append(f"快照: {snapshot.path}，{len(snapshot)} 个视频，{snapshot.size / 1024:.0f} KB")
+        else:
+            lines.append("快照: 未挂载")
+        yield event.plain_result("\n".join(lines) + "\u200E")
@@ -0,0 +1,213 @@
+"""
+准入控制模块
+限制同时执行的命令数量，并按用户/群组做令牌桶限流
+"""
+
+import time
+import heapq
+import asyncio
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import TTLCache
+from .errors import RateLimitError, ServiceBusy
+
+
+# 命令优先级，数值越小越先获得执行名额
+PRIORITY_DETAIL = 0
+PRIORITY_LIST = 1
+PRIORITY_RANDOM = 2
+
+
+class TokenBucket:
+    """令牌桶"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发次数）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> bool:
+        """尝试取出一个令牌"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def refund(self):
+        """退还一个令牌"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def retry_after(self) -> float:
+        """距离下一个令牌可用的秒数"""
+        self._refill()
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    命令准入控制
+
+    - 全局并发上限，超出时进入有界的优先级等待队列
+    - 队列已满或等待超时立即拒绝，不让请求无限堆积
+    - 每个用户、每个群组各有一个令牌桶
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_queue: int = 16,
+        queue_timeout: float = 10,
+        user_rate: float = 10,
+        user_burst: int = 3,
+        group_rate: float = 30,
+        group_burst: int = 10
+    ):
+        """
+        初始化准入控制
+
+        Args:
+            max_concurrent: 同时执行的命令数量上限
+            max_queue: 等待队列长度上限
+            queue_timeout: 排队等待的最长时间（秒）
+            user_rate: 每个用户每分钟允许的命令数，0 表示不限制
+            user_burst: 每个用户允许的突发命令数
+            group_rate: 每个群组每分钟允许的命令数，0 表示不限制
+            group_burst: 每个群组允许的突发命令数
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.user_rate = user_rate
+        self.user_burst = max(1, user_burst)
+        self.group_rate = group_rate
+        self.group_burst = max(1, group_burst)
+        # 空闲足够久的令牌桶已经补满，过期淘汰不影响限流结果
+        self._buckets = TTLCache(maxsize=4096, ttl=600)
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self.stats: Dict[str, int] = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_rate": 0,
+            "rejected_busy": 0,
+            "timeouts": 0,
+        }
+
+    @property
+    def active(self) -> int:
+        """正在执行的命令数"""
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        """正在排队的命令数"""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def _bucket(self, key: Tuple[str, str], rate: float, burst: int) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate / 60, burst)
+            self._buckets.set(key, bucket)
+        return bucket
+
+    def _throttle(self, user_id: str, group_id: Optional[str]):
+        """
+        按用户和群组限流
+
+        Raises:
+            RateLimitError: 令牌不足
+        """
+        taken: List[TokenBucket] = []
+        checks = []
+        if self.user_rate > 0 and user_id:
+            checks.append((("user", user_id), self.user_rate, self.user_burst))
+        if self.group_rate > 0 and group_id:
+            checks.append((("group", group_id), self.group_rate, self.group_burst))
+        for key, rate, burst in checks:
+            bucket = self._bucket(key, rate, burst)
+            if not bucket.try_take():
+                # 用户被拒绝时不应消耗群组的配额，反之亦然
+                for previous in taken:
+                    previous.refund()
+                self.stats["rejected_rate"] += 1
+                raise RateLimitError(f"请求过于频繁，请 {bucket.retry_after():.0f} 秒后再试")
+            taken.append(bucket)
+
+    async def acquire(self, user_id: str, group_id: Optional[str] = None, priority: int = PRIORITY_LIST):
+        """
+        申请执行名额，成功后必须调用 release
+
+        Args:
+            user_id: 发送者ID
+            group_id: 群组ID，私聊时为空
+            priority: 优先级，数值越小越优先
+
+        Raises:
+            RateLimitError: 用户或群组请求过于频繁
+            ServiceBusy: 等待队列已满或等待超时
+        """
+        self._throttle(user_id, group_id)
+
+        if self._active < self.max_concurrent and not self.waiting:
+            self._active += 1
+            self.stats["admitted"] += 1
+            return
+
+        if self.waiting >= self.max_queue:
+            self.stats["rejected_busy"] += 1
+            raise ServiceBusy("当前请求过多，请稍后再试")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self.stats["queued"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # 超时的同时恰好拿到了名额，直接使用
+                self.stats["admitted"] += 1
+                return
+            future.cancel()
+            self.stats["timeouts"] += 1
+            raise ServiceBusy("排队超时，请稍后再试")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                future.cancel()
+            raise
+        self.stats["admitted"] += 1
+
+    def release(self):
+        """释放执行名额，交给优先级最高的等待者"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # 名额直接移交，_active 保持不变
+                future.set_result(None)
+                return
+        self._active = max(0, self._active - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取当前状态和累计统计"""
+        return {"active": self._active, "waiting": self.waiting, **self.stats}
@@ -0,0 +1,566 @@
+"""
+共享缓存模块
+多个 bot 实例通过同一个缓存后端共享页面、VideoInfo 和处理后的缩略图，
+并用跨实例的单飞锁保证同一页面同时只有一个实例访问上游
+
+后端：
+- MemoryBackend: 进程内，主要用于单实例和测试
+- SQLiteBackend: 同一台机器上的多个实例共享一个数据库文件
+- RedisBackend: 跨机器共享，需要安装 redis (redis-py)
+
+值统一以 bytes 保存；文本和 JSON 用 zlib 压缩
+"""
+
+import json
+import time
+import uuid
+import zlib
+import asyncio
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .cache import TTLCache
+from .deadline import bounded, detached
+from .errors import CacheBackendError
+
+
+# 支持的后端
+BACKENDS = ("memory", "sqlite", "redis")
+
+# 键前缀，同一个 Redis 可以被其他程序共用
+DEFAULT_NAMESPACE = "3dpd:"
+
+# 释放锁：只删除自己持有的锁
+UNLOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def pack_text(text: str) -> bytes:
+    """压缩文本"""
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def unpack_text(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def pack_json(value: Any) -> bytes:
+    """以紧凑 JSON 序列化后压缩"""
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def unpack_json(data: bytes) -> Any:
+    return json.loads(zlib.decompress(data))
+
+
+class CacheBackend(ABC):
+    """
+    缓存后端接口
+
+    所有方法出错时抛出 CacheBackendError
+    """
+
+    @abstractmethod
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        """批量读取，只返回存在的键"""
+
+    @abstractmethod
+    async def set_many(self, items: Sequence[Tuple[str, bytes, float]]):
+        """批量写入 (键, 值, 存活秒数)"""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """删除键"""
+
+    @abstractmethod
+    async def acquire_lock(self, key: str, token: str, ttl: float) -> bool:
+        """尝试加锁，锁已被持有时返回 False"""
+
+    @abstractmethod
+    async def release_lock(self, key: str, token: str):
+        """释放锁，只有持有者能释放"""
+
+    @abstractmethod
+    async def is_locked(self, key: str) -> bool:
+        """锁是否被持有"""
+
+    async def close(self):
+        """释放连接"""
+
+
+class MemoryBackend(CacheBackend):
+    """进程内后端"""
+
+    def __init__(self, maxsize: int = 4096):
+        self._values = TTLCache(maxsize=maxsize, ttl=300)
+        self._locks = TTLCache(maxsize=maxsize, ttl=30)
+
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        found = {}
+        for key in keys:
+            value = self._values.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    async def set_many(self, items: Sequence[Tuple[str, bytes, float]]):
+        for key, value, ttl in items:
+            self._values.set(key, value, ttl=ttl)
+
+    async def delete(self, key: str):
+        self._values.pop(key)
+
+    async def acquire_lock(self, key: str, token: str, ttl: float) -> bool:
+        if key in self._locks:
+            return False
+        self._locks.set(key, token, ttl=ttl)
+        return True
+
+    async def release_lock(self, key: str, token: str):
+        if self._locks.get(key) == token:
+            self._locks.pop(key)
+
+    async def is_locked(self, key: str) -> bool:
+        return key in self._locks
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    SQLite 后端
+
+    数据库操作在线程池中执行；多个进程通过 WAL 模式共享同一文件，
+    过期时间使用墙上时钟以便跨进程比较
+    """
+
+    # 每写入多少次清理一次过期条目
+    PURGE_EVERY = 256
+
+    def __init__(self, path: Union[str, Path], busy_timeout: float = 5.0):
+        """
+        Args:
+            path: 数据库文件路径
+            busy_timeout: 等待其他进程释放数据库的时间（秒）
+
+        Raises:
+            CacheBackendError: 数据库无法打开
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._writes = 0
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                str(self.path), timeout=busy_timeout, isolation_level=None, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, token TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+        except (sqlite3.Error, OSError) as e:
+            raise CacheBackendError(f"无法打开缓存数据库 {self.path}: {e}")
+
+    async def _run(self, func: Callable, *args):
+        def call():
+            with self._lock:
+                return func(*args)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, call)
+        except sqlite3.Error as e:
+            raise CacheBackendError(f"缓存数据库错误: {e}")
+
+    def _get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        placeholders = ",".join("?" * len(keys))
+        rows = self._conn.execute(
+            f"SELECT key, value FROM entries WHERE key IN ({placeholders}) AND expires > ?",
+            (*keys, time.time())
+        )
+        return {key: bytes(value) for key, value in rows}
+
+    def _set_many(self, items: Sequence[Tuple[str, bytes, float]]):
+        now = time.time()
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)",
+                [(key, value, now + ttl) for key, value, ttl in items]
+            )
+            self._writes += len(items)
+            if self._writes >= self.PURGE_EVERY:
+                self._writes = 0
+                self._conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+
+    def _acquire_lock(self, key: str, token: str, ttl: float) -> bool:
+        now = time.time()
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM locks WHERE key = ? AND expires <= ?", (key, now))
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO locks (key, token, expires) VALUES (?, ?, ?)", (key, token, now + ttl)
+            )
+            return cursor.rowcount == 1
+
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        if not keys:
+            return {}
+        return await self._run(self._get_many, list(keys))
+
+    async def set_many(self, items: Sequence[Tuple[str, bytes, float]]):
+        if items:
+            await self._run(self._set_many, list(items))
+
+    async def delete(self, key: str):
+        await self._run(self._conn.execute, "DELETE FROM entries WHERE key = ?", (key,))
+
+    async def acquire_lock(self, key: str, token: str, ttl: float) -> bool:
+        return await self._run(self._acquire_lock, key, token, ttl)
+
+    async def release_lock(self, key: str, token: str):
+        await self._run(self._conn.execute, "DELETE FROM locks WHERE key = ? AND token = ?", (key, token))
+
+    async def is_locked(self, key: str) -> bool:
+        row = await self._run(
+            lambda: self._conn.execute(
+                "SELECT 1 FROM locks WHERE key = ? AND expires > ?", (key, time.time())
+            ).fetchone()
+        )
+        return row is not None
+
+    async def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisBackend(CacheBackend):
+    """Redis 后端，批量读写使用 MGET 和非事务流水线"""
+
+    def __init__(self, url: str = "redis://127.0.0.1:6379/0"):
+        """
+        Args:
+            url: Redis 地址，如 redis://:password@host:6379/0
+
+        Raises:
+            CacheBackendError: 未安装 redis 或地址无效
+        """
+        try:
+            import redis.asyncio as aioredis
+            from redis.exceptions import RedisError
+        except ImportError:
+            raise CacheBackendError("Redis 缓存需要安装 redis: pip install redis")
+        self._errors = (RedisError, OSError)
+        try:
+            self._client = aioredis.Redis.from_url(url)
+        except (ValueError, *self._errors) as e:
+            raise CacheBackendError(f"无效的 Redis 地址 {url}: {e}")
+        self._unlock = self._client.register_script(UNLOCK_SCRIPT)
+
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        if not keys:
+            return {}
+        try:
+            values = await self._client.mget(list(keys))
+        except self._errors as e:
+            raise CacheBackendError(f"Redis 读取失败: {e}")
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    async def set_many(self, items: Sequence[Tuple[str, bytes, float]]):
+        if not items:
+            return
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                for key, value, ttl in items:
+                    pipe.set(key, value, px=max(1, int(ttl * 1000)))
+                await pipe.execute()
+        except self._errors as e:
+            raise CacheBackendError(f"Redis 写入失败: {e}")
+
+    async def delete(self, key: str):
+        try:
+            await self._client.delete(key)
+        except self._errors as e:
+            raise CacheBackendError(f"Redis 删除失败: {e}")
+
+    async def acquire_lock(self, key: str, token: str, ttl: float) -> bool:
+        try:
+            return bool(await self._client.set(key, token, nx=True, px=max(1, int(ttl * 1000))))
+        except self._errors as e:
+            raise CacheBackendError(f"Redis 加锁失败: {e}")
+
+    async def release_lock(self, key: str, token: str):
+        try:
+            await self._unlock(keys=[key], args=[token])
+        except self._errors as e:
+            raise CacheBackendError(f"Redis 解锁失败: {e}")
+
+    async def is_locked(self, key: str) -> bool:
+        try:
+            return bool(await self._client.exists(key))
+        except self._errors as e:
+            raise CacheBackendError(f"Redis 读取失败: {e}")
+
+    async def close(self):
+        # redis-py 5 起 close() 改名为 aclose()
+        close = getattr(self._client, "aclose", None) or self._client.close
+        try:
+            await close()
+        except self._errors:
+            pass
+
+
+def make_backend(kind: str, location: str = "") -> Optional[CacheBackend]:
+    """
+    按配置创建后端
+
+    Args:
+        kind: "" 不使用共享缓存，或 memory / sqlite / redis
+        location: SQLite 文件路径或 Redis 地址
+
+    Returns:
+        后端，不使用共享缓存时返回 None
+
+    Raises:
+        CacheBackendError: 类型未知或后端无法创建
+    """
+    kind = (kind or "").lower()
+    if not kind:
+        return None
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "sqlite":
+        if not location:
+            raise CacheBackendError("SQLite 缓存需要设置数据库文件路径")
+        return SQLiteBackend(location)
+    if kind == "redis":
+        return RedisBackend(location or "redis://127.0.0.1:6379/0")
+    raise CacheBackendError(f"未知的缓存后端: {kind}，可选: {', '.join(BACKENDS)}")
+
+
+class SharedCache:
+    """
+    共享缓存
+
+    - 同一事件循环周期内的读写合并为一次批量请求
+    - get_or_load 先在进程内合并相同键的加载，再用后端锁保证所有实例中只有一个执行加载，
+      其余实例等待结果写入；等待超时后自行加载
+    - 后端出错时视为未命中并直接加载，不影响命令执行
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        namespace: str = DEFAULT_NAMESPACE,
+        lock_ttl: float = 30,
+        wait_timeout: float = 15,
+        poll_interval: float = 0.05
+    ):
+        """
+        Args:
+            backend: 缓存后端
+            namespace: 键前缀
+            lock_ttl: 加载锁的存活时间（秒），持有者崩溃后锁自动失效
+            wait_timeout: 等待其他实例加载的最长时间（秒）
+            poll_interval: 等待时首次检查结果的间隔（秒），之后逐渐加长
+        """
+        self.backend = backend
+        self.namespace = namespace
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.stats: Dict[str, int] = {
+            "hits": 0, "misses": 0, "loads": 0, "waits": 0, "wait_timeouts": 0,
+            "coalesced": 0, "batches": 0, "errors": 0,
+        }
+        self._token = uuid.uuid4().hex
+        self._pending_gets: Dict[str, List[asyncio.Future]] = {}
+        self._pending_sets: Dict[str, Tuple[bytes, float]] = {}
+        self._set_waiters: List[asyncio.Future] = []
+        self._flush_scheduled = False
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _key(self, key: str) -> str:
+        return self.namespace + key
+
+    def _schedule_flush(self):
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(lambda: asyncio.ensure_future(self._flush()))
+
+    async def _flush(self):
+        """把当前累积的读写各合并成一次批量请求"""
+        self._flush_scheduled = False
+        gets, self._pending_gets = self._pending_gets, {}
+        sets, self._pending_sets = self._pending_sets, {}
+        set_waiters, self._set_waiters = self._set_waiters, []
+
+        if sets:
+            self.stats["batches"] += 1
+            try:
+                await self.backend.set_many([(key, value, ttl) for key, (value, ttl) in sets.items()])
+                error = None
+            except CacheBackendError as e:
+                self.stats["errors"] += 1
+                error = e
+            for waiter in set_waiters:
+                if not waiter.done():
+                    if error is None:
+                        waiter.set_result(None)
+                    else:
+                        waiter.set_exception(error)
+
+        if gets:
+            self.stats["batches"] += 1
+            try:
+                found = await self.backend.get_many(list(gets))
+            except CacheBackendError:
+                self.stats["errors"] += 1
+                found = {}
+            for key, waiters in gets.items():
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(found.get(key))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        读取缓存值，后端出错时返回 None
+
+        Args:
+            key: 键（不含前缀）
+        """
+        full_key = self._key(key)
+        pending = self._pending_sets.get(full_key)
+        if pending is not None:
+            self.stats["hits"] += 1
+            return pending[0]
+        waiter = asyncio.get_running_loop().create_future()
+        self._pending_gets.setdefault(full_key, []).append(waiter)
+        self._schedule_flush()
+        value = await waiter
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        """
+        写入缓存值，后端出错时忽略
+
+        Args:
+            key: 键（不含前缀）
+            value: 值
+            ttl: 存活时间（秒）
+        """
+        if ttl <= 0:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._pending_sets[self._key(key)] = (value, ttl)
+        self._set_waiters.append(waiter)
+        self._schedule_flush()
+        try:
+            await waiter
+        except CacheBackendError:
+            pass
+
+    async def get_or_load(
+        self, key: str, loader: Callable[[], Awaitable[bytes]], ttl: float, stage: str = ""
+    ) -> bytes:
+        """
+        读取缓存值，未命中时加载并写入；所有实例中同一键同时只有一个加载
+
+        加载不受任何调用者的时间预算限制，每个调用者只在自己的剩余预算内等待结果
+
+        Args:
+            key: 键（不含前缀）
+            loader: 加载函数
+            ttl: 存活时间（秒）
+            stage: 当前环节，用于超出预算时的错误信息
+
+        Returns:
+            缓存值或加载结果
+
+        Raises:
+            DeadlineExceeded: 调用者的时间预算已用尽
+            loader 抛出的异常
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            # 加载在独立任务中进行，发起者被取消或超时时其他等待者仍能拿到结果
+            with detached():
+                task = asyncio.ensure_future(self._load(key, loader, ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._load_done(key, done))
+        else:
+            self.stats["coalesced"] += 1
+        return await bounded(asyncio.shield(task), stage=stage)
+
+    def _load_done(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # 所有等待者都已取消时避免 "exception was never retrieved" 警告
+            task.exception()
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[bytes]], ttl: float) -> bytes:
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        lock_key = self._key("lock:" + key)
+        deadline = time.monotonic() + self.wait_timeout
+        interval = self.poll_interval
+        while True:
+            try:
+                locked = await self.backend.acquire_lock(lock_key, self._token, self.lock_ttl)
+            except CacheBackendError:
+                self.stats["errors"] += 1
+                return await self._load_and_store(key, loader, ttl)
+            if locked:
+                try:
+                    # 其他实例可能在我们检查之后、加锁之前刚写入
+                    value = await self.get(key)
+                    if value is not None:
+                        return value
+                    return await self._load_and_store(key, loader, ttl)
+                finally:
+                    try:
+                        await self.backend.release_lock(lock_key, self._token)
+                    except CacheBackendError:
+                        self.stats["errors"] += 1
+
+            # 其他实例正在加载，等待结果写入或锁被释放
+            self.stats["waits"] += 1
+            while True:
+                if time.monotonic() >= deadline:
+                    self.stats["wait_timeouts"] += 1
+                    return await self._load_and_store(key, loader, ttl)
+                await asyncio.sleep(interval)
+                interval = min(interval * 2, 1.0)
+                value = await self.get(key)
+                if value is not None:
+                    return value
+                try:
+                    if not await self.backend.is_locked(lock_key):
+                        # 持有者加载失败或已崩溃，重新竞争锁
+                        break
+                except CacheBackendError:
+                    self.stats["errors"] += 1
+                    return await self._load_and_store(key, loader, ttl)
+
+    async def _load_and_store(self, key: str, loader: Callable[[], Awaitable[bytes]], ttl: float) -> bytes:
+        self.stats["loads"] += 1
+        value = await loader()
+        await self.set(key, value, ttl)
+        return value
+
+    async def close(self):
+        """写入尚未提交的数据并关闭后端"""
+        if self._pending_sets or self._pending_gets:
+            await self._flush()
+        await self.backend.close()
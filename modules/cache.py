@@ -0,0 +1,199 @@
+"""
+缓存模块
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+
+class TTLCache:
+    """带过期时间的 LRU 缓存"""
+
+    def __init__(
+        self, maxsize: int = 256, ttl: float = 300,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None
+    ):
+        """
+        初始化缓存
+
+        Args:
+            maxsize: 最大条目数，超出时淘汰最久未使用的条目
+            ttl: 条目存活时间（秒）
+            on_evict: 条目因过期、超出容量或清空而被丢弃时的回调，参数为 (键, 值)；
+                pop 取走的条目不触发
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        获取缓存值
+
+        Args:
+            key: 键
+            default: 未命中时的返回值
+
+        Returns:
+            缓存值或 default
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self._evicted(key, value)
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        写入缓存
+
+        Args:
+            key: 键
+            value: 值
+            ttl: 本条目的存活时间，默认使用缓存的 ttl
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            evicted_key, (_, evicted) = self._data.popitem(last=False)
+            self._evicted(evicted_key, evicted)
+
+    def keys(self) -> List[Hashable]:
+        """获取所有未过期的键"""
+        now = time.monotonic()
+        return [key for key, (expires_at, _) in self._data.items() if expires_at > now]
+
+    def items(self) -> List[tuple]:
+        """获取所有未过期的 (键, 值)，不影响命中统计和淘汰顺序"""
+        now = time.monotonic()
+        return [(key, value) for key, (expires_at, value) in self._data.items() if expires_at > now]
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """删除并返回缓存值"""
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def expire(self) -> int:
+        """
+        丢弃所有已过期的条目
+
+        Returns:
+            丢弃的条目数
+        """
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+        for key in expired:
+            _, value = self._data.pop(key)
+            self._evicted(key, value)
+        return len(expired)
+
+    def clear(self):
+        """清空缓存，包括已过期但尚未丢弃的条目"""
+        entries = list(self._data.items())
+        self._data.clear()
+        for key, (_, value) in entries:
+            self._evicted(key, value)
+
+    def _evicted(self, key: Hashable, value: Any):
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取命中统计"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class RenderCache:
+    """
+    渲染结果缓存
+
+    每个条目记录渲染时所用的数据对象（VideoInfo 等），
+    读取时数据对象已被替换（底层缓存过期后重新获取）则视为失效
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 600):
+        """
+        初始化缓存
+
+        Args:
+            maxsize: 最大条目数
+            ttl: 条目存活时间（秒）
+        """
+        self.invalidations = 0
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, key: Hashable, sources: Sequence[Any]) -> Any:
+        """
+        获取渲染结果
+
+        Args:
+            key: 键，如 (命令, 规范化参数, 马赛克级别)
+            sources: 本次使用的数据对象
+
+        Returns:
+            渲染结果，未命中或数据已变化时返回 None
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        rendered_sources, value = entry
+        if len(rendered_sources) == len(sources) and all(
+            old is new for old, new in zip(rendered_sources, sources)
+        ):
+            return value
+        self._cache.pop(key)
+        self.invalidations += 1
+        return None
+
+    def set(self, key: Hashable, sources: Sequence[Any], value: Any):
+        """
+        写入渲染结果
+
+        Args:
+            key: 键
+            sources: 渲染所用的数据对象
+            value: 渲染结果
+        """
+        self._cache.set(key, (tuple(sources), value))
+
+    def values(self) -> List[Any]:
+        """获取所有未过期的渲染结果"""
+        return [value for _, (_, value) in self._cache.items()]
+
+    def clear(self):
+        """清空缓存"""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取命中统计"""
+        return {**self._cache.stats(), "invalidations": self.invalidations}
@@ -0,0 +1,241 @@
+"""
+本地视频目录模块
+汇总列表页和详情页相关视频中见过的 VideoInfo，提供按 ID 查找、随机抽样和标题搜索
+
+可以挂载一份只读快照（见 snapshot.py），快照中的视频不占用内存中的名额，
+查找、抽样和搜索时与内存中的视频合并，同一视频以内存中的版本为准
+"""
+
+import re
+import heapq
+import random
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .core import VideoInfo
+    from .snapshot import CatalogSnapshot
+
+
+REGEX_TOKEN = re.compile(r'[0-9a-z]+')
+
+
+def tokenize(text: str) -> Set[str]:
+    """将标题切分为小写词元，忽略单字符词元"""
+    return {token for token in REGEX_TOKEN.findall(text.lower()) if len(token) > 1}
+
+
+class VideoCatalog:
+    """
+    有界的本地视频目录
+
+    - 按 video_id 保存最近见过的 VideoInfo（LRU 淘汰）
+    - 对所有见过的视频做蓄水池抽样，用于离线随机推荐
+    - 维护标题词元倒排索引，用于本地搜索
+    """
+
+    def __init__(self, max_videos: int = 20000, reservoir_size: int = 500, seed: Optional[int] = None):
+        """
+        初始化目录
+
+        Args:
+            max_videos: 最多保存的视频数量
+            reservoir_size: 随机蓄水池大小
+            seed: 随机数种子，仅用于测试复现
+        """
+        self.max_videos = max_videos
+        self.reservoir_size = reservoir_size
+        self._videos: "OrderedDict[str, VideoInfo]" = OrderedDict()
+        self._index: Dict[str, Set[str]] = {}
+        self._reservoir: List[str] = []
+        self._observed = 0
+        self._random = random.Random(seed)
+        self._snapshot: Optional["CatalogSnapshot"] = None
+        # 内存中同时存在于快照的视频数，用于计算去重后的总数
+        self._shadowed = 0
+
+    def __len__(self) -> int:
+        if self._snapshot is None:
+            return len(self._videos)
+        return len(self._videos) + len(self._snapshot) - self._shadowed
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self._videos or (self._snapshot is not None and video_id in self._snapshot)
+
+    @property
+    def snapshot(self) -> Optional["CatalogSnapshot"]:
+        """当前挂载的快照"""
+        return self._snapshot
+
+    def attach(self, snapshot: Optional["CatalogSnapshot"]):
+        """
+        挂载快照，替换并关闭之前挂载的快照
+
+        Args:
+            snapshot: 已打开的快照，None 表示只卸载
+        """
+        previous = self._snapshot
+        self._snapshot = snapshot
+        self._shadowed = sum(1 for video_id in self._videos if video_id in snapshot) if snapshot is not None else 0
+        if previous is not None and previous is not snapshot:
+            previous.close()
+
+    def close(self):
+        """卸载并关闭快照"""
+        self.attach(None)
+
+    def get(self, video_id: str) -> Optional["VideoInfo"]:
+        """按 ID 获取已知的 VideoInfo，内存中没有时查找快照，找到后移入内存"""
+        video = self._videos.get(video_id)
+        if video is None and self._snapshot is not None:
+            video = self._snapshot.get(video_id)
+            if video is not None:
+                self.add([video])
+        return video
+
+    def add(self, videos: Iterable["VideoInfo"]) -> int:
+        """
+        加入一批视频
+
+        已存在的视频会被更新为信息更完整的版本（标签更多或字段非空）
+
+        Args:
+            videos: VideoInfo 列表
+
+        Returns:
+            新加入的视频数量
+        """
+        added = 0
+        for video in videos:
+            existing = self._videos.get(video.video_id)
+            if existing is not None:
+                if _richness(video) >= _richness(existing):
+                    self._unindex(existing)
+                    self._videos[video.video_id] = video
+                    self._index_video(video)
+                self._videos.move_to_end(video.video_id)
+                continue
+
+            self._videos[video.video_id] = video
+            self._index_video(video)
+            self._sample(video.video_id)
+            if self._snapshot is not None and video.video_id in self._snapshot:
+                self._shadowed += 1
+            added += 1
+
+        while len(self._videos) > self.max_videos:
+            _, evicted = self._videos.popitem(last=False)
+            self._unindex(evicted)
+            if self._snapshot is not None and evicted.video_id in self._snapshot:
+                self._shadowed -= 1
+        return added
+
+    def _sample(self, video_id: str):
+        """蓄水池抽样（Algorithm R）"""
+        self._observed += 1
+        if len(self._reservoir) < self.reservoir_size:
+            self._reservoir.append(video_id)
+            return
+        slot = self._random.randrange(self._observed)
+        if slot < self.reservoir_size:
+            self._reservoir[slot] = video_id
+
+    def _index_video(self, video: "VideoInfo"):
+        for token in tokenize(video.title):
+            self._index.setdefault(token, set()).add(video.video_id)
+
+    def _unindex(self, video: "VideoInfo"):
+        for token in tokenize(video.title):
+            ids = self._index.get(token)
+            if ids is not None:
+                ids.discard(video.video_id)
+                if not ids:
+                    del self._index[token]
+
+    def random(self) -> Optional["VideoInfo"]:
+        """
+        从蓄水池中随机取一个仍在目录中的视频，挂载了快照时快照中的每个视频也是候选
+
+        Returns:
+            VideoInfo，目录为空时返回 None
+        """
+        candidates = [video_id for video_id in self._reservoir if video_id in self._videos]
+        extra = len(self._snapshot) if self._snapshot is not None else 0
+        if not candidates and not extra:
+            return None
+        choice = self._random.randrange(len(candidates) + extra)
+        if choice < len(candidates):
+            return self._videos[candidates[choice]]
+        row = choice - len(candidates)
+        return self._videos.get(self._snapshot.video_id(row)) or self._snapshot.row(row)
+
+    def search(self, query: str, limit: int = 20) -> List["VideoInfo"]:
+        """
+        在本地目录中按标题搜索
+
+        所有词元都匹配的视频排在前面，其次按匹配词元数排序
+
+        Args:
+            query: 关键词
+            limit: 最多返回数量
+
+        Returns:
+            VideoInfo 列表
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        scores: Dict[str, int] = {}
+        for token in tokens:
+            for video_id in self._index.get(token, ()):
+                scores[video_id] = scores.get(video_id, 0) + 1
+        rows: Dict[str, int] = {}
+        if self._snapshot is not None:
+            # 只为得分最高的行解码 ID；内存中已有的视频标题可能已更新，以内存索引为准，需要跳过。
+            # 先多取 limit 行，跳过后不足 limit 个时再加倍，最多多取 _shadowed 行，
+            # 避免内存中的视频很多时每次搜索都解码大量行
+            matched = list(self._snapshot.match(tokens).items())
+            wanted = limit + min(self._shadowed, limit)
+            while True:
+                top = heapq.nsmallest(wanted, matched, key=lambda item: -item[1])
+                found = {}
+                for row, score in top:
+                    video_id = self._snapshot.video_id(row)
+                    if video_id not in self._videos:
+                        found[video_id] = (row, score)
+                        if len(found) >= limit:
+                            break
+                if len(found) >= limit or len(top) < wanted or wanted >= limit + self._shadowed:
+                    break
+                wanted = min(wanted * 2, limit + self._shadowed)
+            for video_id, (row, score) in found.items():
+                scores[video_id] = score
+                rows[video_id] = row
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [
+            self._snapshot.row(rows[video_id]) if video_id in rows else self._videos[video_id]
+            for video_id, _ in ranked
+        ]
+
+    def videos(self) -> List["VideoInfo"]:
+        """
+        获取目录中全部视频，快照中的视频在前，内存中的按最近使用顺序在后
+
+        先复制内存中的视频再读取快照，可以在线程中调用（如导出快照时）
+        """
+        memory = list(self._videos.values())
+        videos = []
+        if self._snapshot is not None:
+            known = {video.video_id for video in memory}
+            videos.extend(video for video in self._snapshot.videos() if video.video_id not in known)
+        videos.extend(memory)
+        return videos
+
+
+def _richness(video: "VideoInfo") -> int:
+    """粗略衡量 VideoInfo 的信息完整程度"""
+    return (
+        len(video.tags) * 2
+        + bool(video.description) + bool(video.uploader) + bool(video.upload_date)
+        + bool(video.views) + bool(video.duration) + bool(video.rating)
+    )
@@ -123,6 +123,31 @@ REGEX_RELATED_VIDEOS = re.compile(
     re.DOTALL | re.IGNORECASE
 )
 
+# 排序方式 -> 站点 URL 中 sort 参数的取值
+SORT_QUERY_PARAM = "sort"
+SORT_OPTIONS = {
+    "most-viewed": "most-viewed",
+    "newest": "newest",
+    "top-rated": "top-rated",
+}
+
+# 仅支持在本地对已缓存结果排序的方式
+LOCAL_SORT_OPTIONS = tuple(SORT_OPTIONS) + ("longest", "shortest")
+
+# 排序方式别名
+SORT_ALIASES = {
+    "views": "most-viewed",
+    "popular": "most-viewed",
+    "viewed": "most-viewed",
+    "latest": "newest",
+    "new": "newest",
+    "rating": "top-rated",
+    "rated": "top-rated",
+    "top": "top-rated",
+    "long": "longest",
+    "short": "shortest",
+}
+
 # 标签/分类常量
 POPULAR_TAGS = [
     "futanari-hentai",
@@ -3,19 +3,121 @@
 """
 
 import re
-import aiohttp
-from typing import Optional, List, Dict, Any
-from urllib.parse import urljoin, quote_plus
-from bs4 import BeautifulSoup
+import sys
+import time
+import codecs
+import asyncio
+import zlib
+import weakref
+import importlib.util
+from typing import Optional, List, Dict, Any, Iterable, Tuple, TYPE_CHECKING
+from urllib.parse import urljoin, urlencode
 
-from .consts import ROOT_URL, HEADERS, POPULAR_TAGS
+from .consts import ROOT_URL, HEADERS, SORT_OPTIONS, SORT_QUERY_PARAM
 from .errors import (
-    InvalidURL, VideoNotFound, NetworkError, TagNotFound, NoResultsFound
+    InvalidURL, VideoNotFound, NetworkError, TagNotFound, NoResultsFound, DeadlineExceeded
 )
+from .tags import TagCatalog, normalize_tag, is_valid_tag
+from .cache import TTLCache
+from .metrics import Metrics
+from .catalog import VideoCatalog
+from .transport import Transport, TransportResponse
+from .backends import SharedCache, pack_text, unpack_text, pack_json, unpack_json
+from .deadline import bounded, time_left, check_deadline, detached
+from .sources import extract_sources, sources_ttl, select_source
+from .extract import (
+    IncrementalExtractor, extract_structured, extract_tag_links, extract_page_extras, extract_related_cards,
+    is_not_found_page
+)
+from .utils import (
+    parse_views, parse_duration, parse_rating, normalize_sort, sort_videos, filter_videos
+)
+
+if TYPE_CHECKING:
+    import aiohttp
+    from bs4 import BeautifulSoup
+
+
+def _aiohttp():
+    """
+    获取 aiohttp 模块
+
+    aiohttp 导入较慢，在首次发起请求时才导入，插件加载时不需要它
+    """
+    import aiohttp
+    return aiohttp
+
+
+# BeautifulSoup 树构建器，auto 时按顺序选择第一个已安装的
+# html5lib 为纯 Python 实现且比 html.parser 更慢，只在明确指定时使用
+HTML_PARSERS = ("lxml", "html.parser")
+KNOWN_PARSERS = HTML_PARSERS + ("html5lib",)
+
+
+def parser_available(name: str) -> bool:
+    """树构建器是否可用（只查找模块，不导入）"""
+    if name == "html.parser":
+        return True
+    return importlib.util.find_spec(name) is not None
+
+
+def resolve_parser(name: str = "auto") -> str:
+    """
+    选择 HTML 树构建器
+
+    Args:
+        name: auto 或 KNOWN_PARSERS 中的一个
+
+    Returns:
+        可用的树构建器名称；指定的构建器未安装时回退到 html.parser
+
+    Raises:
+        ValueError: 未知的名称
+    """
+    name = (name or "auto").lower()
+    if name == "auto":
+        return next(parser for parser in HTML_PARSERS if parser_available(parser))
+    if name not in KNOWN_PARSERS:
+        raise ValueError(f"未知的 HTML 解析器: {name}，可选: auto, {', '.join(KNOWN_PARSERS)}")
+    return name if parser_available(name) else "html.parser"
+
+
+def make_soup(html_content: str, parser: str = "html.parser") -> "BeautifulSoup":
+    """
+    构建 BeautifulSoup 对象
+
+    bs4 在首次需要 DOM 时才导入，只走快速路径的请求和插件加载都不需要它
+
+    Args:
+        html_content: HTML内容
+        parser: 树构建器，见 resolve_parser
+    """
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html_content, parser)
+
+
+# Video.get_info 解析的全部字段
+DOM_FIELDS = frozenset({
+    "title", "duration", "thumbnail", "preview", "views", "rating", "likes",
+    "dislikes", "uploader", "upload_date", "tags", "description",
+})
 
 
 class VideoInfo:
-    """视频信息数据类"""
+    """
+    视频信息数据类
+    
+    使用 __slots__ 去掉实例 __dict__，并对标签、上传者等高重复字段做字符串驻留，
+    以便在缓存和索引中大量保存。views/duration/rating 在构造时解析为
+    views_count/duration_seconds/rating_percent（无法解析时为 -1），用于本地排序和筛选。
+    """
+    
+    __slots__ = (
+        "video_id", "url", "title", "duration", "thumbnail", "preview",
+        "views", "rating", "likes", "dislikes", "uploader", "upload_date",
+        "_tags", "description", "_related",
+        "views_count", "duration_seconds", "rating_percent",
+    )
     
     def __init__(
         self,
@@ -32,41 +134,49 @@ class VideoInfo:
         uploader: str = "",
         upload_date: str = "",
         tags: Optional[List[str]] = None,
-        description: str = ""
+        description: str = "",
+        related: Optional[List["VideoInfo"]] = None
     ):
         self.video_id = video_id
         self.url = url
         self.title = title
-        self.duration = duration
+        self.duration = sys.intern(duration)
         self.thumbnail = thumbnail
         self.preview = preview
         self.views = views
-        self.rating = rating
+        self.rating = sys.intern(rating)
         self.likes = likes
         self.dislikes = dislikes
-        self.uploader = uploader
-        self.upload_date = upload_date
-        self.tags = tags if tags is not None else []
+        self.uploader = sys.intern(uploader)
+        self.upload_date = sys.intern(upload_date)
+        self.tags = tags
         self.description = description
+        self.related = related
+        self.views_count = parse_views(views)
+        self.duration_seconds = parse_duration(duration)
+        self.rating_percent = parse_rating(rating)
     
-    def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        return {
-            "video_id": self.video_id,
-            "url": self.url,
-            "title": self.title,
-            "duration": self.duration,
-            "thumbnail": self.thumbnail,
-            "preview": self.preview,
-            "views": self.views,
-            "rating": self.rating,
-            "likes": self.likes,
-            "dislikes": self.dislikes,
-            "uploader": self.uploader,
-            "upload_date": self.upload_date,
-            "tags": self.tags,
-            "description": self.description,
-        }
+    @property
+    def tags(self) -> Tuple[str, ...]:
+        """标签（只读元组，修改时整体赋值 info.tags = [...]）"""
+        return self._tags
+    
+    @tags.setter
+    def tags(self, value: Optional[List[str]]):
+        # 标签以驻留字符串元组保存，相同标签在所有实例间共享同一对象
+        self._tags = tuple(sys.intern(tag) for tag in value) if value else ()
+    
+    @property
+    def related(self) -> Tuple["VideoInfo", ...]:
+        """详情页中的相关视频（只读元组，仅包含列表卡片上的字段）"""
+        return self._related
+    
+    @related.setter
+    def related(self, value: Optional[List["VideoInfo"]]):
+        self._related = tuple(value) if value else ()
+    
+    def __repr__(self) -> str:
+        return f"VideoInfo(video_id={self.video_id!r}, title={self.title!r})"
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -83,9 +193,17 @@ class VideoInfo:
             "dislikes": self.dislikes,
             "uploader": self.uploader,
             "upload_date": self.upload_date,
-            "tags": self.tags,
+            "tags": list(self._tags),
             "description": self.description,
+            "related": [video.to_dict() for video in self._related],
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VideoInfo":
+        """从 to_dict 的结果恢复 VideoInfo"""
+        data = dict(data)
+        related = [cls.from_dict(item) for item in data.pop("related", None) or ()]
+        return cls(**data, related=related)
 
 
 class Video:
@@ -101,44 +219,111 @@ class Video:
         """
         self.video_id = video_id
         self.client = client
-        self.url = f"{ROOT_URL}/video/{video_id}"
+        self.url = f"{client.base_url}/video/{video_id}"
         self._html_content: Optional[str] = None
-        self._soup: Optional[BeautifulSoup] = None
+        self._soup: Optional["BeautifulSoup"] = None
         self._info: Optional[VideoInfo] = None
+        self._partial: Optional[VideoInfo] = None
+        self._partial_fields: frozenset = frozenset()
+        self._retained: Optional[weakref.finalize] = None
     
     async def _fetch_page(self) -> str:
         """获取视频页面HTML"""
         if self._html_content is None:
-            self._html_content = await self.client.fetch(self.url)
-            if "404" in self._html_content and "not found" in self._html_content.lower():
-                raise VideoNotFound(f"视频不存在: {self.video_id}")
+            self._check_missing()
+            try:
+                self._set_html(await self.client.fetch(self.url))
+            except VideoNotFound:
+                self.client.mark_missing(("video", self.video_id))
+                raise
         return self._html_content
     
-    async def _get_soup(self) -> BeautifulSoup:
+    def _check_missing(self):
+        """视频近期已确认不存在时直接抛出异常，不发起请求"""
+        if self.client.is_missing(("video", self.video_id)):
+            raise VideoNotFound(f"视频不存在: {self.video_id}")
+    
+    def _set_html(self, html_content: str):
+        """保存页面HTML并登记其占用的内存"""
+        if is_not_found_page(html_content):
+            raise VideoNotFound(f"视频不存在: {self.video_id}")
+        self._html_content = html_content
+        # 登记页面占用的内存，对象被回收或 release() 时自动扣除
+        size = len(html_content)
+        self.client._retain_bytes(size)
+        self._retained = weakref.finalize(self, self.client._release_bytes, size)
+    
+    @property
+    def dom_released(self) -> bool:
+        """页面 HTML 和 DOM 是否已释放"""
+        return self._html_content is None and self._soup is None
+    
+    def release(self):
+        """释放原始 HTML 和 BeautifulSoup 树，仅保留解析出的 VideoInfo"""
+        self._html_content = None
+        self._soup = None
+        if self._retained is not None:
+            self._retained()
+            self._retained = None
+    
+    async def _get_soup(self) -> "BeautifulSoup":
         """获取BeautifulSoup对象"""
         if self._soup is None:
             html_content = await self._fetch_page()
-            self._soup = BeautifulSoup(html_content, 'html.parser')
+            self._soup = make_soup(html_content, self.client.parser)
         return self._soup
     
-    async def get_info(self) -> VideoInfo:
-        """获取视频完整信息"""
-        if self._info is not None:
-            return self._info
+    async def _stream_info(self, fields: Iterable[str]) -> Optional[VideoInfo]:
+        """
+        流式读取页面，所需字段从 <head> 元数据中全部获得后立即停止
         
-        soup = await self._get_soup()
-        html_content = await self._fetch_page()
+        提前停止时没有页面正文，标签目录、视频目录、视频源缓存和共享缓存都不会更新
+        
+        Args:
+            fields: 需要的字段名
+            
+        Returns:
+            只包含所需字段的 VideoInfo；页面读完仍不完整时返回 None，
+            此时完整页面已保存，可继续完整解析
+        """
+        fields = frozenset(fields)
+        if self._partial is not None and fields <= self._partial_fields:
+            return self._partial
+        
+        self._check_missing()
+        extractor = IncrementalExtractor(fields)
+        try:
+            html_content, complete = await self.client.fetch_until(self.url, extractor)
+            if complete and not extractor.not_found:
+                self._partial = VideoInfo(video_id=self.video_id, url=self.url, **extractor.fields())
+                self._partial_fields = frozenset(extractor.fields())
+                return self._partial
+            self._set_html(html_content)
+        except VideoNotFound:
+            self.client.mark_missing(("video", self.video_id))
+            raise
+        return None
+    
+    def _extract_from_dom(self, soup: "BeautifulSoup", html_content: str, missing: set) -> Dict[str, Any]:
+        """
+        用 DOM 启发式查找补齐缺失字段
+        
+        Args:
+            soup: 页面 BeautifulSoup 对象
+            html_content: 页面HTML
+            missing: 需要补齐的字段名集合
+            
+        Returns:
+            字段字典；包含 tags 时额外带有 tag_slugs
+        """
+        fields: Dict[str, Any] = {}
         
         # 解析标题
-        title = ""
-        title_elem = soup.find('h1', class_=lambda x: x and 'title' in x.lower() if x else False)
-        if title_elem:
-            title = title_elem.get_text(strip=True)
-        else:
-            # 尝试从 og:title 获取
-            og_title = soup.find('meta', property='og:title')
-            if og_title:
-                title = og_title.get('content', '')
+        if "title" in missing:
+            title = ""
+            title_elem = soup.find('h1', class_=lambda x: x and 'title' in x.lower() if x else False)
+            if title_elem:
+                title = title_elem.get_text(strip=True)
             else:
                 # 尝试从 <title> 获取
                 title_tag = soup.find('title')
@@ -147,121 +332,259 @@ class Video:
                     # 移除网站名称后缀
                     if ' - ' in title:
                         title = title.rsplit(' - ', 1)[0]
+            fields["title"] = title
         
         # 解析时长
-        duration = ""
-        duration_elem = soup.find('span', class_=lambda x: x and 'duration' in x.lower() if x else False)
-        if duration_elem:
-            duration = duration_elem.get_text(strip=True)
-        else:
-            # 从页面文本中查找时长模式
-            duration_match = re.search(r'(\d+:\d+(?::\d+)?)', html_content)
-            if duration_match:
-                duration = duration_match.group(1)
+        if "duration" in missing:
+            duration = ""
+            duration_elem = soup.find('span', class_=lambda x: x and 'duration' in x.lower() if x else False)
+            if duration_elem:
+                duration = duration_elem.get_text(strip=True)
+            else:
+                # 从页面文本中查找时长模式
+                duration_match = re.search(r'(\d+:\d+(?::\d+)?)', html_content)
+                if duration_match:
+                    duration = duration_match.group(1)
+            fields["duration"] = duration
         
-        # 解析缩略图
-        thumbnail = ""
-        og_image = soup.find('meta', property='og:image')
-        if og_image:
-            thumbnail = og_image.get('content', '')
-        else:
-            # 查找视频播放器附近的图片
+        # 解析缩略图（查找视频播放器附近的图片）
+        if "thumbnail" in missing:
+            thumbnail = ""
             video_container = soup.find('div', class_=lambda x: x and 'player' in x.lower() if x else False)
             if video_container:
                 img = video_container.find('img')
                 if img:
                     thumbnail = img.get('src') or img.get('data-src', '')
+            fields["thumbnail"] = thumbnail
         
         # 解析预览图
-        preview = ""
-        preview_elem = soup.find(attrs={'data-preview': True})
-        if preview_elem:
-            preview = preview_elem.get('data-preview', '')
+        if "preview" in missing:
+            preview_elem = soup.find(attrs={'data-preview': True})
+            fields["preview"] = preview_elem.get('data-preview', '') if preview_elem else ""
         
         # 解析观看数
-        views = ""
-        views_elem = soup.find('span', class_=lambda x: x and 'views' in x.lower() if x else False)
-        if views_elem:
-            views = views_elem.get_text(strip=True)
-        else:
-            # 查找包含视图数的文本
-            views_match = re.search(r'([\d,\.]+[KMB]?)\s*(?:views?|播放)', html_content, re.IGNORECASE)
-            if views_match:
-                views = views_match.group(1)
+        if "views" in missing:
+            views = ""
+            views_elem = soup.find('span', class_=lambda x: x and 'views' in x.lower() if x else False)
+            if views_elem:
+                views = views_elem.get_text(strip=True)
+            else:
+                # 查找包含视图数的文本
+                views_match = re.search(r'([\d,\.]+[KMB]?)\s*(?:views?|播放)', html_content, re.IGNORECASE)
+                if views_match:
+                    views = views_match.group(1)
+            fields["views"] = views
         
         # 解析评分
-        rating = ""
-        rating_elem = soup.find('span', class_=lambda x: x and ('rating' in x.lower() or 'like' in x.lower()) if x else False)
-        if rating_elem:
-            rating = rating_elem.get_text(strip=True)
+        if "rating" in missing:
+            rating_elem = soup.find('span', class_=lambda x: x and ('rating' in x.lower() or 'like' in x.lower()) if x else False)
+            fields["rating"] = rating_elem.get_text(strip=True) if rating_elem else ""
         
         # 解析点赞/不喜欢
-        likes = 0
-        dislikes = 0
-        likes_elem = soup.find('span', class_=lambda x: x and 'like' in x.lower() and 'dis' not in x.lower() if x else False)
-        if likes_elem:
-            likes_text = likes_elem.get_text(strip=True)
-            likes_match = re.search(r'(\d+)', likes_text)
-            if likes_match:
-                likes = int(likes_match.group(1))
-        
-        dislikes_elem = soup.find('span', class_=lambda x: x and 'dislike' in x.lower() if x else False)
-        if dislikes_elem:
-            dislikes_text = dislikes_elem.get_text(strip=True)
-            dislikes_match = re.search(r'(\d+)', dislikes_text)
-            if dislikes_match:
-                dislikes = int(dislikes_match.group(1))
+        if "likes" in missing:
+            likes = 0
+            likes_elem = soup.find('span', class_=lambda x: x and 'like' in x.lower() and 'dis' not in x.lower() if x else False)
+            if likes_elem:
+                likes_match = re.search(r'(\d+)', likes_elem.get_text(strip=True))
+                if likes_match:
+                    likes = int(likes_match.group(1))
+            fields["likes"] = likes
+        
+        if "dislikes" in missing:
+            dislikes = 0
+            dislikes_elem = soup.find('span', class_=lambda x: x and 'dislike' in x.lower() if x else False)
+            if dislikes_elem:
+                dislikes_match = re.search(r'(\d+)', dislikes_elem.get_text(strip=True))
+                if dislikes_match:
+                    dislikes = int(dislikes_match.group(1))
+            fields["dislikes"] = dislikes
         
         # 解析上传者
-        uploader = ""
-        uploader_link = soup.find('a', href=lambda x: x and ('/creator/' in x or '/channel/' in x or '/uploader/' in x) if x else False)
-        if uploader_link:
-            uploader = uploader_link.get_text(strip=True)
-        else:
-            # 查找上传者相关的元素
-            uploader_elem = soup.find(class_=lambda x: x and ('creator' in x.lower() or 'uploader' in x.lower() or 'channel' in x.lower()) if x else False)
-            if uploader_elem:
-                uploader = uploader_elem.get_text(strip=True)
+        if "uploader" in missing:
+            uploader = ""
+            uploader_link = soup.find('a', href=lambda x: x and ('/creator/' in x or '/channel/' in x or '/uploader/' in x) if x else False)
+            if uploader_link:
+                uploader = uploader_link.get_text(strip=True)
+            else:
+                # 查找上传者相关的元素
+                uploader_elem = soup.find(class_=lambda x: x and ('creator' in x.lower() or 'uploader' in x.lower() or 'channel' in x.lower()) if x else False)
+                if uploader_elem:
+                    uploader = uploader_elem.get_text(strip=True)
+            fields["uploader"] = uploader
         
         # 解析上传日期
-        upload_date = ""
-        date_elem = soup.find('span', class_=lambda x: x and ('date' in x.lower() or 'time' in x.lower() or 'ago' in x.lower()) if x else False)
-        if date_elem:
-            upload_date = date_elem.get_text(strip=True)
+        if "upload_date" in missing:
+            date_elem = soup.find('span', class_=lambda x: x and ('date' in x.lower() or 'time' in x.lower() or 'ago' in x.lower()) if x else False)
+            fields["upload_date"] = date_elem.get_text(strip=True) if date_elem else ""
         
         # 解析标签
-        tags = []
-        tag_links = soup.find_all('a', href=lambda x: x and '/tag/' in x if x else False)
-        for tag_link in tag_links:
-            tag_text = tag_link.get_text(strip=True)
-            if tag_text and tag_text not in tags:
-                tags.append(tag_text)
+        if "tags" in missing:
+            tags = []
+            tag_slugs = []
+            tag_links = soup.find_all('a', href=lambda x: x and '/tag/' in x if x else False)
+            for tag_link in tag_links:
+                tag_text = tag_link.get_text(strip=True)
+                if tag_text and tag_text not in tags:
+                    tags.append(tag_text)
+                slug_match = re.search(r'/tag/([^/?#"]+)', tag_link.get('href', ''))
+                if slug_match and slug_match.group(1) not in tag_slugs:
+                    tag_slugs.append(slug_match.group(1))
+            fields["tags"] = tags
+            fields["tag_slugs"] = tag_slugs
         
         # 解析描述
-        description = ""
-        desc_elem = soup.find('div', class_=lambda x: x and ('description' in x.lower() or 'desc' in x.lower()) if x else False)
-        if desc_elem:
-            description = desc_elem.get_text(strip=True)
-        
-        self._info = VideoInfo(
-            video_id=self.video_id,
-            url=self.url,
-            title=title,
-            duration=duration,
-            thumbnail=thumbnail,
-            preview=preview,
-            views=views,
-            rating=rating,
-            likes=likes,
-            dislikes=dislikes,
-            uploader=uploader,
-            upload_date=upload_date,
-            tags=tags,
-            description=description,
+        if "description" in missing:
+            desc_elem = soup.find('div', class_=lambda x: x and ('description' in x.lower() or 'desc' in x.lower()) if x else False)
+            fields["description"] = desc_elem.get_text(strip=True) if desc_elem else ""
+        
+        return fields
+    
+    async def get_info(self, fields: Optional[Iterable[str]] = None) -> VideoInfo:
+        """
+        获取视频信息
+        
+        Args:
+            fields: 只需要的字段，如 {"title", "thumbnail"}，须为 extract.STRUCTURED_FIELDS 的子集。
+                指定时以流式方式读取页面，字段全部从 OpenGraph/JSON-LD 中获得后立即停止读取，
+                返回只填充了这些字段的 VideoInfo（不会缓存为完整信息，也不会更新标签目录、视频目录、
+                视频源缓存和共享缓存）；读完页面仍不完整时回退到完整解析
+            
+        Returns:
+            VideoInfo对象
+            
+        Raises:
+            VideoNotFound: 视频不存在
+            NetworkError: 请求失败或超时
+            DeadlineExceeded: 当前命令的时间预算已用尽
+        """
+        if self._info is not None:
+            return self._info
+        
+        shared = self.client.shared_cache
+        if shared is not None and self._html_content is None:
+            # 其他实例已解析过时直接使用，完整信息也满足只需要部分字段的调用
+            data = await self.client._shared_get_json("info:" + self.video_id)
+            if data is not None:
+                self._info = VideoInfo.from_dict(data)
+                self.client.catalog.add([*self._info.related, self._info])
+                return self._info
+        
+        if fields and self._html_content is None:
+            partial = await self._stream_info(fields)
+            if partial is not None:
+                return partial
+        
+        html_content = await self._fetch_page()
+        parse_started = time.perf_counter()
+        
+        # 快速路径：JSON-LD / OpenGraph 结构化数据和正则，不构建 DOM
+        parsed = extract_structured(html_content)
+        tag_names, tag_slugs = extract_tag_links(html_content)
+        if tag_names and "tags" not in parsed:
+            parsed["tags"] = tag_names
+        for key, value in extract_page_extras(html_content).items():
+            parsed.setdefault(key, value)
+        
+        # 仍有字段为空时才构建 DOM，只查找这些字段；DOM 中也找不到的保留快速路径的结果
+        soup = None
+        missing = {field for field in DOM_FIELDS if parsed.get(field) in (None, "", [])}
+        if missing:
+            # 构建 DOM 是详情解析中最慢的一步，预算已用尽时放弃；页面仍保留，重试时不必重新下载
+            check_deadline("解析页面")
+            soup = await self._get_soup()
+            dom_fields = self._extract_from_dom(soup, html_content, missing)
+            dom_slugs = dom_fields.pop("tag_slugs", [])
+            tag_slugs = tag_slugs or dom_slugs
+            for key, value in dom_fields.items():
+                if value or key not in parsed:
+                    parsed[key] = value
+            self.client.parse_stats["dom_fallback"] += 1
+            parse_path = "dom"
+        else:
+            self.client.parse_stats["structured_only"] += 1
+            parse_path = "structured"
+        
+        # 将页面中的标签计入标签目录
+        self.client.tag_catalog.record(tag_slugs)
+        
+        # 顺带收集相关视频卡片，不需要额外请求
+        related = self.client._parse_related(html_content, soup)
+        related = [video for video in related if video.video_id != self.video_id]
+        
+        self._info = VideoInfo(video_id=self.video_id, url=self.url, related=related, **parsed)
+        self.client.catalog.add(related + [self._info])
+        
+        # 释放页面前顺带解析视频源，供 get_sources 直接使用
+        self.client._cache_sources(self.video_id, html_content)
+        self.client.metrics.observe(
+            "parse_seconds", time.perf_counter() - parse_started, stage="detail", path=parse_path
         )
         
+        # 内存受限模式下提取完成后立即释放 DOM 和原始 HTML
+        if not self.client.keep_dom or self.client.over_memory_budget():
+            self.release()
+        
+        if shared is not None:
+            await shared.set("info:" + self.video_id, pack_json(self._info.to_dict()), self.client.shared_ttl)
+        
         return self._info
     
+    async def get_sources(self) -> Dict[str, str]:
+        """
+        获取各清晰度的 mp4 视频源
+        
+        优先使用缓存（缓存时间不超过签名URL的有效期），其次使用已获取的页面，
+        两者都没有时才请求详情页
+        
+        Returns:
+            清晰度 -> URL，按清晰度从高到低排列
+        """
+        cached = self.client._source_cache.get(self.video_id)
+        if cached is not None:
+            return dict(cached)
+        
+        fetched = self._html_content is None
+        html_content = await self._fetch_page()
+        sources = self.client._cache_sources(self.video_id, html_content)
+        if fetched and self._info is not None and not self.client.keep_dom:
+            self.release()
+        return sources
+    
+    async def get_source(self, quality: str = "best") -> Optional[str]:
+        """
+        按清晰度获取视频源
+        
+        Args:
+            quality: "best"、"worst" 或具体清晰度如 "720p"
+            
+        Returns:
+            URL，没有可用视频源时返回 None
+        """
+        return select_source(await self.get_sources(), quality)
+    
+    async def probe_sources(self, concurrency: int = 4) -> Dict[str, Optional[int]]:
+        """
+        并发发送 HEAD 请求获取各清晰度视频文件大小
+        
+        Args:
+            concurrency: 最大并发数
+            
+        Returns:
+            清晰度 -> 字节数，获取失败时为 None
+            
+        Raises:
+            DeadlineExceeded: 当前命令的时间预算已用尽
+        """
+        sources = await self.get_sources()
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def probe(url: str) -> Optional[int]:
+            async with semaphore:
+                return await self.client.probe_size(url)
+        
+        sizes = await asyncio.gather(*(probe(url) for url in sources.values()))
+        return dict(zip(sources, sizes))
+    
     @property
     async def title(self) -> str:
         """获取视频标题"""
@@ -287,8 +610,8 @@ class Video:
         return info.views
     
     @property
-    async def tags(self) -> List[str]:
-        """获取标签列表"""
+    async def tags(self) -> Tuple[str, ...]:
+        """获取标签"""
         info = await self.get_info()
         return info.tags
 
@@ -296,21 +619,134 @@ class Video:
 class Client:
     """3DPornDude API客户端"""
     
-    def __init__(self, proxy: Optional[str] = None, timeout: int = 30):
+    def __init__(
+        self,
+        proxy: Optional[str] = None,
+        timeout: int = 30,
+        tag_catalog: Optional[TagCatalog] = None,
+        catalog: Optional[VideoCatalog] = None,
+        keep_dom: bool = False,
+        memory_budget: int = 32 * 1024 * 1024,
+        video_cache_size: int = 128,
+        video_cache_ttl: float = 600,
+        list_cache_size: int = 256,
+        list_cache_ttl: float = 300,
+        source_ttl: float = 1800,
+        negative_ttl: float = 120,
+        metrics: Optional[Metrics] = None,
+        base_url: str = ROOT_URL,
+        transport: Optional[Transport] = None,
+        shared_cache: Optional[SharedCache] = None,
+        shared_ttl: float = 300,
+        parser: str = "auto"
+    ):
         """
         初始化客户端
         
         Args:
             proxy: 代理服务器地址，如 "http://127.0.0.1:7890"
             timeout: 请求超时时间（秒）
+            tag_catalog: 标签目录，默认新建一个以 POPULAR_TAGS 为种子的目录
+            catalog: 本地视频目录，汇总列表页和相关视频中见过的视频
+            keep_dom: 解析后是否保留页面 HTML 和 DOM；为 False 时提取完字段立即释放
+            memory_budget: 保留页面 HTML 的内存预算（字节），超出后即使 keep_dom 也会释放
+            video_cache_size: Video 对象缓存的最大数量，0 表示不缓存
+            video_cache_ttl: Video 对象缓存时间（秒）
+            list_cache_size: 列表页结果缓存的最大页数，0 表示不缓存
+            list_cache_ttl: 列表页结果缓存时间（秒）
+            source_ttl: 视频源缓存时间上限（秒），签名URL更早过期时以其为准
+            negative_ttl: 已确认不存在的视频/标签的缓存时间（秒），0 表示不缓存
+            metrics: 指标注册表，用于统计请求和解析耗时，默认新建一个
+            base_url: 站点地址，可指向镜像站或本地测试站点
+            transport: 传输层（录制/回放），默认使用自带的 aiohttp 会话直接访问网络
+            shared_cache: 多个实例共用的缓存，保存页面、列表和 VideoInfo，同一页面在所有实例中只请求一次
+            shared_ttl: 共享缓存条目的存活时间（秒）
+            parser: HTML 树构建器，auto 时优先使用已安装的 lxml，否则使用 html.parser
+            
+        Raises:
+            ValueError: 未知的解析器名称
         """
         self.proxy = proxy
         self.timeout = timeout
-        self._session: Optional[aiohttp.ClientSession] = None
+        self.base_url = base_url.rstrip("/")
+        self.tag_catalog = tag_catalog if tag_catalog is not None else TagCatalog()
+        self.catalog = catalog if catalog is not None else VideoCatalog()
+        self.keep_dom = keep_dom
+        self.memory_budget = memory_budget
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._video_cache = TTLCache(maxsize=video_cache_size, ttl=video_cache_ttl)
+        self._list_cache = TTLCache(maxsize=list_cache_size, ttl=list_cache_ttl)
+        self._list_inflight: Dict[tuple, asyncio.Future] = {}
+        self._source_cache = TTLCache(maxsize=256, ttl=source_ttl)
+        self._negative_cache = TTLCache(maxsize=4096, ttl=negative_ttl)
+        self._retained_bytes = 0
+        self._retained_peak = 0
+        self._released_pages = 0
+        self.parse_stats = {"structured_only": 0, "dom_fallback": 0}
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.transport = transport
+        self.shared_cache = shared_cache
+        self.shared_ttl = shared_ttl
+        self.parser = resolve_parser(parser)
+    
+    def _retain_bytes(self, size: int):
+        """登记被 Video 对象持有的页面字节数"""
+        self._retained_bytes += size
+        self._retained_peak = max(self._retained_peak, self._retained_bytes)
+    
+    def _release_bytes(self, size: int):
+        """扣除已释放的页面字节数"""
+        self._retained_bytes -= size
+        self._released_pages += 1
+    
+    def is_missing(self, key: tuple) -> bool:
+        """
+        是否近期已确认不存在
+        
+        Args:
+            key: ("video", video_id) 或 ("tag", tag)
+        """
+        return self._negative_cache.ttl > 0 and self._negative_cache.get(key) is not None
+    
+    def mark_missing(self, key: tuple):
+        """记录已确认不存在的视频或标签，短时间内不再请求"""
+        if self._negative_cache.ttl > 0:
+            self._negative_cache.set(key, True)
+    
+    def _cache_sources(self, video_id: str, html_content: str) -> Dict[str, str]:
+        """解析页面中的视频源并按签名URL有效期缓存"""
+        sources = extract_sources(html_content)
+        ttl = sources_ttl(sources, self._source_cache.ttl)
+        if ttl > 0:
+            self._source_cache.set(video_id, sources, ttl=ttl)
+        return sources
+    
+    def over_memory_budget(self) -> bool:
+        """持有的页面内存是否超出预算"""
+        return self._retained_bytes > self.memory_budget
+    
+    def memory_stats(self) -> Dict[str, Any]:
+        """
+        获取内存使用统计
+        
+        Returns:
+            包含持有字节数、峰值、预算和 Video 缓存情况的字典
+        """
+        return {
+            "retained_bytes": self._retained_bytes,
+            "retained_peak_bytes": self._retained_peak,
+            "memory_budget_bytes": self.memory_budget,
+            "released_pages": self._released_pages,
+            "keep_dom": self.keep_dom,
+            "video_cache": self._video_cache.stats(),
+            "list_cache": self._list_cache.stats(),
+            "negative_cache": self._negative_cache.stats(),
+        }
     
-    async def _get_session(self) -> aiohttp.ClientSession:
+    async def _get_session(self) -> "aiohttp.ClientSession":
         """获取或创建aiohttp会话"""
         if self._session is None or self._session.closed:
+            aiohttp = _aiohttp()
             timeout = aiohttp.ClientTimeout(total=self.timeout)
             self._session = aiohttp.ClientSession(
                 headers=HEADERS,
@@ -319,31 +755,233 @@ class Client:
             )
         return self._session
     
+    def _request_timeout(self) -> "aiohttp.ClientTimeout":
+        """
+        单次请求的超时，不超过当前命令剩余的时间预算
+        
+        Raises:
+            DeadlineExceeded: 预算已用尽
+        """
+        return _aiohttp().ClientTimeout(total=time_left(self.timeout, "请求页面"))
+    
     async def close(self):
         """关闭会话"""
+        for task in list(self._list_inflight.values()):
+            task.cancel()
         if self._session and not self._session.closed:
             await self._session.close()
+        if self.transport is not None:
+            await self.transport.close()
+        if self.shared_cache is not None:
+            await self.shared_cache.close()
+    
+    async def _shared_get_json(self, key: str) -> Any:
+        """从共享缓存读取 JSON 值，未命中或数据损坏时返回 None"""
+        data = await self.shared_cache.get(key)
+        if data is None:
+            return None
+        try:
+            return unpack_json(data)
+        except (ValueError, zlib.error):
+            return None
+    
+    async def _transport_get(self, url: str, mode: str) -> TransportResponse:
+        """
+        通过传输层获取完整页面，状态码检查和指标与直接请求一致
+        
+        Raises:
+            VideoNotFound: 页面不存在
+            NetworkError: 请求失败或状态码异常
+        """
+        metrics = self.metrics
+        try:
+            response = await bounded(self.transport.request("GET", url, self.proxy), self.timeout, "请求页面")
+        except asyncio.TimeoutError:
+            metrics.inc("fetch_requests_total", status="timeout")
+            raise NetworkError(f"请求超时: {url}")
+        except NetworkError:
+            metrics.inc("fetch_requests_total", status="error")
+            raise
+        metrics.inc("fetch_requests_total", status=response.status)
+        if response.status == 404:
+            raise VideoNotFound(f"页面不存在: {url}")
+        if response.status != 200:
+            raise NetworkError(f"HTTP错误 {response.status}: {url}")
+        metrics.inc("fetch_bytes_total", len(response.body), mode=mode)
+        return response
     
     async def fetch(self, url: str) -> str:
         """
-        获取页面HTML内容
+        获取页面HTML内容，启用共享缓存时所有实例中同一页面同时只请求一次
         
         Args:
             url: 页面URL
             
         Returns:
             HTML内容字符串
+            
+        Raises:
+            VideoNotFound: 页面不存在
+            NetworkError: 请求失败或超时
+            DeadlineExceeded: 当前命令的时间预算已用尽
         """
+        if self.shared_cache is None:
+            return await self._fetch(url)
+        
+        async def load() -> bytes:
+            return pack_text(await self._fetch(url))
+        
+        # 等待其他实例加载时也不超过时间预算，加载本身不会因此被取消
+        page = await self.shared_cache.get_or_load("page:" + url, load, self.shared_ttl, stage="请求页面")
+        return unpack_text(page)
+    
+    async def _fetch(self, url: str) -> str:
+        """不经过共享缓存直接获取页面"""
+        metrics = self.metrics
+        if self.transport is not None:
+            with metrics.in_flight("fetches_in_flight"), metrics.timer("fetch_seconds", mode="full"):
+                return (await self._transport_get(url, "full")).text()
         session = await self._get_session()
         try:
-            async with session.get(url, proxy=self.proxy) as response:
-                if response.status == 404:
-                    raise VideoNotFound(f"页面不存在: {url}")
+            with metrics.in_flight("fetches_in_flight"), metrics.timer("fetch_seconds", mode="full"):
+                async with session.get(url, proxy=self.proxy, timeout=self._request_timeout()) as response:
+                    metrics.inc("fetch_requests_total", status=response.status)
+                    if response.status == 404:
+                        raise VideoNotFound(f"页面不存在: {url}")
+                    if response.status != 200:
+                        raise NetworkError(f"HTTP错误 {response.status}: {url}")
+                    body = await response.read()
+                    metrics.inc("fetch_bytes_total", len(body), mode="full")
+                    return body.decode(response.get_encoding(), "replace")
+        except asyncio.TimeoutError:
+            metrics.inc("fetch_requests_total", status="timeout")
+            check_deadline("请求页面")
+            raise NetworkError(f"请求超时: {url}")
+        except _aiohttp().ClientError as e:
+            metrics.inc("fetch_requests_total", status="error")
+            raise NetworkError(f"网络请求失败: {e}")
+    
+    async def probe_size(self, url: str) -> Optional[int]:
+        """
+        发送 HEAD 请求获取资源大小
+        
+        Args:
+            url: 资源URL
+            
+        Returns:
+            Content-Length 字节数，失败或未知时返回 None
+            
+        Raises:
+            DeadlineExceeded: 当前命令的时间预算已用尽
+        """
+        if self.transport is not None:
+            try:
+                response = await bounded(self.transport.request("HEAD", url, self.proxy), self.timeout, "探测视频源")
+            except DeadlineExceeded:
+                raise
+            except (NetworkError, asyncio.TimeoutError):
+                return None
+            return response.content_length if response.status == 200 else None
+        session = await self._get_session()
+        
+        async def head() -> Optional[int]:
+            async with session.head(url, proxy=self.proxy, allow_redirects=True) as response:
                 if response.status != 200:
-                    raise NetworkError(f"HTTP错误 {response.status}: {url}")
-                return await response.text()
-        except aiohttp.ClientError as e:
+                    return None
+                return response.content_length
+        
+        try:
+            return await bounded(head(), self.timeout, "探测视频源")
+        except (_aiohttp().ClientError, asyncio.TimeoutError):
+            return None
+    
+    async def fetch_until(
+        self,
+        url: str,
+        extractor: IncrementalExtractor,
+        chunk_size: int = 16384
+    ) -> Tuple[str, bool]:
+        """
+        流式获取页面，边读边解析，所需字段齐全后立即停止读取
+        
+        Args:
+            url: 页面URL
+            extractor: 增量字段提取器
+            chunk_size: 每次读取的字节数
+            
+        Returns:
+            (已读取的HTML, 字段是否齐全)。字段不齐全时返回的是完整页面
+        """
+        if self.shared_cache is not None:
+            cached = await self.shared_cache.get("page:" + url)
+            if cached is not None:
+                return self._feed_extractor(unpack_text(cached), extractor, chunk_size)
+            html_content, complete = await self._fetch_until(url, extractor, chunk_size)
+            if not complete:
+                # 读完了整个页面，其他实例可以直接使用
+                await self.shared_cache.set("page:" + url, pack_text(html_content), self.shared_ttl)
+            return html_content, complete
+        return await self._fetch_until(url, extractor, chunk_size)
+    
+    @staticmethod
+    def _feed_extractor(html_content: str, extractor: IncrementalExtractor, chunk_size: int) -> Tuple[str, bool]:
+        """把完整页面按块喂给提取器，结果与流式读取相同"""
+        for start in range(0, len(html_content), chunk_size):
+            end = start + chunk_size
+            if extractor.feed(html_content[start:end]):
+                return html_content[:end], True
+        return html_content, extractor.feed("")
+    
+    async def _fetch_until(
+        self,
+        url: str,
+        extractor: IncrementalExtractor,
+        chunk_size: int
+    ) -> Tuple[str, bool]:
+        """不经过共享缓存流式获取页面"""
+        metrics = self.metrics
+        if self.transport is not None:
+            # 传输层返回完整响应，按块喂给提取器以保持与流式读取相同的结果
+            with metrics.in_flight("fetches_in_flight"), metrics.timer("fetch_seconds", mode="stream"):
+                html_content = (await self._transport_get(url, "stream")).text()
+            return self._feed_extractor(html_content, extractor, chunk_size)
+        session = await self._get_session()
+        received = 0
+        try:
+            with metrics.in_flight("fetches_in_flight"), metrics.timer("fetch_seconds", mode="stream"):
+                async with session.get(url, proxy=self.proxy, timeout=self._request_timeout()) as response:
+                    metrics.inc("fetch_requests_total", status=response.status)
+                    if response.status == 404:
+                        raise VideoNotFound(f"页面不存在: {url}")
+                    if response.status != 200:
+                        raise NetworkError(f"HTTP错误 {response.status}: {url}")
+                    
+                    try:
+                        decoder = codecs.getincrementaldecoder(response.charset or "utf-8")("replace")
+                    except LookupError:
+                        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+                    
+                    parts = []
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        received += len(chunk)
+                        text = decoder.decode(chunk)
+                        parts.append(text)
+                        if extractor.feed(text):
+                            # 提前退出时连接会被关闭，不再读取剩余内容
+                            return "".join(parts), True
+                    
+                    text = decoder.decode(b"", final=True)
+                    parts.append(text)
+                    return "".join(parts), extractor.feed(text)
+        except asyncio.TimeoutError:
+            metrics.inc("fetch_requests_total", status="timeout")
+            check_deadline("请求页面")
+            raise NetworkError(f"请求超时: {url}")
+        except _aiohttp().ClientError as e:
+            metrics.inc("fetch_requests_total", status="error")
             raise NetworkError(f"网络请求失败: {e}")
+        finally:
+            metrics.inc("fetch_bytes_total", received, mode="stream")
     
     def get_video(self, video_id: str) -> Video:
         """
@@ -363,13 +1001,109 @@ class Client:
             else:
                 raise InvalidURL(f"无效的视频URL: {video_id}")
         
-        return Video(video_id, self)
+        # 复用已缓存的 Video 对象，避免重复请求和解析
+        video = self._video_cache.get(video_id)
+        if video is None:
+            video = Video(video_id, self)
+            if self._video_cache.maxsize > 0:
+                self._video_cache.set(video_id, video)
+        return video
+    
+    def _build_url(self, path: str, page: int = 1, **params: Any) -> str:
+        """
+        构造站点URL
+        
+        Args:
+            path: 以 / 开头的路径，空字符串表示首页
+            page: 页码，大于 1 时附加 page 参数
+            params: 其他查询参数，值为空时忽略
+            
+        Returns:
+            完整URL
+        """
+        query = {key: value for key, value in params.items() if value}
+        if page > 1:
+            query["page"] = page
+        url = f"{self.base_url}{path}"
+        if query:
+            url += f"?{urlencode(query)}"
+        return url
+    
+    async def _get_list(self, key: tuple, url: str, refresh: bool = False) -> List[VideoInfo]:
+        """
+        获取并解析列表页，结果按 key 缓存
+        
+        Args:
+            key: 缓存键，形如 (类型, 参数, 排序, 页码)
+            url: 页面URL
+            refresh: 不读取本地和共享缓存，直接请求页面并用结果更新缓存
+            
+        Returns:
+            VideoInfo列表
+        """
+        videos = None if refresh else self._list_cache.get(key)
+        if videos is not None:
+            return list(videos)
+        
+        # 同一列表页同时只请求一次，后到的调用者等待同一个结果（刷新请求不与读缓存的请求合并）。
+        # 请求不受发起者的时间预算限制，每个调用者只按自己的预算等待
+        flight = (key, refresh)
+        task = self._list_inflight.get(flight)
+        if task is None:
+            with detached():
+                task = asyncio.ensure_future(self._fetch_list(key, url, refresh))
+            self._list_inflight[flight] = task
+            task.add_done_callback(lambda done: self._list_fetched(flight, done))
+        else:
+            self.metrics.inc("list_fetches_coalesced_total")
+        return list(await bounded(asyncio.shield(task), stage="请求页面"))
+    
+    def _list_fetched(self, flight: tuple, task: asyncio.Future):
+        if self._list_inflight.get(flight) is task:
+            del self._list_inflight[flight]
+        if not task.cancelled():
+            # 所有等待者都已离开时避免 "exception was never retrieved" 警告
+            task.exception()
+    
+    async def _fetch_list(self, key: tuple, url: str, refresh: bool) -> Tuple[VideoInfo, ...]:
+        """请求列表页（或从共享缓存获取）并写入本地缓存"""
+        if self.shared_cache is None:
+            videos = await self._load_list(key, url)
+        elif refresh:
+            videos = await self._load_list(key, url)
+            await self.shared_cache.set(
+                "list:" + url, pack_json([video.to_dict() for video in videos]), self.shared_ttl
+            )
+        else:
+            # 共享解析结果而不是页面，其他实例命中时不需要再解析
+            parsed: List[VideoInfo] = []
+            
+            async def load() -> bytes:
+                parsed.extend(await self._load_list(key, url))
+                return pack_json([video.to_dict() for video in parsed])
+            
+            data = await self.shared_cache.get_or_load("list:" + url, load, self.shared_ttl)
+            videos = parsed or [VideoInfo.from_dict(item) for item in unpack_json(data)]
+        
+        self.catalog.add(videos)
+        videos = tuple(videos)
+        if self._list_cache.maxsize > 0:
+            self._list_cache.set(key, videos)
+        return videos
+    
+    async def _load_list(self, key: tuple, url: str) -> List[VideoInfo]:
+        """获取并解析列表页，不经过任何缓存"""
+        html_content = await self._fetch(url)
+        if key[0] == "tag" and is_not_found_page(html_content):
+            raise TagNotFound(f"标签不存在: {key[1]}")
+        return self._parse_video_list(html_content)
     
     async def get_videos_by_tag(
         self, 
         tag: str, 
         page: int = 1, 
-        sort: str = "most-viewed"
+        sort: str = "most-viewed",
+        refresh: bool = False
     ) -> List[VideoInfo]:
         """
         按标签获取视频列表
@@ -377,21 +1111,78 @@ class Client:
         Args:
             tag: 标签名称
             page: 页码
-            sort: 排序方式 (most-viewed, newest, top-rated)
+            sort: 排序方式 (most-viewed, newest, top-rated)，支持 views/latest/rating 等别名；
+                longest/shortest 站点不支持，取按观看数排序的该页后在本地按时长重排
+            refresh: 跳过列表缓存直接请求（用于订阅轮询等需要最新结果的场景）
             
         Returns:
             VideoInfo列表
         """
-        url = f"{ROOT_URL}/tag/{tag}"
-        if page > 1:
-            url += f"?page={page}"
-        
-        html_content = await self.fetch(url)
+        # 在发起请求前校验标签格式和排序方式，避免无效请求
+        tag = normalize_tag(tag)
+        if not is_valid_tag(tag):
+            raise TagNotFound(f"标签格式无效: {tag}")
+        sort = normalize_sort(sort, local=True)
+        upstream_sort = sort if sort in SORT_OPTIONS else "most-viewed"
+        if self.is_missing(("tag", tag)):
+            raise TagNotFound(f"标签不存在: {tag}")
         
-        if "404" in html_content and "not found" in html_content.lower():
+        url = self._build_url(f"/tag/{tag}", page, **{SORT_QUERY_PARAM: SORT_OPTIONS[upstream_sort]})
+        try:
+            videos = await self._get_list(("tag", tag, upstream_sort, page), url, refresh)
+        except (TagNotFound, VideoNotFound):
+            self.mark_missing(("tag", tag))
             raise TagNotFound(f"标签不存在: {tag}")
+        if videos:
+            self.tag_catalog.record([tag])
+        if sort != upstream_sort:
+            videos = sort_videos(videos, sort)
+        return videos
+    
+    def get_cached_videos_by_tag(
+        self,
+        tag: str,
+        sort: str = "most-viewed",
+        min_duration: int = 0,
+        max_duration: int = 0,
+        min_rating: int = 0,
+        min_views: int = 0
+    ) -> List[VideoInfo]:
+        """
+        对已缓存的标签列表页在本地重新排序和筛选，不发起网络请求
         
-        return self._parse_video_list(html_content)
+        合并该标签下所有已缓存的页，按 video_id 去重。以请求的排序方式获取的页按页码排在前面，
+        newest 按解析出的上传日期排序，日期无法解析的条目保持站点给出的顺序
+        
+        Args:
+            tag: 标签名称
+            sort: 排序方式，额外支持 longest/shortest
+            min_duration: 最短时长（秒）
+            max_duration: 最长时长（秒）
+            min_rating: 最低评分百分比
+            min_views: 最低观看数
+            
+        Returns:
+            VideoInfo列表，没有缓存时为空列表
+        """
+        tag = normalize_tag(tag)
+        sort = normalize_sort(sort, local=True)
+        keys = sorted(
+            (key for key in self._list_cache.keys() if key[0] == "tag" and key[1] == tag),
+            key=lambda key: (key[2] != sort, key[2], key[3])
+        )
+        seen = {}
+        for key in keys:
+            for video in self._list_cache.get(key, ()):
+                seen.setdefault(video.video_id, video)
+        videos = filter_videos(
+            seen.values(),
+            min_duration=min_duration,
+            max_duration=max_duration,
+            min_rating=min_rating,
+            min_views=min_views,
+        )
+        return sort_videos(videos, sort)
     
     async def search(
         self, 
@@ -408,13 +1199,8 @@ class Client:
         Returns:
             VideoInfo列表
         """
-        encoded_query = quote_plus(query)
-        url = f"{ROOT_URL}/search?q={encoded_query}"
-        if page > 1:
-            url += f"&page={page}"
-        
-        html_content = await self.fetch(url)
-        return self._parse_video_list(html_content)
+        url = self._build_url("/search", page, q=query)
+        return await self._get_list(("search", query, "", page), url)
     
     async def get_latest_videos(self, page: int = 1) -> List[VideoInfo]:
         """
@@ -426,12 +1212,8 @@ class Client:
         Returns:
             VideoInfo列表
         """
-        url = ROOT_URL
-        if page > 1:
-            url += f"?page={page}"
-        
-        html_content = await self.fetch(url)
-        return self._parse_video_list(html_content)
+        url = self._build_url("", page)
+        return await self._get_list(("latest", "", "", page), url)
     
     async def get_popular_videos(self, page: int = 1) -> List[VideoInfo]:
         """
@@ -443,12 +1225,8 @@ class Client:
         Returns:
             VideoInfo列表
         """
-        url = f"{ROOT_URL}/most-viewed"
-        if page > 1:
-            url += f"?page={page}"
-        
-        html_content = await self.fetch(url)
-        return self._parse_video_list(html_content)
+        url = self._build_url("/most-viewed", page)
+        return await self._get_list(("popular", "", "", page), url)
     
     async def get_random_video(self) -> VideoInfo:
         """
@@ -459,16 +1237,37 @@ class Client:
         """
         import random
         
-        # 从首页获取视频列表
-        videos = await self.get_latest_videos(page=random.randint(1, 10))
-        if not videos:
-            videos = await self.get_latest_videos(page=1)
+        # 从首页获取视频列表，网络失败时退回本地目录的随机蓄水池
+        try:
+            videos = await self.get_latest_videos(page=random.randint(1, 10))
+            if not videos:
+                videos = await self.get_latest_videos(page=1)
+        except NetworkError:
+            videos = []
+            if len(self.catalog) == 0:
+                raise
         
         if not videos:
-            raise NoResultsFound("无法获取随机视频")
+            local = self.catalog.random()
+            if local is None:
+                raise NoResultsFound("无法获取随机视频")
+            return local
         
         return random.choice(videos)
     
+    def search_local(self, query: str, limit: int = 20) -> List[VideoInfo]:
+        """
+        在本地视频目录中按标题搜索，不发起网络请求
+        
+        Args:
+            query: 搜索关键词
+            limit: 最多返回数量
+            
+        Returns:
+            VideoInfo列表
+        """
+        return self.catalog.search(query, limit)
+    
     def _parse_video_list(self, html_content: str) -> List[VideoInfo]:
         """
         解析视频列表页面
@@ -479,107 +1278,196 @@ class Client:
         Returns:
             VideoInfo列表
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
+        with self.metrics.timer("parse_seconds", stage="list"):
+            soup = make_soup(html_content, self.parser)
+            return self._parse_cards(soup)
+    
+    def _parse_related(self, html_content: str, soup: Optional["BeautifulSoup"] = None) -> List[VideoInfo]:
+        """
+        解析详情页中的相关视频卡片
+        
+        已有 DOM 时直接在其中查找；否则（结构化快速路径）逐个扫描相关视频区块中的标签，不构建 DOM
+        
+        Args:
+            html_content: 详情页HTML
+            soup: 已构建的页面DOM
+            
+        Returns:
+            VideoInfo列表
+        """
+        if soup is None:
+            videos = []
+            seen = set()
+            for values in extract_related_cards(html_content):
+                video_info = self._card_from_fields(values)
+                if video_info is None or video_info.video_id in seen:
+                    continue
+                seen.add(video_info.video_id)
+                videos.append(video_info)
+            return videos
+        block = soup.find('div', class_=lambda x: x and 'related' in x.lower() if x else False)
+        if block is None:
+            return []
+        return self._parse_cards(block)
+    
+    def _parse_cards(self, root) -> List[VideoInfo]:
+        """
+        解析DOM中的所有视频卡片
+        
+        Args:
+            root: BeautifulSoup 对象或其中的元素
+            
+        Returns:
+            VideoInfo列表，按 video_id 去重
+        """
         videos = []
+        seen = set()
         
         # 查找所有视频卡片
-        video_cards = soup.find_all('div', class_=lambda x: x and ('video' in x.lower() or 'thumb' in x.lower()) if x else False)
+        video_cards = root.find_all('div', class_=lambda x: x and ('video' in x.lower() or 'thumb' in x.lower()) if x else False)
         
         for card in video_cards:
             try:
-                # 查找视频链接
-                link = card.find('a', href=lambda x: x and '/video/' in x if x else False)
-                if not link:
-                    continue
-                
-                href = link.get('href', '')
-                video_id_match = re.search(r'/video/([^/\?]+)', href)
-                if not video_id_match:
-                    continue
-                
-                video_id = video_id_match.group(1)
-                url = urljoin(ROOT_URL, href)
-                
-                # 解析标题
-                title = ""
-                title_elem = card.find(['h2', 'h3', 'h4', 'span', 'a'], class_=lambda x: x and 'title' in x.lower() if x else False)
-                if title_elem:
-                    title = title_elem.get_text(strip=True)
-                else:
-                    # 尝试从链接的title属性或文本获取
-                    title = link.get('title', '') or link.get_text(strip=True)
-                
-                # 解析缩略图
-                thumbnail = ""
-                img = card.find('img')
-                if img:
-                    thumbnail = img.get('src') or img.get('data-src') or img.get('data-lazy-src', '')
-                
-                # 解析预览图
-                preview = ""
-                preview_elem = card.find(attrs={'data-preview': True})
-                if preview_elem:
-                    preview = preview_elem.get('data-preview', '')
-                
-                # 解析时长
-                duration = ""
-                duration_elem = card.find('span', class_=lambda x: x and 'duration' in x.lower() if x else False)
-                if duration_elem:
-                    duration = duration_elem.get_text(strip=True)
-                
-                # 解析观看数
-                views = ""
-                views_elem = card.find('span', class_=lambda x: x and 'views' in x.lower() if x else False)
-                if views_elem:
-                    views = views_elem.get_text(strip=True)
-                
-                # 解析评分
-                rating = ""
-                rating_elem = card.find('span', class_=lambda x: x and ('rating' in x.lower() or 'percent' in x.lower()) if x else False)
-                if rating_elem:
-                    rating = rating_elem.get_text(strip=True)
-                
-                # 解析上传者
-                uploader = ""
-                uploader_elem = card.find('a', href=lambda x: x and ('/creator/' in x or '/channel/' in x) if x else False)
-                if uploader_elem:
-                    uploader = uploader_elem.get_text(strip=True)
-                
-                # 解析日期
-                upload_date = ""
-                date_elem = card.find('span', class_=lambda x: x and ('date' in x.lower() or 'ago' in x.lower()) if x else False)
-                if date_elem:
-                    upload_date = date_elem.get_text(strip=True)
-                
-                video_info = VideoInfo(
-                    video_id=video_id,
-                    url=url,
-                    title=title,
-                    duration=duration,
-                    thumbnail=thumbnail,
-                    preview=preview,
-                    views=views,
-                    rating=rating,
-                    uploader=uploader,
-                    upload_date=upload_date,
-                )
-                
-                videos.append(video_info)
-                
+                video_info = self._parse_card(card)
             except Exception:
                 # 跳过解析失败的卡片
                 continue
+            if video_info is None or video_info.video_id in seen:
+                continue
+            seen.add(video_info.video_id)
+            videos.append(video_info)
         
         return videos
     
-    async def get_available_tags(self) -> List[str]:
+    def _card_from_fields(self, values: Dict[str, str]) -> Optional[VideoInfo]:
+        """
+        由 extract_related_cards 提取的字段构造卡片，规则与 _parse_card 相同
+        
+        Args:
+            values: 单张卡片的原始字段
+            
+        Returns:
+            VideoInfo，卡片中没有视频链接时返回 None
+        """
+        href = values.get("href", "")
+        video_id_match = re.search(r'/video/([^/\?]+)', href)
+        if not video_id_match:
+            return None
+        if "title" in values:
+            title = values["title"]
+        else:
+            title = values.get("link_title", "") or values.get("link_text", "")
+        return VideoInfo(
+            video_id=video_id_match.group(1),
+            url=urljoin(self.base_url, href),
+            title=title,
+            duration=values.get("duration", ""),
+            thumbnail=values.get("thumbnail", ""),
+            preview=values.get("preview", ""),
+            views=values.get("views", ""),
+            rating=values.get("rating", ""),
+            uploader=values.get("uploader", ""),
+            upload_date=values.get("upload_date", ""),
+        )
+    
+    def _parse_card(self, card) -> Optional[VideoInfo]:
+        """
+        解析单个视频卡片
+        
+        Args:
+            card: 卡片元素
+            
+        Returns:
+            VideoInfo，卡片中没有视频链接时返回 None
+        """
+        # 查找视频链接
+        link = card.find('a', href=lambda x: x and '/video/' in x if x else False)
+        if not link:
+            return None
+        
+        href = link.get('href', '')
+        video_id_match = re.search(r'/video/([^/\?]+)', href)
+        if not video_id_match:
+            return None
+        
+        video_id = video_id_match.group(1)
+        url = urljoin(self.base_url, href)
+        
+        # 解析标题
+        title = ""
+        title_elem = card.find(['h2', 'h3', 'h4', 'span', 'a'], class_=lambda x: x and 'title' in x.lower() if x else False)
+        if title_elem:
+            title = title_elem.get_text(strip=True)
+        else:
+            # 尝试从链接的title属性或文本获取
+            title = link.get('title', '') or link.get_text(strip=True)
+        
+        # 解析缩略图
+        thumbnail = ""
+        img = card.find('img')
+        if img:
+            thumbnail = img.get('src') or img.get('data-src') or img.get('data-lazy-src', '')
+        
+        # 解析预览图
+        preview = ""
+        preview_elem = card.find(attrs={'data-preview': True})
+        if preview_elem:
+            preview = preview_elem.get('data-preview', '')
+        
+        # 解析时长
+        duration = ""
+        duration_elem = card.find('span', class_=lambda x: x and 'duration' in x.lower() if x else False)
+        if duration_elem:
+            duration = duration_elem.get_text(strip=True)
+        
+        # 解析观看数
+        views = ""
+        views_elem = card.find('span', class_=lambda x: x and 'views' in x.lower() if x else False)
+        if views_elem:
+            views = views_elem.get_text(strip=True)
+        
+        # 解析评分
+        rating = ""
+        rating_elem = card.find('span', class_=lambda x: x and ('rating' in x.lower() or 'percent' in x.lower()) if x else False)
+        if rating_elem:
+            rating = rating_elem.get_text(strip=True)
+        
+        # 解析上传者
+        uploader = ""
+        uploader_elem = card.find('a', href=lambda x: x and ('/creator/' in x or '/channel/' in x) if x else False)
+        if uploader_elem:
+            uploader = uploader_elem.get_text(strip=True)
+        
+        # 解析日期
+        upload_date = ""
+        date_elem = card.find('span', class_=lambda x: x and ('date' in x.lower() or 'ago' in x.lower()) if x else False)
+        if date_elem:
+            upload_date = date_elem.get_text(strip=True)
+        
+        return VideoInfo(
+            video_id=video_id,
+            url=url,
+            title=title,
+            duration=duration,
+            thumbnail=thumbnail,
+            preview=preview,
+            views=views,
+            rating=rating,
+            uploader=uploader,
+            upload_date=upload_date,
+        )
+    
+    async def get_available_tags(self, limit: int = 20) -> List[str]:
         """
         获取可用的标签列表
         
+        Args:
+            limit: 返回的标签数量
+            
         Returns:
-            标签列表
+            按出现次数降序排列的标签列表
         """
-        return POPULAR_TAGS.copy()
+        return self.tag_catalog.top(limit)
 
 
 # 便捷函数
@@ -0,0 +1,173 @@
+"""
+命令时间预算模块
+每个命令开始时设定一个截止时间，保存在上下文变量中，沿调用链传递给页面请求、
+解析和缩略图处理，各环节的超时都不超过剩余预算
+
+上下文变量随 asyncio 任务复制，命令中创建的后台任务会继承同一个截止时间；
+不应受命令预算限制的后台任务（如预取）用 detached() 解除
+"""
+
+import time
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Awaitable, Iterator, Optional
+
+from .errors import DeadlineExceeded
+
+
+class Deadline:
+    """一个命令的截止时间"""
+
+    def __init__(self, budget: float):
+        """
+        Args:
+            budget: 时间预算（秒）
+        """
+        self.budget = budget
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget
+
+    def __repr__(self) -> str:
+        return f"<Deadline {self.remaining():.2f}/{self.budget:g}s>"
+
+    def remaining(self) -> float:
+        """剩余时间（秒），已超时为 0"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        """已用时间（秒）"""
+        return time.monotonic() - self.started_at
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, stage: str = ""):
+        """
+        预算已用尽时抛出异常
+
+        Args:
+            stage: 当前环节，用于错误信息
+
+        Raises:
+            DeadlineExceeded: 已超时
+        """
+        if self.expired:
+            raise self.exceeded(stage)
+
+    def exceeded(self, stage: str = "") -> DeadlineExceeded:
+        """构造超时异常"""
+        where = f"（{stage}）" if stage else ""
+        return DeadlineExceeded(f"超出 {self.budget:g} 秒的时间预算{where}")
+
+
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """当前上下文的截止时间，没有预算时返回 None"""
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(budget: float, inherit: bool = True) -> Iterator[Optional[Deadline]]:
+    """
+    在代码块中使用时间预算
+
+    Args:
+        budget: 时间预算（秒），不大于 0 时不设新的预算
+        inherit: 外层已有更早的截止时间时沿用外层的；为 False 时忽略外层预算
+
+    Yields:
+        代码块中生效的截止时间
+    """
+    previous = _current.get()
+    if budget <= 0 or (inherit and previous is not None and previous.remaining() <= budget):
+        yield previous if inherit else None
+        return
+    deadline = Deadline(budget)
+    # 不用 reset(token)：异步生成器中的代码块可能跨越多次迭代，不保证在同一个上下文中结束
+    _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.set(previous)
+
+
+@contextmanager
+def detached() -> Iterator[None]:
+    """在代码块中解除时间预算，用于不应随命令超时的后台任务"""
+    previous = _current.get()
+    _current.set(None)
+    try:
+        yield
+    finally:
+        _current.set(previous)
+
+
+def check_deadline(stage: str = ""):
+    """
+    当前预算已用尽时抛出异常，没有预算时什么也不做
+
+    Raises:
+        DeadlineExceeded: 已超时
+    """
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def time_left(timeout: Optional[float] = None, stage: str = "") -> Optional[float]:
+    """
+    单次操作可用的超时时间：timeout 与剩余预算中较小的一个
+
+    Args:
+        timeout: 操作本身的超时（秒），None 表示不限制
+        stage: 当前环节，用于错误信息
+
+    Returns:
+        超时时间（秒），两者都不限制时返回 None
+
+    Raises:
+        DeadlineExceeded: 预算已用尽
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return timeout
+    deadline.check(stage)
+    remaining = deadline.remaining()
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+async def bounded(awaitable: Awaitable[Any], timeout: Optional[float] = None, stage: str = "") -> Any:
+    """
+    在 timeout 和剩余预算内等待
+
+    Args:
+        awaitable: 要等待的协程或 Future
+        timeout: 操作本身的超时（秒），None 表示只受预算限制
+        stage: 当前环节，用于错误信息
+
+    Returns:
+        awaitable 的结果
+
+    Raises:
+        DeadlineExceeded: 预算用尽
+        asyncio.TimeoutError: 操作本身超时而预算尚有剩余
+    """
+    try:
+        limit = time_left(timeout, stage)
+    except DeadlineExceeded:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise
+    if limit is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, limit)
+    except asyncio.TimeoutError:
+        deadline = _current.get()
+        if deadline is not None and (timeout is None or limit < timeout):
+            raise deadline.exceeded(stage)
+        raise
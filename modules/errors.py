@@ -50,4 +50,29 @@ class TagNotFound(ThreeDPornDudeException):
 
 class NoResultsFound(ThreeDPornDudeException):
     """没有找到结果"""
-    pass
\ No newline at end of file
+    pass
+
+
+class InvalidSortOption(ThreeDPornDudeException):
+    """不支持的排序方式"""
+    pass
+
+
+class ServiceBusy(ThreeDPornDudeException):
+    """并发命令过多，排队已满或等待超时"""
+    pass
+
+
+class CacheBackendError(ThreeDPornDudeException):
+    """共享缓存后端不可用或读写失败"""
+    pass
+
+
+class DeadlineExceeded(NetworkError):
+    """命令的时间预算已用尽，尚未完成的请求被放弃"""
+    pass
+
+
+class PreviewError(ThreeDPornDudeException):
+    """动画预览无法生成（片段过大、格式不支持、超出预算或队列已满）"""
+    pass
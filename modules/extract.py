@@ -0,0 +1,619 @@
+"""
+结构化元数据提取模块
+从 OpenGraph meta 和 JSON-LD 中提取视频字段，支持完整页面的正则快速路径和增量（流式）输入
+"""
+
+import re
+import json
+from html import unescape
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .consts import (
+    REGEX_JSON_LD, REGEX_VIDEO_THUMBNAIL_OG, REGEX_VIDEO_TAGS, REGEX_VIDEO_PREVIEW,
+    REGEX_VIDEO_RATING, REGEX_LIKES, REGEX_DISLIKES, REGEX_VIDEO_TITLE_ALT, REGEX_RELATED_VIDEOS,
+)
+from .utils import parse_duration
+
+
+REGEX_META_TAG = re.compile(r'<meta\s[^>]*>', re.IGNORECASE)
+REGEX_TAG_ATTR = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+# 次数中的千位分隔符
+REGEX_COUNT_SEPARATORS = re.compile(r"[\s,'_\u00a0]")
+
+
+# 判断 404 页面时只检查页面开头这部分内容
+NOT_FOUND_SCAN_LIMIT = 8192
+
+# 站点以 HTTP 200 返回的未找到页面的完整标题（小写）。只做整体比较：
+# 视频和列表页的标题都带有 " - 3DPornDude" 后缀，标题中含有 "404" 的视频不会被误判
+NOT_FOUND_PAGE_TITLES = frozenset({
+    "404", "404 not found", "404 - not found", "404 - page not found", "page not found", "not found",
+})
+
+
+def is_not_found_title(title: str) -> bool:
+    """页面标题是否与站点未找到页面的标题完全一致"""
+    return " ".join(unescape(title).split()).lower() in NOT_FOUND_PAGE_TITLES
+
+
+# 可以从 <head> 的 meta / JSON-LD 中获得的字段
+STRUCTURED_FIELDS = frozenset({
+    "title", "thumbnail", "description", "duration", "upload_date",
+    "views", "uploader", "tags", "rating",
+})
+
+
+def format_seconds(seconds: int) -> str:
+    """
+    将秒数格式化为时长文本
+
+    Args:
+        seconds: 秒数
+
+    Returns:
+        如 "12:34" 或 "1:02:03"
+    """
+    hours, rest = divmod(max(0, int(seconds)), 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def is_not_found_page(html_content: str) -> bool:
+    """
+    判断 HTTP 200 返回的页面是否为站点的“未找到”页面
+
+    HTTP 404 由请求层直接判定；这里只把页面开头的 <title> 与未找到页面的标题整体比较，
+    不做子串匹配，不复制或转换整个页面
+
+    Args:
+        html_content: 页面HTML
+
+    Returns:
+        是否为未找到页面
+    """
+    match = REGEX_VIDEO_TITLE_ALT.search(html_content, 0, min(len(html_content), NOT_FOUND_SCAN_LIMIT))
+    return match is not None and is_not_found_title(match.group(1))
+
+
+def _first(value: Any) -> Any:
+    """JSON-LD 字段可能是列表，取第一个元素"""
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _count_of(value: Any) -> Optional[int]:
+    """
+    解析 userInteractionCount，站点可能给出 "1,234"、"12.0" 等非整数文本
+
+    Returns:
+        次数，无法解析时返回 None
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = REGEX_COUNT_SEPARATORS.sub("", value)
+    try:
+        count = int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return count if count >= 0 else None
+
+
+def _name_of(value: Any) -> str:
+    """获取 JSON-LD Person/Organization 的名称"""
+    value = _first(value)
+    if isinstance(value, dict):
+        return str(value.get("name", "") or "")
+    return str(value or "")
+
+
+def find_video_objects(data: Any) -> List[Dict[str, Any]]:
+    """
+    在 JSON-LD 数据中查找 VideoObject
+
+    Args:
+        data: json.loads 的结果，可能是对象、列表或带 @graph 的对象
+
+    Returns:
+        VideoObject 字典列表
+    """
+    found = []
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            types = item.get("@type", "")
+            if isinstance(types, str):
+                types = [types]
+            if "VideoObject" in types:
+                found.append(item)
+            if "@graph" in item:
+                stack.append(item["@graph"])
+    return found
+
+
+def fields_from_jsonld(video: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将 JSON-LD VideoObject 映射为 VideoInfo 字段
+
+    Args:
+        video: VideoObject 字典
+
+    Returns:
+        字段字典，只包含有值的字段
+    """
+    fields: Dict[str, Any] = {}
+    if video.get("name"):
+        fields["title"] = str(video["name"]).strip()
+    thumbnail = _first(video.get("thumbnailUrl") or video.get("thumbnail"))
+    if isinstance(thumbnail, dict):
+        thumbnail = thumbnail.get("url") or thumbnail.get("contentUrl")
+    if thumbnail:
+        fields["thumbnail"] = str(thumbnail)
+    if video.get("description"):
+        fields["description"] = str(video["description"]).strip()
+    if video.get("duration"):
+        seconds = parse_duration(str(video["duration"]))
+        if seconds >= 0:
+            fields["duration"] = format_seconds(seconds)
+    if video.get("uploadDate"):
+        fields["upload_date"] = str(video["uploadDate"])
+    uploader = _name_of(video.get("author") or video.get("creator"))
+    if uploader:
+        fields["uploader"] = uploader
+
+    statistics = video.get("interactionStatistic") or []
+    if isinstance(statistics, dict):
+        statistics = [statistics]
+    for statistic in statistics:
+        if not isinstance(statistic, dict):
+            continue
+        action = statistic.get("interactionType", "")
+        if isinstance(action, dict):
+            action = action.get("@type", "")
+        count = _count_of(statistic.get("userInteractionCount"))
+        if count is None:
+            continue
+        if "WatchAction" in str(action):
+            fields["views"] = str(count)
+        elif "LikeAction" in str(action):
+            fields["likes"] = count
+        elif "DislikeAction" in str(action):
+            fields["dislikes"] = count
+
+    rating = video.get("aggregateRating")
+    if isinstance(rating, dict) and rating.get("ratingValue") is not None:
+        try:
+            value = float(rating["ratingValue"])
+            # schema.org 规定省略 bestRating 时为 5
+            best = float(rating.get("bestRating") or 5)
+            fields["rating"] = f"{round(value / best * 100)}%"
+        except (TypeError, ValueError, ZeroDivisionError):
+            pass
+
+    keywords = video.get("keywords")
+    if isinstance(keywords, str):
+        keywords = [keyword.strip() for keyword in keywords.split(",")]
+    if isinstance(keywords, list):
+        tags = [str(keyword).strip() for keyword in keywords if str(keyword).strip()]
+        if tags:
+            fields["tags"] = tags
+    return fields
+
+
+def fields_from_meta(meta: Dict[str, List[str]]) -> Dict[str, Any]:
+    """
+    将 OpenGraph / video:* meta 映射为 VideoInfo 字段
+
+    Args:
+        meta: property/name -> content 列表
+
+    Returns:
+        字段字典，只包含有值的字段
+    """
+    def first(*names: str) -> str:
+        for name in names:
+            values = meta.get(name)
+            if values and values[0]:
+                return values[0].strip()
+        return ""
+
+    fields: Dict[str, Any] = {}
+    title = first("og:title", "twitter:title")
+    if title:
+        fields["title"] = title
+    thumbnail = first("og:image", "og:image:url", "twitter:image")
+    if thumbnail:
+        fields["thumbnail"] = thumbnail
+    description = first("og:description", "description", "twitter:description")
+    if description:
+        fields["description"] = description
+    duration = first("video:duration", "og:video:duration")
+    if duration.isdigit():
+        fields["duration"] = format_seconds(int(duration))
+    upload_date = first("video:release_date", "og:video:release_date")
+    if upload_date:
+        fields["upload_date"] = upload_date
+    tags = [tag.strip() for tag in meta.get("video:tag", []) + meta.get("og:video:tag", []) if tag.strip()]
+    if tags:
+        fields["tags"] = tags
+    return fields
+
+
+def _meta_from_html(head: str) -> Dict[str, List[str]]:
+    """用正则从 HTML 片段中收集 meta property/name -> content"""
+    meta: Dict[str, List[str]] = {}
+    for tag in REGEX_META_TAG.findall(head):
+        attrs = {
+            name.lower(): unescape(double or single)
+            for name, double, single in REGEX_TAG_ATTR.findall(tag)
+        }
+        key = attrs.get("property") or attrs.get("name") or attrs.get("itemprop")
+        if key and "content" in attrs:
+            meta.setdefault(key.lower(), []).append(attrs["content"])
+    return meta
+
+
+def extract_structured(html_content: str) -> Dict[str, Any]:
+    """
+    从完整页面中提取 JSON-LD VideoObject 和 OpenGraph 字段
+
+    只使用正则扫描，不构建 DOM。JSON-LD 优先于 OpenGraph。
+
+    Args:
+        html_content: 页面HTML
+
+    Returns:
+        字段字典，只包含有值的字段
+    """
+    head_end = html_content.find("</head>")
+    head = html_content[:head_end] if head_end >= 0 else html_content[:65536]
+
+    fields = fields_from_meta(_meta_from_html(head))
+    if "thumbnail" not in fields:
+        og_match = REGEX_VIDEO_THUMBNAIL_OG.search(head)
+        if og_match:
+            fields["thumbnail"] = unescape(og_match.group(1))
+
+    for match in REGEX_JSON_LD.finditer(html_content):
+        try:
+            data = json.loads(match.group(1).strip())
+        except ValueError:
+            continue
+        for video in find_video_objects(data):
+            fields.update(fields_from_jsonld(video))
+
+    if "title" not in fields:
+        title_match = REGEX_VIDEO_TITLE_ALT.search(head)
+        if title_match:
+            title = unescape(title_match.group(1)).strip()
+            if ' - ' in title:
+                title = title.rsplit(' - ', 1)[0]
+            if title:
+                fields["title"] = title
+    return fields
+
+
+def extract_tag_links(html_content: str) -> Tuple[List[str], List[str]]:
+    """
+    用正则提取页面中的 /tag/ 链接
+
+    Args:
+        html_content: 页面HTML
+
+    Returns:
+        (标签显示名称列表, 标签 slug 列表)，均已去重并保持页面顺序
+    """
+    names: List[str] = []
+    slugs: List[str] = []
+    for slug, name in REGEX_VIDEO_TAGS.findall(html_content):
+        slug = slug.strip('/').split('?')[0]
+        name = unescape(name).strip()
+        if name and name not in names:
+            names.append(name)
+        if slug and slug not in slugs:
+            slugs.append(slug)
+    return names, slugs
+
+
+def extract_page_extras(html_content: str) -> Dict[str, Any]:
+    """
+    用正则提取预览图、评分和点赞/不喜欢数
+
+    Args:
+        html_content: 页面HTML
+
+    Returns:
+        字段字典，只包含匹配到的字段
+    """
+    fields: Dict[str, Any] = {}
+    preview_match = REGEX_VIDEO_PREVIEW.search(html_content)
+    if preview_match:
+        fields["preview"] = unescape(preview_match.group(1))
+    rating_match = REGEX_VIDEO_RATING.search(html_content)
+    if rating_match and rating_match.group(1).strip():
+        fields["rating"] = rating_match.group(1).strip()
+    likes_match = REGEX_LIKES.search(html_content)
+    if likes_match:
+        fields["likes"] = int(likes_match.group(1))
+    dislikes_match = REGEX_DISLIKES.search(html_content)
+    if dislikes_match:
+        fields["dislikes"] = int(dislikes_match.group(1))
+    return fields
+
+
+# 卡片中各字段对应的元素：(字段, 标签名集合, 判断属性的函数)，与 Client._parse_card 的查找条件一致
+_CARD_TEXT_FIELDS = (
+    ("title", ("h2", "h3", "h4", "span", "a"), lambda attrs: "title" in attrs.get("class", "").lower()),
+    ("duration", ("span",), lambda attrs: "duration" in attrs.get("class", "").lower()),
+    ("views", ("span",), lambda attrs: "views" in attrs.get("class", "").lower()),
+    ("rating", ("span",), lambda attrs: any(word in attrs.get("class", "").lower() for word in ("rating", "percent"))),
+    ("uploader", ("a",), lambda attrs: any(part in attrs.get("href", "") for part in ("/creator/", "/channel/"))),
+    ("upload_date", ("span",), lambda attrs: any(word in attrs.get("class", "").lower() for word in ("date", "ago"))),
+)
+
+
+class _Card:
+    """RelatedCardParser 中一张尚未结束的卡片"""
+
+    __slots__ = ("depth", "values", "captures")
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        self.values: Dict[str, str] = {}
+        # 字段 -> [标签名, 同名标签嵌套层数, 文本片段]
+        self.captures: Dict[str, list] = {}
+
+    def start(self, tag: str, attrs: Dict[str, str]):
+        for capture in self.captures.values():
+            if capture[0] == tag:
+                capture[1] += 1
+        if tag == "a" and "href" not in self.values and "/video/" in attrs.get("href", ""):
+            self.values["href"] = attrs["href"]
+            self.values["link_title"] = attrs.get("title", "")
+            self._capture("link_text", tag)
+        if tag == "img" and "thumbnail" not in self.values:
+            self.values["thumbnail"] = attrs.get("src") or attrs.get("data-src") or attrs.get("data-lazy-src", "")
+        if "data-preview" in attrs and "preview" not in self.values:
+            self.values["preview"] = attrs["data-preview"]
+        for field, tags, matches in _CARD_TEXT_FIELDS:
+            if tag in tags and field not in self.values and field not in self.captures and matches(attrs):
+                self._capture(field, tag)
+
+    def _capture(self, field: str, tag: str):
+        self.captures[field] = [tag, 1, []]
+
+    def end(self, tag: str):
+        for field, capture in list(self.captures.items()):
+            if capture[0] == tag:
+                capture[1] -= 1
+                if capture[1] == 0:
+                    self._finish(field)
+
+    def data(self, text: str):
+        for capture in self.captures.values():
+            capture[2].append(text)
+
+    def _finish(self, field: str):
+        # 与 get_text(strip=True) 一致：逐段去除空白后直接拼接
+        _, _, parts = self.captures.pop(field)
+        self.values[field] = "".join(part.strip() for part in parts)
+
+    def close(self) -> Dict[str, str]:
+        for field in list(self.captures):
+            self._finish(field)
+        return self.values
+
+
+class RelatedCardParser(HTMLParser):
+    """
+    不构建 DOM 提取第一个 class 含 related 的 div 中的视频卡片
+
+    卡片和字段的判断条件与 Client._parse_cards / _parse_card 在 DOM 上的查找一致，
+    用于详情页快速路径，避免只为相关视频构建 BeautifulSoup 树
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        # 按卡片在页面中出现的顺序保存字段，嵌套的卡片各自保存
+        self.cards: List[Dict[str, str]] = []
+        self._div_depth = 0
+        self._block_depth: Optional[int] = None
+        self._done = False
+        self._open: List[_Card] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self._done:
+            return
+        attrs = {name: value or "" for name, value in attrs}
+        for card in self._open:
+            card.start(tag, attrs)
+        if tag in ("script", "style"):
+            self._skip += 1
+        if tag != "div":
+            return
+        self._div_depth += 1
+        classes = attrs.get("class", "").lower()
+        if self._block_depth is None:
+            if "related" in classes:
+                self._block_depth = self._div_depth
+        elif "video" in classes or "thumb" in classes:
+            card = _Card(self._div_depth)
+            self._open.append(card)
+            self.cards.append(card.values)
+
+    def handle_endtag(self, tag):
+        if self._done:
+            return
+        for card in self._open:
+            card.end(tag)
+        if tag in ("script", "style") and self._skip:
+            self._skip -= 1
+        if tag != "div" or self._div_depth == 0:
+            return
+        while self._open and self._open[-1].depth >= self._div_depth:
+            self._open.pop().close()
+        if self._block_depth == self._div_depth:
+            self._done = True
+        self._div_depth -= 1
+
+    def handle_data(self, data):
+        if not self._done and not self._skip:
+            for card in self._open:
+                card.data(data)
+
+    def close(self):
+        super().close()
+        while self._open:
+            self._open.pop().close()
+
+
+def extract_related_cards(html_content: str) -> List[Dict[str, str]]:
+    """
+    不构建 DOM 提取详情页中的相关视频卡片
+
+    Args:
+        html_content: 详情页HTML
+
+    Returns:
+        每张卡片的原始字段（href、link_title、link_text、title、thumbnail、preview、duration、
+        views、rating、uploader、upload_date，卡片中没有的元素不出现），按页面顺序
+    """
+    match = REGEX_RELATED_VIDEOS.search(html_content)
+    if not match:
+        return []
+    parser = RelatedCardParser()
+    parser.feed(html_content[match.start():])
+    parser.close()
+    return parser.cards
+
+
+class HeadMetaParser(HTMLParser):
+    """
+    增量 HTML 解析器，只收集 meta、<title> 和 JSON-LD
+
+    可以反复 feed() 网络数据块，随时通过 fields() 获取当前已得到的字段
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta: Dict[str, List[str]] = {}
+        self.title_text = ""
+        self.jsonld: List[Any] = []
+        self.head_closed = False
+        self._capture: Optional[str] = None
+        self._buffer: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs = dict(attrs)
+            key = attrs.get("property") or attrs.get("name") or attrs.get("itemprop")
+            content = attrs.get("content")
+            if key and content is not None:
+                self.meta.setdefault(key.lower(), []).append(content)
+        elif tag == "title" and not self.title_text:
+            self._capture, self._buffer = "title", []
+        elif tag == "script" and (dict(attrs).get("type") or "").lower() == "application/ld+json":
+            self._capture, self._buffer = "jsonld", []
+        elif tag == "body":
+            self.head_closed = True
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.head_closed = True
+        if self._capture is None or tag not in ("title", "script"):
+            return
+        text = "".join(self._buffer).strip()
+        if self._capture == "title":
+            self.title_text = text
+        else:
+            try:
+                self.jsonld.append(json.loads(text))
+            except ValueError:
+                pass
+        self._capture, self._buffer = None, []
+
+    def handle_data(self, data):
+        if self._capture is not None:
+            self._buffer.append(data)
+
+    def fields(self) -> Dict[str, Any]:
+        """
+        获取当前已提取的字段
+
+        JSON-LD 优先，其次是 OpenGraph meta，最后用 <title> 兜底标题
+
+        Returns:
+            字段字典
+        """
+        fields = fields_from_meta(self.meta)
+        for data in self.jsonld:
+            for video in find_video_objects(data):
+                fields.update(fields_from_jsonld(video))
+        if "title" not in fields and self.title_text:
+            title = self.title_text
+            if ' - ' in title:
+                title = title.rsplit(' - ', 1)[0]
+            fields["title"] = title
+        return fields
+
+
+class IncrementalExtractor:
+    """流式字段提取器，所需字段全部就绪后即可停止读取"""
+
+    def __init__(self, wanted: Iterable[str]):
+        """
+        初始化提取器
+
+        Args:
+            wanted: 需要的字段名集合，必须是 STRUCTURED_FIELDS 的子集
+        """
+        self.wanted = frozenset(wanted)
+        unknown = self.wanted - STRUCTURED_FIELDS
+        if unknown:
+            raise ValueError(f"无法从页面头部提取的字段: {', '.join(sorted(unknown))}")
+        self.parser = HeadMetaParser()
+        self._fields: Dict[str, Any] = {}
+
+    def feed(self, chunk: str) -> bool:
+        """
+        输入一块 HTML
+
+        Args:
+            chunk: 已解码的 HTML 片段
+
+        Returns:
+            所需字段是否已全部获得
+        """
+        self.parser.feed(chunk)
+        self._fields = self.parser.fields()
+        return self.complete
+
+    @property
+    def complete(self) -> bool:
+        """所需字段是否已全部获得"""
+        return self.wanted.issubset(self._fields)
+
+    @property
+    def head_closed(self) -> bool:
+        """是否已读完 <head>"""
+        return self.parser.head_closed
+
+    @property
+    def not_found(self) -> bool:
+        """页面标题是否与站点未找到页面的标题一致"""
+        return is_not_found_title(self.parser.title_text)
+
+    def fields(self) -> Dict[str, Any]:
+        """获取已提取的字段"""
+        return dict(self._fields)
@@ -0,0 +1,202 @@
+"""
+消息格式化模块
+将视频信息、列表、订阅推送和运行统计格式化为聊天消息文本
+"""
+
+import time
+from typing import List
+
+from .core import VideoInfo
+from .metrics import Metrics
+
+
+def format_video_info(info: VideoInfo, show_url: bool = True) -> str:
+    """
+    格式化视频信息为文本
+    
+    Args:
+        info: VideoInfo对象
+        show_url: 是否显示URL
+        
+    Returns:
+        格式化的文本
+    """
+    lines = []
+    lines.append(f"🎬 {info.title or '无标题'}")
+    
+    if info.duration:
+        lines.append(f"⏱️ 时长: {info.duration}")
+    
+    if info.views:
+        lines.append(f"👁️ 播放: {info.views}")
+    
+    # 过滤无效评分值（-1 通常表示无评分数据）
+    if info.rating and info.rating not in ["-1", "-1%", "N/A", "0"]:
+        lines.append(f"👍 评分: {info.rating}")
+    elif info.likes > 0 or info.dislikes > 0:
+        # 如果有点赞/踩数据，显示点赞数
+        lines.append(f"👍 点赞: {info.likes}")
+    
+    if info.uploader:
+        lines.append(f"👤 作者: {info.uploader}")
+    
+    if info.upload_date:
+        lines.append(f"📅 日期: {info.upload_date}")
+    
+    if info.tags:
+        tags_str = ", ".join(info.tags[:5])
+        if len(info.tags) > 5:
+            tags_str += f" (+{len(info.tags) - 5})"
+        lines.append(f"🏷️ 标签: {tags_str}")
+    
+    if info.related:
+        related_str = ", ".join(video.video_id for video in info.related[:3])
+        lines.append(f"🔁 相关: {related_str}")
+    
+    if show_url:
+        lines.append(f"🔗 {info.url}")
+    
+    # 添加零宽字符防止strip
+    return "\n".join(lines) + "\u200E"
+
+
+def format_video_list(videos: List[VideoInfo], title: str = "视频列表", hint: str = "") -> str:
+    """
+    格式化视频列表
+    
+    Args:
+        videos: VideoInfo列表
+        title: 列表标题
+        hint: 列表末尾的提示
+        
+    Returns:
+        格式化的文本
+    """
+    if not videos:
+        return f"📭 {title}: 没有找到视频\u200E"
+    
+    lines = [f"📋 {title} ({len(videos)}个结果):", ""]
+    
+    for i, video in enumerate(videos[:10], 1):
+        duration_str = f" [{video.duration}]" if video.duration else ""
+        views_str = f" 👁️{video.views}" if video.views else ""
+        lines.append(f"{i}. {video.title or video.video_id}{duration_str}{views_str}")
+        lines.append(f"   ID: {video.video_id}")
+    
+    if len(videos) > 10:
+        lines.append(f"\n... 还有 {len(videos) - 10} 个视频")
+    
+    if hint:
+        lines.append("")
+        lines.append(hint)
+    
+    return "\n".join(lines) + "\u200E"
+
+
+def format_subscription_update(updates: List[tuple]) -> str:
+    """
+    格式化订阅推送
+    
+    Args:
+        updates: [(标签, 新视频列表)]
+        
+    Returns:
+        格式化的文本
+    """
+    lines = ["🔔 订阅标签有新视频:"]
+    for tag, videos in updates:
+        lines.append("")
+        lines.append(f"🏷️ {tag} ({len(videos)}个):")
+        for video in videos[:5]:
+            duration_str = f" [{video.duration}]" if video.duration else ""
+            lines.append(f"• {video.title or video.video_id}{duration_str}")
+            lines.append(f"  ID: {video.video_id}")
+        if len(videos) > 5:
+            lines.append(f"  ... 还有 {len(videos) - 5} 个")
+    return "\n".join(lines) + "\u200E"
+
+
+def _format_histogram(histogram) -> str:
+    """次数、平均和 p95 耗时"""
+    avg = histogram.sum / histogram.count * 1000 if histogram.count else 0
+    return f"{histogram.count}次 平均{avg:.0f}ms p95≤{histogram.quantile(0.95) * 1000:.0f}ms"
+
+
+def format_stats(metrics: Metrics, samples: List[tuple]) -> str:
+    """
+    格式化运行统计
+    
+    Args:
+        metrics: 指标注册表
+        samples: 采集到的瞬时值 [(名称, 标签, 值)]
+        
+    Returns:
+        格式化的文本
+    """
+    lines = ["📊 运行统计:", ""]
+    
+    commands = metrics.histograms("command_seconds")
+    if commands:
+        lines.append("⏱️ 命令:")
+        for labels, histogram in sorted(commands.items()):
+            lines.append(f"  {dict(labels)['command']}: {_format_histogram(histogram)}")
+    
+    exceeded = sum(metrics.counters("command_deadline_exceeded_total").values())
+    followups = {
+        dict(labels)["outcome"]: value
+        for labels, value in metrics.counters("thumbnail_followups_total").items()
+    }
+    if exceeded or followups:
+        lines.append(
+            f"⌛ 超出时间预算: {exceeded:g}次  缩略图补发 {followups.get('sent', 0):g}  "
+            f"失败 {followups.get('failed', 0):g}  放弃 {followups.get('dropped', 0):g}"
+        )
+    
+    for labels, histogram in sorted(metrics.histograms("fetch_seconds").items()):
+        mode = dict(labels)["mode"]
+        received = metrics.counter("fetch_bytes_total", mode=mode) / 1024 / 1024
+        lines.append(f"🌐 请求({mode}): {_format_histogram(histogram)} 共{received:.1f}MB")
+    
+    for labels, histogram in sorted(metrics.histograms("parse_seconds").items()):
+        name = "/".join(value for _, value in labels)
+        lines.append(f"🧩 解析({name}): {_format_histogram(histogram)}")
+    
+    for labels, histogram in sorted(metrics.histograms("image_seconds").items()):
+        name = "/".join(value for _, value in labels)
+        lines.append(f"🖼️ 图片({name}): {_format_histogram(histogram)}")
+
+    for labels, histogram in sorted(metrics.histograms("preview_seconds").items()):
+        lines.append(f"🎞️ 预览({dict(labels)['stage']}): {_format_histogram(histogram)}")
+    preview_hits = metrics.counter("preview_cache_hits_total")
+    preview_rejected = sum(metrics.counters("previews_rejected_total").values())
+    if preview_hits or preview_rejected:
+        lines.append(f"🎞️ 预览缓存命中 {preview_hits:g}  队列已满 {preview_rejected:g}")
+
+    ratios = [
+        f"{labels['cache']} {value * 100:.0f}%"
+        for name, labels, value in samples if name == "cache_hit_ratio"
+    ]
+    if ratios:
+        lines.append(f"💾 命中率: {', '.join(ratios)}")
+    
+    shared = {labels["event"]: value for name, labels, value in samples if name == "shared_cache_events"}
+    if shared:
+        lines.append(
+            f"🔗 共享缓存: 命中 {shared.get('hits', 0):g}  未命中 {shared.get('misses', 0):g}  "
+            f"加载 {shared.get('loads', 0):g}  等待其他实例 {shared.get('waits', 0):g}  "
+            f"错误 {shared.get('errors', 0):g}"
+        )
+    
+    gauges = {name: value for name, labels, value in samples if not labels}
+    lines.append(
+        f"🚦 执行中: {metrics.gauge('commands_in_flight'):g}  "
+        f"请求中: {metrics.gauge('fetches_in_flight'):g}  "
+        f"排队: {gauges.get('commands_waiting', 0):g}"
+    )
+    lines.append(
+        f"👥 会话: {gauges.get('result_sessions', 0):g}  "
+        f"订阅标签: {gauges.get('subscribed_tags', 0):g}"
+    )
+    uptime = time.time() - metrics.started_at
+    lines.append(f"🕒 运行: {uptime / 3600:.1f} 小时")
+    return "\n".join(lines) + "\u200E"
@@ -0,0 +1,201 @@
+"""
+缩略图处理模块
+下载缩略图、按马赛克级别处理并保存为 JPEG
+
+PIL 和 aiohttp 在首次处理图片时才导入
+"""
+
+import os
+import asyncio
+import hashlib
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+
+from .metrics import Metrics
+from .transport import Transport
+from .backends import SharedCache
+from .deadline import bounded, time_left, check_deadline
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+# 马赛克级别对应的块大小 (1=轻度, 2=中度, 3=重度)
+MOSAIC_BLOCK_SIZES = {1: 8, 2: 15, 3: 25}
+
+# 缩略图下载超时（秒），命令设有时间预算时不超过剩余预算
+DOWNLOAD_TIMEOUT = 30
+
+# 共享缓存中处理后缩略图的存活时间（秒）
+SHARED_THUMBNAIL_TTL = 3600
+
+
+class _ThumbnailUnavailable(Exception):
+    """缩略图下载返回非 200，不写入共享缓存"""
+
+
+def apply_mosaic(image: "Image.Image", block_size: int = 10) -> "Image.Image":
+    """
+    对图片应用马赛克效果
+    
+    Args:
+        image: PIL Image对象
+        block_size: 马赛克块大小，越大越模糊
+        
+    Returns:
+        处理后的图片
+    """
+    if block_size <= 1:
+        return image
+    
+    from PIL import Image
+    
+    # 缩小然后放大实现马赛克效果
+    small = image.resize(
+        (max(1, image.width // block_size), max(1, image.height // block_size)),
+        Image.Resampling.BILINEAR
+    )
+    return small.resize(image.size, Image.Resampling.NEAREST)
+
+
+def thumbnail_path(cache_dir: Path, url: str, mosaic_level: int) -> Path:
+    """同一图片和马赛克级别对应固定的缓存文件"""
+    digest = hashlib.md5(f"{url}|{mosaic_level}".encode("utf-8")).hexdigest()[:16]
+    return Path(cache_dir) / f"thumb_{digest}.jpg"
+
+
+def process_image(
+    image_data: bytes,
+    mosaic_level: int,
+    filepath: Path,
+    metrics: Optional[Metrics] = None
+):
+    """
+    处理图片并保存为 JPEG
+    
+    Args:
+        image_data: 原始图片数据
+        mosaic_level: 马赛克级别 (0=无, 1=轻度, 2=中度, 3=重度)
+        filepath: 保存路径
+        metrics: 指标注册表，记录处理耗时
+    """
+    metrics = metrics if metrics is not None else Metrics()
+    with metrics.timer("image_seconds", stage="process", mosaic_level=mosaic_level):
+        from PIL import Image
+        image = Image.open(BytesIO(image_data))
+        
+        # 转换为RGB模式（处理RGBA等情况）
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        
+        # 应用马赛克
+        if mosaic_level > 0:
+            image = apply_mosaic(image, MOSAIC_BLOCK_SIZES.get(mosaic_level, 15))
+        
+        image.save(filepath, "JPEG", quality=85)
+
+
+async def fetch_thumbnail(
+    url: str,
+    cache_dir: Path,
+    mosaic_level: int = 0,
+    proxy: Optional[str] = None,
+    metrics: Optional[Metrics] = None,
+    transport: Optional[Transport] = None,
+    shared_cache: Optional[SharedCache] = None
+) -> Optional[str]:
+    """
+    下载并处理缩略图，已处理过的图片直接复用
+    
+    Args:
+        url: 图片URL
+        cache_dir: 缓存目录
+        mosaic_level: 马赛克级别 (0=无, 1=轻度, 2=中度, 3=重度)
+        proxy: 代理地址
+        metrics: 指标注册表，记录下载和处理耗时
+        transport: 传输层（录制/回放），默认直接访问网络
+        shared_cache: 多个实例共用的缓存，处理后的图片在所有实例中只下载处理一次
+        
+    Returns:
+        处理后图片的本地路径，下载失败（非 200）时返回 None
+        
+    Raises:
+        aiohttp.ClientError: 网络错误
+        asyncio.TimeoutError: 下载超时
+        NetworkError: 通过传输层下载失败
+        DeadlineExceeded: 当前命令的时间预算已用尽
+        OSError: 图片无法识别或保存失败
+    """
+    if not url:
+        return None
+    
+    metrics = metrics if metrics is not None else Metrics()
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    filepath = thumbnail_path(cache_dir, url, mosaic_level)
+    if filepath.exists():
+        try:
+            os.utime(filepath)
+            metrics.inc("image_cache_hits_total", source="local")
+            return str(filepath)
+        except OSError:
+            pass
+    
+    if shared_cache is None:
+        if not await _download_and_process(url, filepath, mosaic_level, proxy, metrics, transport):
+            return None
+        return str(filepath)
+    
+    async def load() -> bytes:
+        if not await _download_and_process(url, filepath, mosaic_level, proxy, metrics, transport):
+            raise _ThumbnailUnavailable(url)
+        return filepath.read_bytes()
+    
+    try:
+        data = await shared_cache.get_or_load(
+            "thumb:" + filepath.name, load, SHARED_THUMBNAIL_TTL, stage="下载缩略图"
+        )
+    except _ThumbnailUnavailable:
+        return None
+    if not filepath.exists():
+        # 其他实例处理好的图片
+        metrics.inc("image_cache_hits_total", source="shared")
+        filepath.write_bytes(data)
+    return str(filepath)
+
+
+async def _download_and_process(
+    url: str,
+    filepath: Path,
+    mosaic_level: int,
+    proxy: Optional[str],
+    metrics: Metrics,
+    transport: Optional[Transport]
+) -> bool:
+    """下载并处理缩略图，下载返回非 200 时返回 False"""
+    with metrics.timer("image_seconds", stage="download"):
+        if transport is not None:
+            response = await bounded(transport.request("GET", url, proxy), DOWNLOAD_TIMEOUT, "下载缩略图")
+            if response.status != 200:
+                return False
+            image_data = response.body
+        else:
+            import aiohttp
+            timeout = aiohttp.ClientTimeout(total=time_left(DOWNLOAD_TIMEOUT, "下载缩略图"))
+            try:
+                async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
+                    async with session.get(url, proxy=proxy) as response:
+                        if response.status != 200:
+                            return False
+                        image_data = await response.read()
+            except asyncio.TimeoutError:
+                check_deadline("下载缩略图")
+                raise
+    metrics.inc("image_bytes_total", len(image_data))
+    
+    # 下载用完预算时不再处理，结果不会被发送
+    check_deadline("处理缩略图")
+    process_image(image_data, mosaic_level, filepath, metrics)
+    return True
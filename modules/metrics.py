@@ -0,0 +1,222 @@
+"""
+运行指标模块
+按阶段/命令统计耗时直方图、计数器和瞬时值，并导出为 Prometheus 文本格式
+"""
+
+import time
+import bisect
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# 默认耗时分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 指标名前缀
+PREFIX = "threedporndude_"
+
+# 标签集合，按名称排序后的 (名称, 值) 元组，可作为字典键
+Labels = Tuple[Tuple[str, str], ...]
+
+# 采集函数返回的瞬时值：(指标名, 标签, 值)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    """固定分桶的直方图"""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """记录一个观测值"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        按分桶估算分位数
+
+        Args:
+            q: 0~1 之间的分位
+
+        Returns:
+            所在分桶的上界，落在最后一个分桶时返回最大的有限上界
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return self.buckets[min(index, len(self.buckets) - 1)]
+        return self.buckets[-1]
+
+
+class Metrics:
+    """
+    指标注册表
+
+    - histogram: 耗时等分布，用 timer() 计时
+    - counter: 单调递增的计数（请求数、字节数）
+    - gauge: 可增可减的瞬时值（进行中的请求数）
+    - collector: 导出时调用的函数，用于缓存命中率等已在别处统计的数据
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._help: Dict[str, str] = {}
+        self.started_at = time.time()
+
+    def describe(self, name: str, help_text: str):
+        """设置指标说明，导出时作为 # HELP 行"""
+        self._help[name] = help_text
+
+    def observe(self, name: str, value: float, **labels):
+        """向直方图记录一个观测值"""
+        series = self._histograms.setdefault(name, {})
+        key = _labels(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """
+        计时上下文，退出时把耗时（秒）记录到直方图，异常退出同样记录
+
+        Args:
+            name: 直方图名称
+            **labels: 标签
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """增加计数器"""
+        series = self._counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0) + value
+
+    def gauge_add(self, name: str, value: float, **labels):
+        """调整瞬时值"""
+        series = self._gauges.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0) + value
+
+    @contextmanager
+    def in_flight(self, name: str, **labels) -> Iterator[None]:
+        """进入时瞬时值 +1，退出时 -1"""
+        self.gauge_add(name, 1, **labels)
+        try:
+            yield
+        finally:
+            self.gauge_add(name, -1, **labels)
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """注册导出时调用的采集函数"""
+        self._collectors.append(collector)
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        """获取某条直方图，不存在时返回 None"""
+        return self._histograms.get(name, {}).get(_labels(labels))
+
+    def histograms(self, name: str) -> Dict[Labels, Histogram]:
+        """获取某直方图的全部标签组合"""
+        return dict(self._histograms.get(name, {}))
+
+    def counter(self, name: str, **labels) -> float:
+        """获取计数器的值"""
+        return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    def counters(self, name: str) -> Dict[Labels, float]:
+        """获取某计数器的全部标签组合"""
+        return dict(self._counters.get(name, {}))
+
+    def gauge(self, name: str, **labels) -> float:
+        """获取瞬时值"""
+        return self._gauges.get(name, {}).get(_labels(labels), 0)
+
+    def collect(self) -> List[Sample]:
+        """调用所有采集函数，单个采集函数出错时跳过"""
+        samples: List[Sample] = []
+        for collector in self._collectors:
+            try:
+                samples.extend(collector())
+            except Exception:
+                continue
+        return samples
+
+    def render_prometheus(self) -> str:
+        """
+        导出为 Prometheus 文本格式
+
+        Returns:
+            文本，可写入 node_exporter 的 textfile 目录或直接作为 /metrics 响应
+        """
+        lines: List[str] = []
+
+        def header(name: str, kind: str):
+            if name in self._help:
+                lines.append(f"# HELP {PREFIX}{name} {self._help[name]}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for name, series in sorted(self._histograms.items()):
+            header(name, "histogram")
+            for labels, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f"{PREFIX}{name}_bucket{_format_labels(labels, ('le', repr(bound)))} {cumulative}"
+                    )
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {histogram.count}")
+                lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {histogram.count}")
+
+        for name, series in sorted(self._counters.items()):
+            header(name, "counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value:g}")
+
+        gauges: Dict[str, Dict[Labels, float]] = {
+            name: dict(series) for name, series in self._gauges.items()
+        }
+        for name, labels, value in self.collect():
+            gauges.setdefault(name, {})[_labels(labels)] = value
+        gauges.setdefault("uptime_seconds", {})[()] = time.time() - self.started_at
+        for name, series in sorted(gauges.items()):
+            header(name, "gauge")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value:g}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,346 @@
+"""
+动画预览模块
+下载列表卡片和详情页 data-preview 中的预览片段，抽取少量帧，缩小并按马赛克级别打码后
+编码为动画 GIF/WebP
+
+解码和编码在有界的线程池中进行，不阻塞事件循环；每次渲染受帧数、像素和时间预算限制。
+结果按 URL 和马赛克级别缓存为文件，重复请求直接返回。
+GIF/WebP 片段用 Pillow 解码，MP4/WebM 片段需要另外安装 av（PyAV），在首次解码视频时才导入
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+from io import BytesIO
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, TYPE_CHECKING
+
+from .errors import NetworkError, PreviewError
+from .metrics import Metrics
+from .transport import Transport
+from .images import MOSAIC_BLOCK_SIZES, apply_mosaic
+from .deadline import bounded, check_deadline, detached, time_left
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+# 支持的输出格式
+PREVIEW_FORMATS = ("gif", "webp")
+
+# 抽帧频率（帧/秒），输出动画按同样的速度播放
+PREVIEW_FPS = 5
+
+# 预览片段大小上限（字节），超出时放弃下载
+MAX_PREVIEW_BYTES = 8 * 1024 * 1024
+
+# 源帧像素上限，防止异常大的片段耗尽内存
+MAX_SOURCE_PIXELS = 3840 * 2160
+
+# 预览片段下载超时（秒）
+DOWNLOAD_TIMEOUT = 30
+
+
+def preview_path(cache_dir: Path, url: str, mosaic_level: int, fmt: str) -> Path:
+    """同一片段、马赛克级别和格式对应固定的缓存文件"""
+    digest = hashlib.md5(f"{url}|{mosaic_level}".encode("utf-8")).hexdigest()[:16]
+    return Path(cache_dir) / f"preview_{digest}.{fmt}"
+
+
+def _decode_frames(data: bytes, fps: float) -> Iterator["Image.Image"]:
+    """
+    按 fps 抽取片段中的帧
+
+    Raises:
+        PreviewError: 格式不支持、缺少视频解码依赖或帧尺寸超出上限
+    """
+    from PIL import Image, ImageSequence, UnidentifiedImageError
+    try:
+        image = Image.open(BytesIO(data))
+    except UnidentifiedImageError:
+        image = None
+    if image is not None:
+        # 动画图片：按每帧的显示时长抽帧
+        if image.width * image.height > MAX_SOURCE_PIXELS:
+            raise PreviewError(f"预览尺寸过大: {image.width}x{image.height}")
+        elapsed, next_time = 0.0, 0.0
+        for frame in ImageSequence.Iterator(image):
+            if elapsed >= next_time:
+                next_time += 1 / fps
+                yield frame.copy()
+            elapsed += frame.info.get("duration", 100) / 1000
+        return
+
+    try:
+        import av
+    except ImportError:
+        raise PreviewError("视频预览需要安装 av（pip install av）")
+    try:
+        container = av.open(BytesIO(data))
+    except Exception as e:
+        raise PreviewError(f"无法识别的预览格式: {e}")
+    with container:
+        if not container.streams.video:
+            raise PreviewError("预览片段中没有视频流")
+        stream = container.streams.video[0]
+        if stream.codec_context.width * stream.codec_context.height > MAX_SOURCE_PIXELS:
+            raise PreviewError(f"预览尺寸过大: {stream.codec_context.width}x{stream.codec_context.height}")
+        stream.thread_type = "AUTO"
+        next_time = 0.0
+        for frame in container.decode(stream):
+            timestamp = frame.time if frame.time is not None else next_time
+            if timestamp + 1e-6 < next_time:
+                continue
+            next_time += 1 / fps
+            yield frame.to_image()
+
+
+def render_preview(
+    data: bytes,
+    filepath: Path,
+    mosaic_level: int,
+    max_frames: int,
+    max_side: int,
+    time_budget: float,
+    fmt: str = "gif",
+    fps: float = PREVIEW_FPS
+) -> int:
+    """
+    解码预览片段并编码为动画图片，在工作线程中调用
+
+    超出时间预算时停止抽帧，用已取得的帧编码；一帧都没有时失败
+
+    Args:
+        data: 预览片段
+        filepath: 保存路径
+        mosaic_level: 马赛克级别 (0=无, 1=轻度, 2=中度, 3=重度)
+        max_frames: 最多输出的帧数
+        max_side: 输出帧的最长边（像素）
+        time_budget: 抽帧时间预算（秒）
+        fmt: 输出格式 gif / webp
+        fps: 抽帧频率
+
+    Returns:
+        输出的帧数
+
+    Raises:
+        PreviewError: 无法生成预览
+        OSError: 保存失败
+    """
+    deadline = time.monotonic() + time_budget
+    block_size = MOSAIC_BLOCK_SIZES.get(mosaic_level, 15) if mosaic_level > 0 else 0
+    frames: List["Image.Image"] = []
+    for image in _decode_frames(data, fps):
+        frame = image.convert("RGB")
+        frame.thumbnail((max_side, max_side))
+        if block_size:
+            frame = apply_mosaic(frame, block_size)
+        frames.append(frame)
+        if len(frames) >= max_frames or time.monotonic() >= deadline:
+            break
+    if not frames:
+        raise PreviewError("预览片段中没有可用的帧")
+
+    options = {"save_all": True, "append_images": frames[1:], "duration": int(1000 / fps), "loop": 0}
+    if fmt == "webp":
+        options.update(quality=60, method=4)
+    else:
+        options.update(optimize=True)
+    tmp_path = filepath.with_suffix(filepath.suffix + ".tmp")
+    frames[0].save(tmp_path, format=fmt.upper(), **options)
+    tmp_path.replace(filepath)
+    return len(frames)
+
+
+class PreviewRenderer:
+    """
+    动画预览渲染器
+
+    - 下载在事件循环中进行，大小超出上限时中止
+    - 解码和编码在线程池中进行，排队的渲染数超出上限时直接拒绝
+    - 同一片段同时只渲染一次，结果按 URL 和马赛克级别缓存为文件，超出数量后删除最久未用的
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        workers: int = 1,
+        max_frames: int = 16,
+        max_side: int = 240,
+        time_budget: float = 10.0,
+        fmt: str = "gif",
+        max_files: int = 200,
+        max_bytes: int = MAX_PREVIEW_BYTES,
+        metrics: Optional[Metrics] = None
+    ):
+        """
+        Args:
+            cache_dir: 缓存目录
+            workers: 工作线程数
+            max_frames: 最多输出的帧数
+            max_side: 输出帧的最长边（像素）
+            time_budget: 每次抽帧的时间预算（秒）
+            fmt: 输出格式 gif / webp
+            max_files: 最多保留的预览文件数
+            max_bytes: 预览片段大小上限（字节）
+            metrics: 指标注册表
+
+        Raises:
+            ValueError: 不支持的输出格式
+        """
+        if fmt not in PREVIEW_FORMATS:
+            raise ValueError(f"不支持的预览格式: {fmt}，可选: {', '.join(PREVIEW_FORMATS)}")
+        self.cache_dir = Path(cache_dir)
+        self.workers = max(1, workers)
+        self.max_frames = max(1, max_frames)
+        self.max_side = max(16, max_side)
+        self.time_budget = time_budget
+        self.fmt = fmt
+        self.max_files = max(1, max_files)
+        self.max_bytes = max_bytes
+        self.metrics = metrics if metrics is not None else Metrics()
+        # 排队和执行中的渲染数上限
+        self.max_pending = self.workers * 4
+        self._pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Dict[Path, asyncio.Future] = {}
+
+    def cached(self, url: str, mosaic_level: int) -> Optional[str]:
+        """已生成的预览路径，没有时返回 None"""
+        filepath = preview_path(self.cache_dir, url, mosaic_level, self.fmt)
+        try:
+            os.utime(filepath)
+        except OSError:
+            return None
+        return str(filepath)
+
+    async def render(
+        self,
+        url: str,
+        mosaic_level: int = 0,
+        proxy: Optional[str] = None,
+        transport: Optional[Transport] = None
+    ) -> str:
+        """
+        获取预览，没有缓存时下载并渲染
+
+        调用者被取消或超时时渲染仍会完成并写入缓存
+
+        Args:
+            url: 预览片段URL
+            mosaic_level: 马赛克级别
+            proxy: 代理地址
+            transport: 传输层（录制/回放），默认直接访问网络
+
+        Returns:
+            预览文件路径
+
+        Raises:
+            PreviewError: 无法生成预览或渲染队列已满
+            NetworkError: 下载失败
+            DeadlineExceeded: 当前命令的时间预算已用尽
+        """
+        if not url:
+            raise PreviewError("该视频没有预览片段")
+        cached = self.cached(url, mosaic_level)
+        if cached is not None:
+            self.metrics.inc("preview_cache_hits_total")
+            return cached
+
+        filepath = preview_path(self.cache_dir, url, mosaic_level, self.fmt)
+        task = self._inflight.get(filepath)
+        if task is None:
+            if self._pending >= self.max_pending:
+                self.metrics.inc("previews_rejected_total", reason="busy")
+                raise PreviewError("预览生成队列已满，请稍后再试")
+            # 渲染不受当前命令的时间预算限制，调用者超时后继续完成并写入缓存
+            with detached():
+                task = asyncio.ensure_future(self._render(url, filepath, mosaic_level, proxy, transport))
+            self._pending += 1
+            self._inflight[filepath] = task
+            task.add_done_callback(lambda done: self._render_done(filepath, done))
+        return await asyncio.shield(task)
+
+    def _render_done(self, filepath: Path, task: asyncio.Future):
+        self._pending -= 1
+        if self._inflight.get(filepath) is task:
+            del self._inflight[filepath]
+        if not task.cancelled():
+            # 所有等待者都已离开时避免 "exception was never retrieved" 警告
+            task.exception()
+
+    async def _render(
+        self,
+        url: str,
+        filepath: Path,
+        mosaic_level: int,
+        proxy: Optional[str],
+        transport: Optional[Transport]
+    ) -> str:
+        with self.metrics.timer("preview_seconds", stage="download"):
+            data = await self._download(url, proxy, transport)
+        self.metrics.inc("preview_bytes_total", len(data))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="preview")
+        loop = asyncio.get_running_loop()
+        with self.metrics.timer("preview_seconds", stage="render"):
+            frames = await loop.run_in_executor(
+                self._executor, render_preview, data, filepath, mosaic_level,
+                self.max_frames, self.max_side, self.time_budget, self.fmt
+            )
+        self.metrics.inc("preview_frames_total", frames)
+        self._rotate()
+        return str(filepath)
+
+    async def _download(self, url: str, proxy: Optional[str], transport: Optional[Transport]) -> bytes:
+        """下载预览片段，超出大小上限时中止"""
+        if transport is not None:
+            response = await bounded(transport.request("GET", url, proxy), DOWNLOAD_TIMEOUT, "下载预览")
+            if response.status != 200:
+                raise NetworkError(f"HTTP错误 {response.status}: {url}")
+            if len(response.body) > self.max_bytes:
+                raise PreviewError(f"预览片段过大: {len(response.body) // 1024} KB")
+            return response.body
+
+        import aiohttp
+        timeout = aiohttp.ClientTimeout(total=time_left(DOWNLOAD_TIMEOUT, "下载预览"))
+        try:
+            async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
+                async with session.get(url, proxy=proxy) as response:
+                    if response.status != 200:
+                        raise NetworkError(f"HTTP错误 {response.status}: {url}")
+                    if (response.content_length or 0) > self.max_bytes:
+                        raise PreviewError(f"预览片段过大: {response.content_length // 1024} KB")
+                    chunks, received = [], 0
+                    async for chunk in response.content.iter_chunked(65536):
+                        received += len(chunk)
+                        if received > self.max_bytes:
+                            raise PreviewError(f"预览片段超过 {self.max_bytes // 1024} KB")
+                        chunks.append(chunk)
+                    return b"".join(chunks)
+        except asyncio.TimeoutError:
+            check_deadline("下载预览")
+            raise NetworkError(f"下载预览超时: {url}")
+        except aiohttp.ClientError as e:
+            raise NetworkError(f"下载预览失败: {e}")
+
+    def _rotate(self):
+        """删除超出数量的最久未用的预览"""
+        try:
+            files = sorted(self.cache_dir.glob("preview_*"), key=lambda path: path.stat().st_mtime)
+        except OSError:
+            return
+        for path in files[:max(0, len(files) - self.max_files)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def close(self):
+        """停止线程池，正在进行的渲染在后台完成"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,203 @@
+"""
+命令采样分析模块
+按比例抽取命令调用，用 cProfile 统计热点函数、用 tracemalloc 统计分配位置，
+结果写入分析目录下的文本报告，超出数量后删除最旧的报告
+
+cProfile 和 tracemalloc 都作用于整个解释器，同一时间只分析一个命令；
+采样期间事件循环上其他任务的调用也会计入报告
+"""
+
+import io
+import time
+import random
+import pstats
+import cProfile
+import tracemalloc
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+# 支持的分析模式
+PROFILE_MODES = ("cpu", "memory", "both")
+
+# tracemalloc 每个分配记录的栈深度
+TRACE_FRAMES = 5
+
+# 报告中忽略的分配来源
+IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class Profiler:
+    """按比例采样命令调用并生成分析报告"""
+
+    def __init__(
+        self,
+        directory: Path,
+        sample_rate: float = 0.0,
+        mode: str = "cpu",
+        top_n: int = 25,
+        max_files: int = 50
+    ):
+        """
+        初始化
+
+        Args:
+            directory: 报告目录
+            sample_rate: 采样比例 (0~1)，0 表示关闭
+            mode: cpu (cProfile) / memory (tracemalloc) / both
+            top_n: 报告中列出的函数和分配位置数量
+            max_files: 保留的报告数量上限
+
+        Raises:
+            ValueError: 模式无效
+        """
+        self.directory = Path(directory)
+        self.top_n = top_n
+        self.max_files = max(1, max_files)
+        self.sample_rate = 0.0
+        self.mode = "cpu"
+        self.configure(sample_rate, mode)
+        self._active = False
+        self._random = random.Random()
+        self.stats: Dict[str, int] = {"sampled": 0, "skipped_busy": 0, "write_errors": 0}
+        self.last_report: Optional[Path] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def configure(self, sample_rate: Optional[float] = None, mode: Optional[str] = None):
+        """
+        调整采样比例和模式
+
+        Raises:
+            ValueError: 模式无效
+        """
+        if mode is not None:
+            if mode not in PROFILE_MODES:
+                raise ValueError(f"未知的分析模式: {mode}，可选: {', '.join(PROFILE_MODES)}")
+            self.mode = mode
+        if sample_rate is not None:
+            self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+
+    def _should_sample(self) -> bool:
+        if not self.enabled:
+            return False
+        if self._random.random() >= self.sample_rate:
+            return False
+        if self._active:
+            self.stats["skipped_busy"] += 1
+            return False
+        return True
+
+    @contextmanager
+    def sample(self, name: str) -> Iterator[bool]:
+        """
+        按采样比例分析一段代码，未被抽中时不做任何事
+
+        Args:
+            name: 报告名称（命令名）
+
+        Yields:
+            本次是否被采样
+        """
+        if not self._should_sample():
+            yield False
+            return
+
+        self._active = True
+        profile = cProfile.Profile() if self.mode in ("cpu", "both") else None
+        trace = self.mode in ("memory", "both")
+        started_tracing = False
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            started_tracing = True
+        if trace:
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        if profile is not None:
+            try:
+                profile.enable()
+            except ValueError:
+                # 已有其他分析工具在运行
+                profile = None
+        try:
+            yield True
+        finally:
+            if profile is not None:
+                profile.disable()
+            duration = time.perf_counter() - start
+            sections = []
+            try:
+                if profile is not None:
+                    sections.append(self._format_profile(profile))
+                if trace:
+                    peak = tracemalloc.get_traced_memory()[1] - baseline
+                    after = tracemalloc.take_snapshot()
+                    sections.append(self._format_allocations(before, after, peak))
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+                self._active = False
+            self.stats["sampled"] += 1
+            self._write_report(name, duration, sections)
+
+    def _format_profile(self, profile: cProfile.Profile) -> str:
+        lines = []
+        for sort_key, title in (("tottime", "自身耗时"), ("cumulative", "累计耗时")):
+            buffer = io.StringIO()
+            pstats.Stats(profile, stream=buffer).sort_stats(sort_key).print_stats(self.top_n)
+            lines.append(f"== cProfile: 按{title}前 {self.top_n} 项 ==")
+            lines.append(buffer.getvalue().strip())
+        return "\n\n".join(lines)
+
+    def _format_allocations(
+        self, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, peak: int
+    ) -> str:
+        before = before.filter_traces(IGNORED_TRACES)
+        after = after.filter_traces(IGNORED_TRACES)
+        diffs = [stat for stat in after.compare_to(before, "lineno") if stat.size_diff > 0]
+        lines = [
+            f"== tracemalloc: 命令结束时仍未释放的分配，按大小前 {self.top_n} 项 ==",
+            f"峰值新增: {peak / 1024:.1f} KiB",
+        ]
+        for stat in diffs[:self.top_n]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"{stat.size_diff / 1024:10.1f} KiB {stat.count_diff:7d} 块  {frame.filename}:{frame.lineno}"
+            )
+        return "\n".join(lines)
+
+    def _write_report(self, name: str, duration: float, sections: List[str]):
+        """写入报告并删除超出数量的旧报告，写入失败时只计数"""
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+        path = self.directory / f"profile_{stamp}_{name}.txt"
+        header = (
+            f"# command: {name}\n"
+            f"# time: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))}\n"
+            f"# duration: {duration:.3f} s\n"
+            f"# mode: {self.mode}\n"
+        )
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path.write_text(header + "\n" + "\n\n".join(sections) + "\n", encoding="utf-8")
+            self.last_report = path
+            for old in sorted(self.directory.glob("profile_*.txt"))[:-self.max_files]:
+                old.unlink()
+        except OSError:
+            self.stats["write_errors"] += 1
+
+    def reports(self) -> List[Path]:
+        """已保存的报告，按时间从旧到新"""
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("profile_*.txt"))
@@ -0,0 +1,173 @@
+"""
+结果会话模块
+按会话保存最近一次列表结果和分页状态，后续的"第N个详情"、"下一页"直接使用，并提前预取下一页
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, TYPE_CHECKING
+
+from .cache import TTLCache
+from .deadline import detached
+
+if TYPE_CHECKING:
+    from .core import VideoInfo
+
+
+# 按页码获取列表的函数
+PageFetcher = Callable[[int], Awaitable[List["VideoInfo"]]]
+
+# 按页码生成列表标题的函数
+TitleBuilder = Callable[[int], str]
+
+
+class ResultSession:
+    """一次列表查询的分页状态"""
+
+    __slots__ = ("fetch", "title", "page", "videos", "_prefetched")
+
+    def __init__(self, fetch: PageFetcher, title: TitleBuilder, page: int, videos: List["VideoInfo"]):
+        """
+        初始化会话
+
+        Args:
+            fetch: 按页码获取列表的函数
+            title: 按页码生成列表标题的函数
+            page: 当前页码
+            videos: 当前页的视频
+        """
+        self.fetch = fetch
+        self.title = title
+        self.page = page
+        self.videos = videos
+        self._prefetched: Dict[int, asyncio.Task] = {}
+
+    def item(self, index: int) -> Optional["VideoInfo"]:
+        """
+        按列表序号获取视频
+
+        Args:
+            index: 从 1 开始的序号
+
+        Returns:
+            VideoInfo，序号超出范围时返回 None
+        """
+        if 1 <= index <= len(self.videos):
+            return self.videos[index - 1]
+        return None
+
+    def prefetch(self, page: int):
+        """在后台预取某一页，已在预取时不重复请求"""
+        if page < 1 or page in self._prefetched:
+            return
+        task = asyncio.ensure_future(self._prefetch(page))
+        # 预取失败不影响当前结果，真正翻页时会重新请求并报告错误
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._prefetched[page] = task
+
+    async def _prefetch(self, page: int) -> List["VideoInfo"]:
+        # 预取在命令回复之后继续进行，不受发起命令的时间预算限制
+        with detached():
+            return await self.fetch(page)
+
+    async def goto(self, page: int) -> List["VideoInfo"]:
+        """
+        翻到指定页，优先使用预取结果
+
+        Args:
+            page: 页码
+
+        Returns:
+            该页的视频
+        """
+        task = self._prefetched.pop(page, None)
+        videos = None
+        if task is not None:
+            try:
+                videos = await task
+            except Exception:
+                videos = None
+        if videos is None:
+            videos = await self.fetch(page)
+        self.page = page
+        self.videos = videos
+        return videos
+
+    def cancel(self):
+        """取消尚未完成的预取"""
+        for task in self._prefetched.values():
+            task.cancel()
+        self._prefetched.clear()
+
+
+class SessionStore:
+    """按会话保存的列表结果，过期或超出容量后自动淘汰，被淘汰的会话同时取消预取"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 600, prefetch: bool = True):
+        """
+        初始化会话存储
+
+        Args:
+            maxsize: 最多保存的会话数
+            ttl: 会话存活时间（秒）
+            prefetch: 是否在后台预取下一页
+        """
+        self.prefetch = prefetch
+        self._sessions = TTLCache(maxsize=maxsize, ttl=ttl, on_evict=self._evicted)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, key: Hashable) -> Optional[ResultSession]:
+        """获取会话，过期时返回 None"""
+        return self._sessions.get(key)
+
+    def open(
+        self, key: Hashable, fetch: PageFetcher, title: TitleBuilder, page: int, videos: List["VideoInfo"]
+    ) -> ResultSession:
+        """
+        为一次新的列表查询创建会话，替换该会话之前的结果
+
+        Args:
+            key: 会话键
+            fetch: 按页码获取列表的函数
+            title: 按页码生成列表标题的函数
+            page: 当前页码
+            videos: 当前页的视频
+
+        Returns:
+            新会话
+        """
+        # 顺带丢弃其他已过期的会话，避免无人访问的会话一直保留预取任务
+        self._sessions.expire()
+        old = self._sessions.pop(key)
+        if old is not None:
+            old.cancel()
+        session = ResultSession(fetch, title, page, videos)
+        self._sessions.set(key, session)
+        if self.prefetch and videos:
+            session.prefetch(page + 1)
+        return session
+
+    async def turn(self, session: ResultSession, page: int) -> List["VideoInfo"]:
+        """
+        翻页并预取之后的一页
+
+        Args:
+            session: 会话
+            page: 目标页码
+
+        Returns:
+            该页的视频
+        """
+        videos = await session.goto(page)
+        if self.prefetch and videos:
+            session.prefetch(page + 1)
+        return videos
+
+    def clear(self):
+        """清空所有会话（包括已过期的）并取消预取"""
+        self._sessions.clear()
+
+    @staticmethod
+    def _evicted(key: Hashable, session: ResultSession):
+        session.cancel()
@@ -0,0 +1,382 @@
+"""
+视频目录快照模块
+把本地视频目录中的全部 VideoInfo 导出为紧凑的二进制快照，重启后通过内存映射直接打开，
+不需要逐条反序列化即可按 ID 查找、随机抽样和标题搜索；同一份快照可以放在共享存储上供多个实例使用
+
+文件布局（小端序，各段按 8 字节对齐）:
+    文件头      magic(8) 版本(u16) 标志(u16) 视频数(u32) 段数(u32)
+    段表        每段 名称(16) 偏移(u64) 长度(u64)
+    strings     所有字符串去重后的 UTF-8 数据，strings.offsets 为各字符串的起止偏移 (u32)
+    列          每个字符串字段一列字符串编号 (u32)，likes/dislikes 各一列 (i64)
+    tags        各视频标签的字符串编号，tags.offsets 为各视频的起止位置
+    related     各视频相关视频的行号，related.offsets 为各视频的起止位置
+    index.id    按 video_id 排序的行号，用于二分查找
+    index.*     标题词元倒排索引：按词元排序的字符串编号、各词元的起止位置和行号
+"""
+
+import sys
+import copy
+import mmap
+import struct
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union, TYPE_CHECKING
+
+from .catalog import tokenize
+
+if TYPE_CHECKING:
+    from .core import VideoInfo
+
+
+SNAPSHOT_MAGIC = b"3DPDCAT\x00"
+SNAPSHOT_VERSION = 1
+
+HEADER = struct.Struct("<8sHHII")
+SECTION = struct.Struct("<16sQQ")
+
+# 以字符串编号保存的字段
+STRING_FIELDS = (
+    "video_id", "url", "title", "duration", "thumbnail", "preview", "views",
+    "rating", "uploader", "upload_date", "description",
+)
+
+# 以 64 位整数保存的字段
+INT_FIELDS = ("likes", "dislikes")
+
+# 段内数组为小端序；大端机器上写入前和读取后需要转换字节序
+NATIVE_LITTLE_ENDIAN = sys.byteorder == "little"
+
+# 解码后的完整记录最多缓存的行数。每次查找都要在映射中二分查找并解码字符串，
+# 比内存中的字典查找慢两个数量级，热门视频和搜索结果会被反复访问
+ROW_CACHE_SIZE = 1024
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def write_snapshot(videos: Iterable["VideoInfo"], path: Union[str, Path]) -> int:
+    """
+    把视频写入快照文件，先写临时文件再替换，正在映射旧文件的实例不受影响
+
+    Args:
+        videos: VideoInfo 列表，相同 video_id 以最后一个为准
+        path: 快照路径
+
+    Returns:
+        写入的视频数
+    """
+    rows: Dict[str, "VideoInfo"] = {}
+    for video in videos:
+        rows.pop(video.video_id, None)
+        rows[video.video_id] = video
+    ordered = list(rows.values())
+    row_of = {video_id: row for row, video_id in enumerate(rows)}
+
+    strings: Dict[str, int] = {}
+
+    def string_id(text: str) -> int:
+        sid = strings.get(text)
+        if sid is None:
+            sid = strings[text] = len(strings)
+        return sid
+
+    sections: Dict[str, Union[array, bytes]] = {}
+    for field in STRING_FIELDS:
+        sections[field] = array("I", (string_id(getattr(video, field)) for video in ordered))
+    for field in INT_FIELDS:
+        sections[field] = array("q", (getattr(video, field) for video in ordered))
+
+    tag_offsets, tags = array("I", [0]), array("I")
+    related_offsets, related = array("I", [0]), array("I")
+    postings: Dict[str, List[int]] = {}
+    for row, video in enumerate(ordered):
+        tags.extend(string_id(tag) for tag in video._tags)
+        tag_offsets.append(len(tags))
+        # 只保留快照中存在的相关视频
+        related.extend(row_of[item.video_id] for item in video._related if item.video_id in row_of)
+        related_offsets.append(len(related))
+        for token in tokenize(video.title):
+            postings.setdefault(token, []).append(row)
+    sections["tags.offsets"], sections["tags"] = tag_offsets, tags
+    sections["related.offsets"], sections["related"] = related_offsets, related
+
+    sections["index.id"] = array("I", sorted(range(len(ordered)), key=lambda row: ordered[row].video_id))
+    tokens = sorted(postings)
+    token_offsets, token_rows = array("I", [0]), array("I")
+    for token in tokens:
+        token_rows.extend(postings[token])
+        token_offsets.append(len(token_rows))
+    sections["index.tokens"] = array("I", (string_id(token) for token in tokens))
+    sections["index.offsets"], sections["index.rows"] = token_offsets, token_rows
+
+    # 字典按插入顺序即字符串编号顺序
+    encoded = [text.encode("utf-8") for text in strings]
+    string_offsets = array("I", [0])
+    total = 0
+    for data in encoded:
+        total += len(data)
+        string_offsets.append(total)
+    sections["strings.offsets"] = string_offsets
+    sections["strings"] = b"".join(encoded)
+
+    payloads = []
+    for name, section in sections.items():
+        if isinstance(section, array):
+            if not NATIVE_LITTLE_ENDIAN:
+                section = array(section.typecode, section)
+                section.byteswap()
+            section = section.tobytes()
+        payloads.append((name, section))
+
+    offset = _align(HEADER.size + SECTION.size * len(payloads))
+    table = []
+    for name, data in payloads:
+        table.append(SECTION.pack(name.encode("ascii"), offset, len(data)))
+        offset = _align(offset + len(data))
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, len(ordered), len(payloads)))
+        f.write(b"".join(table))
+        for name, data in payloads:
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(data)
+    tmp_path.replace(path)
+    return len(ordered)
+
+
+class CatalogSnapshot:
+    """
+    内存映射打开的只读快照
+
+    打开时只解析文件头和段表，字符串在访问到时才解码，VideoInfo 在查找命中时才构造；
+    最近构造的完整记录保存在一个小的 LRU 中，重复查找不再解码
+    """
+
+    def __init__(self, path: Union[str, Path], cache_size: int = ROW_CACHE_SIZE):
+        """
+        Args:
+            path: 快照路径
+            cache_size: 缓存的已解码记录数，0 表示不缓存
+
+        Raises:
+            OSError: 文件不存在或无法读取
+            ValueError: 快照格式无效或版本不受支持
+        """
+        self.path = Path(path)
+        self.cache_size = cache_size
+        # 行号 -> 带相关视频的 VideoInfo；video_id -> 行号
+        self._row_cache: "OrderedDict[int, VideoInfo]" = OrderedDict()
+        self._id_cache: "OrderedDict[str, int]" = OrderedDict()
+        with open(self.path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"无效的快照: {self.path} (空文件)")
+        # 所有段都是这个视图的切片，解除映射前必须全部释放
+        self._views: List[memoryview] = [memoryview(self._mmap)]
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self):
+        size = len(self._mmap)
+        if size < HEADER.size:
+            raise ValueError(f"无效的快照: {self.path} (文件过短)")
+        magic, version, _, rows, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"无效的快照: {self.path}")
+        if version > SNAPSHOT_VERSION:
+            raise ValueError(f"不支持的快照版本: {version}")
+        if HEADER.size + SECTION.size * count > size:
+            raise ValueError(f"无效的快照: {self.path} (段表不完整)")
+        self._sections: Dict[str, tuple] = {}
+        for index in range(count):
+            name, offset, length = SECTION.unpack_from(self._mmap, HEADER.size + SECTION.size * index)
+            if offset + length > size:
+                raise ValueError(f"无效的快照: {self.path} (段越界)")
+            self._sections[name.rstrip(b"\0").decode("ascii")] = (offset, length)
+        self.rows = rows
+
+        self._strings = self._section("strings")
+        self._string_offsets = self._section("strings.offsets", "I")
+        self._columns = {field: self._section(field, "I") for field in STRING_FIELDS}
+        self._ints = {field: self._section(field, "q") for field in INT_FIELDS}
+        self._tag_offsets = self._section("tags.offsets", "I")
+        self._tags = self._section("tags", "I")
+        self._related_offsets = self._section("related.offsets", "I")
+        self._related = self._section("related", "I")
+        self._id_index = self._section("index.id", "I")
+        self._tokens = self._section("index.tokens", "I")
+        self._token_offsets = self._section("index.offsets", "I")
+        self._token_rows = self._section("index.rows", "I")
+
+        columns = list(self._columns.values()) + list(self._ints.values()) + [self._id_index]
+        if any(len(column) != rows for column in columns) \
+                or len(self._tag_offsets) != rows + 1 or len(self._related_offsets) != rows + 1:
+            raise ValueError(f"无效的快照: {self.path} (列长度不一致)")
+
+    def _section(self, name: str, typecode: str = ""):
+        """获取段内容，指定类型时转换为对应的数组视图"""
+        if name not in self._sections:
+            raise ValueError(f"无效的快照: {self.path} (缺少 {name} 段)")
+        offset, length = self._sections[name]
+        if typecode and length % array(typecode).itemsize:
+            raise ValueError(f"无效的快照: {self.path} ({name} 段长度不正确)")
+        view = self._views[0][offset:offset + length]
+        self._views.append(view)
+        if not typecode:
+            return view
+        if NATIVE_LITTLE_ENDIAN:
+            view = view.cast(typecode)
+            self._views.append(view)
+            return view
+        values = array(typecode)
+        values.frombytes(view)
+        values.byteswap()
+        return values
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __contains__(self, video_id: str) -> bool:
+        return self.find(video_id) is not None
+
+    def __enter__(self) -> "CatalogSnapshot":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def string(self, sid: int) -> str:
+        """按编号解码字符串"""
+        offsets = self._string_offsets
+        return str(self._strings[offsets[sid]:offsets[sid + 1]], "utf-8")
+
+    def video_id(self, row: int) -> str:
+        """某一行的 video_id"""
+        return self.string(self._columns["video_id"][row])
+
+    def find(self, video_id: str) -> Optional[int]:
+        """
+        按 video_id 二分查找行号
+
+        Returns:
+            行号，不存在时返回 None
+        """
+        index = self._id_index
+        low, high = 0, len(index)
+        while low < high:
+            middle = (low + high) // 2
+            if self.video_id(index[middle]) < video_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(index) and self.video_id(index[low]) == video_id:
+            return index[low]
+        return None
+
+    def row(self, row: int, with_related: bool = True) -> "VideoInfo":
+        """
+        构造某一行的 VideoInfo
+
+        Args:
+            row: 行号
+            with_related: 是否同时构造相关视频（相关视频本身不再带相关视频）
+        """
+        if with_related:
+            video = self._row_cache.get(row)
+            if video is not None:
+                self._row_cache.move_to_end(row)
+                return video
+        from .core import VideoInfo
+        fields = {field: self.string(column[row]) for field, column in self._columns.items()}
+        fields.update({field: column[row] for field, column in self._ints.items()})
+        tags = [self.string(sid) for sid in self._tags[self._tag_offsets[row]:self._tag_offsets[row + 1]]]
+        related = None
+        if with_related:
+            rows = self._related[self._related_offsets[row]:self._related_offsets[row + 1]]
+            related = [self.row(item, with_related=False) for item in rows]
+        video = VideoInfo(**fields, tags=tags, related=related)
+        if with_related:
+            self._remember(self._row_cache, row, video)
+        return video
+
+    def _remember(self, cache: OrderedDict, key, value):
+        if self.cache_size <= 0:
+            return
+        cache[key] = value
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def get(self, video_id: str) -> Optional["VideoInfo"]:
+        """按 ID 获取 VideoInfo，不存在时返回 None"""
+        row = self._id_cache.get(video_id)
+        if row is not None:
+            self._id_cache.move_to_end(video_id)
+        else:
+            row = self.find(video_id)
+            if row is None:
+                return None
+            self._remember(self._id_cache, video_id, row)
+        return self.row(row)
+
+    def match(self, tokens: Iterable[str]) -> Dict[int, int]:
+        """
+        在标题词元索引中查找
+
+        Args:
+            tokens: 小写词元
+
+        Returns:
+            {行号: 匹配的词元数}
+        """
+        scores: Dict[int, int] = {}
+        index = self._tokens
+        for token in tokens:
+            low, high = 0, len(index)
+            while low < high:
+                middle = (low + high) // 2
+                if self.string(index[middle]) < token:
+                    low = middle + 1
+                else:
+                    high = middle
+            if low == len(index) or self.string(index[low]) != token:
+                continue
+            for row in self._token_rows[self._token_offsets[low]:self._token_offsets[low + 1]]:
+                scores[row] = scores.get(row, 0) + 1
+        return scores
+
+    def videos(self) -> Iterator["VideoInfo"]:
+        """
+        按行顺序构造全部 VideoInfo
+
+        每行只解码一次：先构造不带相关视频的卡片，完整记录复制卡片后引用其他行的卡片作为相关视频
+        """
+        cards = [self.row(row, with_related=False) for row in range(self.rows)]
+        offsets, related = self._related_offsets, self._related
+        for row, card in enumerate(cards):
+            video = copy.copy(card)
+            video.related = [cards[item] for item in related[offsets[row]:offsets[row + 1]]]
+            yield video
+
+    @property
+    def size(self) -> int:
+        """文件大小（字节）"""
+        return len(self._mmap) if not self._mmap.closed else 0
+
+    def close(self):
+        """释放所有视图并解除映射"""
+        self._row_cache.clear()
+        self._id_cache.clear()
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        if not self._mmap.closed:
+            self._mmap.close()
@@ -0,0 +1,154 @@
+"""
+视频源解析模块
+从已获取的详情页中解析各清晰度的 mp4 地址
+"""
+
+import re
+import time
+from html import unescape
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+from .consts import (
+    REGEX_VIDEO_SOURCE, REGEX_VIDEO_SOURCE_ALT, REGEX_IFRAME_SRC, REGEX_QUALITY_OPTIONS,
+)
+
+
+REGEX_SOURCE_TAG = re.compile(r'<source\b[^>]*>', re.IGNORECASE)
+REGEX_SOURCE_ATTR = re.compile(r'([\w:-]+)\s*=\s*"([^"]*)"')
+REGEX_QUALITY_IN_URL = re.compile(r'[_\-/](\d{3,4})p?\.mp4', re.IGNORECASE)
+REGEX_QUALITY_LABEL = re.compile(r'(\d{3,4})p?', re.IGNORECASE)
+
+# 签名URL中表示过期时间（Unix 时间戳）的查询参数
+EXPIRY_PARAMS = ("expires", "expire", "exp", "e", "validto", "valid_to")
+
+# 过期时间前预留的安全余量（秒）
+EXPIRY_MARGIN = 60
+
+DEFAULT_QUALITY = "default"
+
+
+def _quality_key(quality: str) -> int:
+    """清晰度排序键，数字越大越清晰，无法识别的排在最后"""
+    match = REGEX_QUALITY_LABEL.match(quality)
+    return int(match.group(1)) if match else 0
+
+
+def _normalize_quality(label: str, url: str) -> str:
+    """将 label/size 属性或URL中的清晰度统一为 "720p" 形式"""
+    match = REGEX_QUALITY_LABEL.search(label or "")
+    if match:
+        return f"{match.group(1)}p"
+    match = REGEX_QUALITY_IN_URL.search(url)
+    if match:
+        return f"{match.group(1)}p"
+    return DEFAULT_QUALITY
+
+
+def extract_sources(html_content: str) -> Dict[str, str]:
+    """
+    解析页面中的 mp4 视频源
+
+    依次查找 <source type="video/mp4">、播放器配置中的清晰度映射和 file/src/url 字段
+
+    Args:
+        html_content: 详情页HTML
+
+    Returns:
+        清晰度 -> URL，按清晰度从高到低排列
+    """
+    sources: Dict[str, str] = {}
+
+    for tag in REGEX_SOURCE_TAG.findall(html_content):
+        if not REGEX_VIDEO_SOURCE.search(tag):
+            continue
+        attrs = {name.lower(): unescape(value) for name, value in REGEX_SOURCE_ATTR.findall(tag)}
+        url = attrs.get("src", "")
+        label = attrs.get("label") or attrs.get("size") or attrs.get("res") or attrs.get("title", "")
+        if url:
+            sources.setdefault(_normalize_quality(label, url), url)
+
+    for quality, url in REGEX_QUALITY_OPTIONS.findall(html_content):
+        if ".mp4" not in url or not REGEX_QUALITY_LABEL.fullmatch(quality):
+            continue
+        url = unescape(url.replace("\\/", "/"))
+        sources.setdefault(_normalize_quality(quality, url), url)
+
+    for url in REGEX_VIDEO_SOURCE_ALT.findall(html_content):
+        url = unescape(url.replace("\\/", "/"))
+        if url not in sources.values():
+            sources.setdefault(_normalize_quality("", url), url)
+
+    return dict(sorted(sources.items(), key=lambda item: -_quality_key(item[0])))
+
+
+def extract_embed(html_content: str) -> str:
+    """获取播放器 iframe 地址，没有时返回空字符串"""
+    match = REGEX_IFRAME_SRC.search(html_content)
+    return unescape(match.group(1)) if match else ""
+
+
+def url_expires_at(url: str) -> Optional[float]:
+    """
+    获取签名URL的过期时间
+
+    Args:
+        url: 视频地址
+
+    Returns:
+        Unix 时间戳，URL中没有过期参数时返回 None
+    """
+    query = parse_qs(urlparse(url).query)
+    for name in EXPIRY_PARAMS:
+        values = query.get(name)
+        if values and values[0].isdigit():
+            return float(values[0])
+    return None
+
+
+def sources_ttl(sources: Dict[str, str], default: float) -> float:
+    """
+    计算视频源缓存时间，不超过其中最早过期的签名URL
+
+    Args:
+        sources: 清晰度 -> URL
+        default: URL不带过期参数时使用的缓存时间（秒）
+
+    Returns:
+        缓存时间（秒），可能为 0
+    """
+    ttl = default
+    now = time.time()
+    for url in sources.values():
+        expires_at = url_expires_at(url)
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - now - EXPIRY_MARGIN)
+    return max(0.0, ttl)
+
+
+def select_source(sources: Dict[str, str], quality: str = "best") -> Optional[str]:
+    """
+    按清晰度选择视频源
+
+    Args:
+        sources: 清晰度 -> URL
+        quality: "best"、"worst" 或具体清晰度如 "720p"；
+            没有该清晰度时选择不超过它的最高清晰度
+
+    Returns:
+        URL，没有可用视频源时返回 None
+    """
+    if not sources:
+        return None
+    ordered = sorted(sources.items(), key=lambda item: -_quality_key(item[0]))
+    if quality == "best":
+        return ordered[0][1]
+    if quality == "worst":
+        return ordered[-1][1]
+    if quality in sources:
+        return sources[quality]
+    wanted = _quality_key(quality)
+    for name, url in ordered:
+        if _quality_key(name) <= wanted:
+            return url
+    return ordered[-1][1]
@@ -0,0 +1,220 @@
+"""
+标签订阅模块
+按标签聚合订阅者，每个标签每轮只请求一次，再把新视频分发给所有订阅的会话
+"""
+
+import json
+import asyncio
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union, TYPE_CHECKING
+
+from .tags import normalize_tag, is_valid_tag
+from .errors import TagNotFound, ThreeDPornDudeException
+
+if TYPE_CHECKING:
+    from .core import Client, VideoInfo
+
+
+# 每个标签记住的最近视频ID数量，用于判断哪些是新视频
+SEEN_LIMIT = 200
+
+
+class SubscriptionManager:
+    """
+    标签订阅管理
+
+    - 订阅关系以 标签 -> 会话集合 保存，轮询次数只与不同标签的数量有关
+    - 每个标签记录最近见过的视频ID，首次轮询只记录不通知
+    - 订阅关系和已见ID持久化到 JSON 文件
+    """
+
+    def __init__(self, max_per_session: int = 20):
+        """
+        初始化订阅管理
+
+        Args:
+            max_per_session: 每个会话最多订阅的标签数量
+        """
+        self.max_per_session = max_per_session
+        self._subscribers: Dict[str, Set[str]] = {}
+        self._seen: Dict[str, List[str]] = {}
+        self._dirty = False
+
+    @property
+    def dirty(self) -> bool:
+        """是否有尚未保存的变更"""
+        return self._dirty
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def tags(self) -> List[str]:
+        """获取所有被订阅的标签"""
+        return sorted(self._subscribers)
+
+    def subscribers(self, tag: str) -> Set[str]:
+        """获取订阅某标签的会话"""
+        return set(self._subscribers.get(normalize_tag(tag), ()))
+
+    def subscriptions_of(self, session: str) -> List[str]:
+        """获取某会话订阅的标签"""
+        return sorted(tag for tag, sessions in self._subscribers.items() if session in sessions)
+
+    def subscribe(self, tag: str, session: str) -> bool:
+        """
+        订阅标签
+
+        Args:
+            tag: 标签名称
+            session: 会话标识（unified_msg_origin）
+
+        Returns:
+            是否为新订阅，已订阅时返回 False
+
+        Raises:
+            TagNotFound: 标签格式无效
+            ValueError: 超出单个会话的订阅上限
+        """
+        tag = normalize_tag(tag)
+        if not is_valid_tag(tag):
+            raise TagNotFound(f"标签格式无效: {tag}")
+        sessions = self._subscribers.get(tag)
+        if sessions is not None and session in sessions:
+            return False
+        if len(self.subscriptions_of(session)) >= self.max_per_session:
+            raise ValueError(f"每个会话最多订阅 {self.max_per_session} 个标签")
+        self._subscribers.setdefault(tag, set()).add(session)
+        self._dirty = True
+        return True
+
+    def unsubscribe(self, tag: str, session: str) -> bool:
+        """
+        取消订阅
+
+        没有订阅者的标签会连同已见ID一起移除
+
+        Returns:
+            是否确实取消了订阅
+        """
+        tag = normalize_tag(tag)
+        sessions = self._subscribers.get(tag)
+        if not sessions or session not in sessions:
+            return False
+        sessions.discard(session)
+        if not sessions:
+            del self._subscribers[tag]
+            self._seen.pop(tag, None)
+        self._dirty = True
+        return True
+
+    def diff(self, tag: str, videos: List["VideoInfo"]) -> List["VideoInfo"]:
+        """
+        与已见ID比较，返回新视频并更新已见记录
+
+        标签首次出现时只记录当前视频，不视为新视频
+
+        Args:
+            tag: 标签名称
+            videos: 本轮获取到的视频（最新的在前）
+
+        Returns:
+            新视频列表
+        """
+        seen = self._seen.get(tag)
+        ids = [video.video_id for video in videos]
+        if seen is None:
+            self._seen[tag] = ids[:SEEN_LIMIT]
+            self._dirty = True
+            return []
+        known = set(seen)
+        fresh = [video for video in videos if video.video_id not in known]
+        if fresh:
+            self._seen[tag] = ([video.video_id for video in fresh] + seen)[:SEEN_LIMIT]
+            self._dirty = True
+        return fresh
+
+    async def poll(
+        self, client: "Client", concurrency: int = 2
+    ) -> Dict[str, List[Tuple[str, List["VideoInfo"]]]]:
+        """
+        轮询所有被订阅的标签，每个标签只请求一次
+
+        Args:
+            client: 客户端
+            concurrency: 同时请求的标签数量
+
+        Returns:
+            会话 -> [(标签, 新视频列表)]
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def fetch(tag: str) -> Tuple[str, Optional[List["VideoInfo"]]]:
+            async with semaphore:
+                try:
+                    # 列表缓存的有效期可能长于轮询间隔，每轮都请求最新页面
+                    return tag, await client.get_videos_by_tag(tag, page=1, sort="newest", refresh=True)
+                except ThreeDPornDudeException:
+                    return tag, None
+
+        results = await asyncio.gather(*(fetch(tag) for tag in self.tags()))
+
+        updates: Dict[str, List[Tuple[str, List["VideoInfo"]]]] = {}
+        for tag, videos in results:
+            # 请求失败（包括标签不存在）时不更新已见记录，首轮失败也不会把下一轮的整页当作新视频
+            if videos is None or tag not in self._subscribers:
+                continue
+            fresh = self.diff(tag, videos)
+            if not fresh:
+                continue
+            for session in self._subscribers[tag]:
+                updates.setdefault(session, []).append((tag, fresh))
+        return updates
+
+    def load(self, path: Union[str, Path]) -> bool:
+        """
+        从 JSON 文件加载订阅
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            是否成功加载
+        """
+        path = Path(path)
+        if not path.exists():
+            return False
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        if not isinstance(data, dict):
+            return False
+        for tag, sessions in data.get("subscribers", {}).items():
+            tag = normalize_tag(tag)
+            if is_valid_tag(tag) and isinstance(sessions, list) and sessions:
+                self._subscribers.setdefault(tag, set()).update(str(s) for s in sessions)
+        for tag, ids in data.get("seen", {}).items():
+            tag = normalize_tag(tag)
+            if tag in self._subscribers and isinstance(ids, list):
+                self._seen[tag] = [str(i) for i in ids][:SEEN_LIMIT]
+        self._dirty = False
+        return True
+
+    def save(self, path: Union[str, Path]):
+        """
+        保存订阅到 JSON 文件
+
+        Args:
+            path: 文件路径
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        data = {
+            "version": 1,
+            "subscribers": {tag: sorted(sessions) for tag, sessions in self._subscribers.items()},
+            "seen": self._seen,
+        }
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
+        self._dirty = False
@@ -0,0 +1,380 @@
+"""
+HTTP 传输层
+Client 和缩略图下载可以通过可替换的传输层发请求：
+- HttpTransport: 直接访问网络
+- RecordingTransport: 访问网络的同时把请求/响应记录到存档
+- ReplayTransport: 只从存档返回响应，从不访问网络
+
+存档是一个 zip 文件：index.json 保存每个请求的状态码、响应头和耗时，
+响应体按内容哈希去重后以 deflate 压缩保存在 bodies/ 下。
+录制时每个响应立即追加到存档旁的 JSONL 日志（<存档>.journal），关闭时合并进 zip；
+进程中途退出时日志保留在磁盘上，下次加载存档时一并读取
+"""
+
+import re
+import json
+import time
+import base64
+import asyncio
+import hashlib
+import zipfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from .consts import HEADERS
+from .errors import NetworkError
+
+
+ARCHIVE_VERSION = 1
+
+# 存档中保留的响应头
+KEPT_HEADERS = ("content-type", "content-length", "last-modified", "etag")
+
+REGEX_CHARSET = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+
+class TransportResponse:
+    """传输层返回的完整响应"""
+
+    __slots__ = ("status", "headers", "body", "elapsed")
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes, elapsed: float = 0.0):
+        """
+        Args:
+            status: HTTP 状态码
+            headers: 响应头（小写键）
+            body: 响应体
+            elapsed: 请求耗时（秒）
+        """
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+
+    @property
+    def charset(self) -> str:
+        """响应编码，Content-Type 中未声明时为 utf-8"""
+        match = REGEX_CHARSET.search(self.headers.get("content-type", ""))
+        return match.group(1) if match else "utf-8"
+
+    @property
+    def content_length(self) -> Optional[int]:
+        value = self.headers.get("content-length", "")
+        return int(value) if value.isdigit() else None
+
+    def text(self) -> str:
+        """按声明的编码解码响应体"""
+        try:
+            return self.body.decode(self.charset, "replace")
+        except LookupError:
+            return self.body.decode("utf-8", "replace")
+
+
+def _request_key(method: str, url: str) -> str:
+    return f"{method.upper()} {url}"
+
+
+def journal_path(path: Union[str, Path]) -> Path:
+    """存档对应的录制日志路径"""
+    path = Path(path)
+    return path.with_suffix(path.suffix + ".journal")
+
+
+class Transport(ABC):
+    """传输层基类"""
+
+    @abstractmethod
+    async def request(self, method: str, url: str, proxy: Optional[str] = None) -> TransportResponse:
+        """
+        发送请求并读取完整响应
+
+        Args:
+            method: GET 或 HEAD
+            url: 地址
+            proxy: 代理地址
+
+        Returns:
+            TransportResponse
+
+        Raises:
+            NetworkError: 请求失败
+        """
+
+    async def close(self):
+        """释放资源"""
+
+
+class HttpTransport(Transport):
+    """通过 aiohttp 直接访问网络"""
+
+    def __init__(self, timeout: float = 30, headers: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            timeout: 请求超时时间（秒）
+            headers: 默认请求头
+        """
+        self.timeout = timeout
+        self.headers = headers if headers is not None else HEADERS
+        self._session = None
+
+    async def request(self, method: str, url: str, proxy: Optional[str] = None) -> TransportResponse:
+        import aiohttp
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trust_env=True
+            )
+        start = time.perf_counter()
+        try:
+            async with self._session.request(method, url, proxy=proxy, allow_redirects=True) as response:
+                body = await response.read()
+                headers = {
+                    name.lower(): value for name, value in response.headers.items()
+                    if name.lower() in KEPT_HEADERS
+                }
+                return TransportResponse(response.status, headers, body, time.perf_counter() - start)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise NetworkError(f"网络请求失败: {e}")
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+class HttpArchive:
+    """请求/响应存档"""
+
+    def __init__(self):
+        self.entries: Dict[str, dict] = {}
+        self.bodies: Dict[str, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def add(self, method: str, url: str, response: TransportResponse):
+        """记录一次响应，同一请求只保留最后一次"""
+        self._add(_request_key(method, url), response)
+
+    def _add(self, key: str, response: TransportResponse):
+        digest = hashlib.sha1(response.body).hexdigest()
+        self.bodies[digest] = response.body
+        self.entries[key] = {
+            "status": response.status,
+            "headers": response.headers,
+            "body": digest,
+            "elapsed": round(response.elapsed, 4),
+        }
+
+    def replay_journal(self, path: Union[str, Path]) -> int:
+        """
+        读取录制日志中的响应，后记录的覆盖先记录的
+
+        进程中途退出时最后一行可能不完整，无法解析的行直接跳过
+
+        Returns:
+            读取的响应数
+        """
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    response = TransportResponse(
+                        record["status"], record["headers"], base64.b64decode(record["body"]),
+                        record.get("elapsed", 0.0)
+                    )
+                except (ValueError, KeyError, TypeError):
+                    continue
+                self._add(record["key"], response)
+                count += 1
+        return count
+
+    def get(self, method: str, url: str) -> Optional[TransportResponse]:
+        """查找响应，没有记录时返回 None"""
+        entry = self.entries.get(_request_key(method, url))
+        if entry is None:
+            return None
+        body = self.bodies.get(entry["body"], b"")
+        return TransportResponse(entry["status"], dict(entry["headers"]), body, entry.get("elapsed", 0.0))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "HttpArchive":
+        """
+        从 zip 文件加载存档，并合并尚未写入 zip 的录制日志
+
+        Raises:
+            OSError: 存档和录制日志都不存在，或无法读取
+            ValueError: 存档格式无效
+        """
+        archive = cls()
+        journal = journal_path(path)
+        if Path(path).exists() or not journal.exists():
+            try:
+                with zipfile.ZipFile(path) as zf:
+                    index = json.loads(zf.read("index.json").decode("utf-8"))
+                    archive.entries = index.get("entries", {})
+                    for name in zf.namelist():
+                        if name.startswith("bodies/"):
+                            archive.bodies[name[len("bodies/"):]] = zf.read(name)
+            except (zipfile.BadZipFile, KeyError) as e:
+                raise ValueError(f"无效的存档: {path} ({e})")
+        if journal.exists():
+            archive.replay_journal(journal)
+        return archive
+
+    def save(self, path: Union[str, Path]):
+        """保存为 zip 文件，只写入仍被引用的响应体"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        used = {entry["body"] for entry in self.entries.values()}
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("index.json", json.dumps(
+                {"version": ARCHIVE_VERSION, "entries": self.entries}, ensure_ascii=False
+            ))
+            for digest in sorted(used):
+                zf.writestr(f"bodies/{digest}", self.bodies[digest])
+        tmp_path.replace(path)
+
+
+class RecordingTransport(Transport):
+    """
+    访问网络并把响应记录到存档
+
+    每个响应立即追加到录制日志并刷新到磁盘，内存中不保留响应；
+    关闭时把日志合并进 zip 存档，合并失败时日志保留，下次加载或录制时再合并
+    """
+
+    def __init__(self, path: Union[str, Path], inner: Optional[Transport] = None):
+        """
+        Args:
+            path: 存档路径，已存在时在其基础上追加
+            inner: 实际发请求的传输层，默认 HttpTransport
+        """
+        self.path = Path(path)
+        self.journal = journal_path(self.path)
+        self.inner = inner if inner is not None else HttpTransport()
+        self.recorded = 0
+        self._file = None
+
+    def _append(self, method: str, url: str, response: TransportResponse):
+        if self._file is None:
+            self.journal.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.journal, "a", encoding="utf-8")
+            if self._file.tell() > 0 and not self._ends_with_newline():
+                # 上次中途退出留下的半行单独成行，不与新记录拼在一起
+                self._file.write("\n")
+        self._file.write(json.dumps({
+            "key": _request_key(method, url),
+            "status": response.status,
+            "headers": response.headers,
+            "elapsed": round(response.elapsed, 4),
+            "body": base64.b64encode(response.body).decode("ascii"),
+        }, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.recorded += 1
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.journal, "rb") as f:
+            f.seek(-1, 2)
+            return f.read(1) == b"\n"
+
+    async def request(self, method: str, url: str, proxy: Optional[str] = None) -> TransportResponse:
+        response = await self.inner.request(method, url, proxy)
+        self._append(method, url, response)
+        return response
+
+    def compact(self):
+        """
+        把录制日志合并进 zip 存档并删除日志
+
+        Raises:
+            OSError: 写入失败（日志保留）
+            ValueError: 已有存档格式无效（日志保留）
+        """
+        if not self.journal.exists():
+            return
+        HttpArchive.load(self.path).save(self.path)
+        self.journal.unlink()
+
+    async def close(self):
+        await self.inner.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        # 合并需要读取整个存档，在线程中进行
+        await asyncio.get_running_loop().run_in_executor(None, self.compact)
+
+
+class ReplayTransport(Transport):
+    """只从存档返回响应，从不访问网络"""
+
+    def __init__(
+        self, archive: Union[str, Path, HttpArchive], latency: float = 0.0, recorded_latency: bool = False
+    ):
+        """
+        Args:
+            archive: 存档路径或已加载的存档
+            latency: 每个响应前额外等待的时间（秒）
+            recorded_latency: 是否按录制时的耗时等待
+
+        Raises:
+            OSError: 存档不存在
+            ValueError: 存档格式无效
+        """
+        self.archive = archive if isinstance(archive, HttpArchive) else HttpArchive.load(archive)
+        self.latency = latency
+        self.recorded_latency = recorded_latency
+        self.misses: Dict[str, int] = {}
+
+    async def request(self, method: str, url: str, proxy: Optional[str] = None) -> TransportResponse:
+        response = self.archive.get(method, url)
+        if response is None and method.upper() == "HEAD":
+            # 没有单独录制 HEAD 时用同一地址的 GET 响应头代替
+            response = self.archive.get("GET", url)
+            if response is not None:
+                response.body = b""
+        if response is None:
+            key = _request_key(method, url)
+            self.misses[key] = self.misses.get(key, 0) + 1
+            raise NetworkError(f"回放存档中没有该请求: {key}")
+        delay = self.latency + (response.elapsed if self.recorded_latency else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return response
+
+
+def make_transport(
+    mode: str, archive: Union[str, Path], latency: float = 0.0, timeout: float = 30
+) -> Tuple[Optional[Transport], str]:
+    """
+    按配置创建传输层
+
+    Args:
+        mode: "" / "live" 直接访问网络，"record" 录制，"replay" 回放
+        archive: 存档路径
+        latency: 回放时每个响应的额外延迟（秒）
+        timeout: 录制时的请求超时时间（秒）
+
+    Returns:
+        (传输层, 实际模式)，直接访问网络时传输层为 None（使用 Client 自带的会话）
+
+    Raises:
+        ValueError: 模式无效或回放存档无法加载
+    """
+    mode = (mode or "live").lower()
+    if mode == "live":
+        return None, mode
+    if mode == "record":
+        return RecordingTransport(archive, HttpTransport(timeout)), mode
+    if mode == "replay":
+        try:
+            return ReplayTransport(archive, latency=latency), mode
+        except OSError as e:
+            raise ValueError(f"无法加载回放存档: {e}")
+    raise ValueError(f"未知的传输模式: {mode}")
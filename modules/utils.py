@@ -0,0 +1,201 @@
+"""
+数值规范化与本地排序/筛选工具
+"""
+
+import re
+import time
+from datetime import datetime, timezone
+from typing import List, Iterable, TYPE_CHECKING
+
+from .consts import SORT_ALIASES, SORT_OPTIONS, LOCAL_SORT_OPTIONS
+from .errors import InvalidSortOption
+
+if TYPE_CHECKING:
+    from .core import VideoInfo
+
+
+REGEX_VIEWS_VALUE = re.compile(r'(\d+(?:[.,]\d+)*)\s*([KMB])?', re.IGNORECASE)
+REGEX_RATING_VALUE = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+REGEX_DURATION_VALUE = re.compile(r'(\d+):(\d{1,2})(?::(\d{1,2}))?')
+REGEX_ISO_DURATION = re.compile(r'^PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?$', re.IGNORECASE)
+REGEX_ISO_DATE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})(?:[T ](\d{1,2}):(\d{2})(?::(\d{2}))?)?')
+REGEX_RELATIVE_DATE = re.compile(
+    r'(\d+|an?)\s*(second|sec|minute|min|hour|day|week|month|year)s?\s+ago', re.IGNORECASE
+)
+
+_VIEWS_MULTIPLIERS = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+_RELATIVE_UNITS = {
+    "second": 1, "sec": 1, "minute": 60, "min": 60, "hour": 3600,
+    "day": 86400, "week": 7 * 86400, "month": 30 * 86400, "year": 365 * 86400,
+}
+
+
+def parse_views(text: str) -> int:
+    """
+    解析观看数文本
+
+    Args:
+        text: 如 "1.2K"、"12,345 views"、"3M"
+
+    Returns:
+        观看次数，无法解析时返回 -1
+    """
+    match = REGEX_VIEWS_VALUE.search(text or "")
+    if not match:
+        return -1
+    number, suffix = match.groups()
+    if suffix:
+        # 带单位时逗号视为小数点（如 "1,2K"）
+        value = float(number.replace(",", "."))
+        return int(value * _VIEWS_MULTIPLIERS[suffix.upper()])
+    return int(number.replace(",", "").replace(".", ""))
+
+
+def parse_duration(text: str) -> int:
+    """
+    解析时长文本
+
+    Args:
+        text: 如 "12:34"、"1:02:03"、ISO 8601 "PT12M34S"
+
+    Returns:
+        秒数，无法解析时返回 -1
+    """
+    text = (text or "").strip()
+    iso_match = REGEX_ISO_DURATION.match(text)
+    if iso_match and any(iso_match.groups()):
+        hours, minutes, seconds = (int(part or 0) for part in iso_match.groups())
+        return hours * 3600 + minutes * 60 + seconds
+    match = REGEX_DURATION_VALUE.search(text)
+    if not match:
+        return -1
+    first, second, third = match.groups()
+    if third is None:
+        return int(first) * 60 + int(second)
+    return int(first) * 3600 + int(second) * 60 + int(third)
+
+
+def parse_rating(text: str) -> int:
+    """
+    解析评分文本
+
+    Args:
+        text: 如 "87%"
+
+    Returns:
+        百分比评分（0-100），无法解析时返回 -1
+    """
+    match = REGEX_RATING_VALUE.search(text or "")
+    if not match:
+        return -1
+    return min(100, int(float(match.group(1))))
+
+
+def parse_upload_date(text: str, now: float = 0) -> float:
+    """
+    解析上传日期文本
+
+    Args:
+        text: 如 "2024-05-17"、"2024-05-17T12:00:00+00:00"、"3 days ago"
+        now: 相对日期的参照时间（时间戳），默认当前时间
+
+    Returns:
+        上传时间的 UTC 时间戳（相对日期为近似值），无法解析时返回 -1
+    """
+    text = text or ""
+    match = REGEX_ISO_DATE.search(text)
+    if match:
+        parts = [int(part or 0) for part in match.groups()]
+        try:
+            return datetime(*parts, tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            return -1
+    match = REGEX_RELATIVE_DATE.search(text)
+    if match:
+        count, unit = match.groups()
+        count = 1 if count.lower() in ("a", "an") else int(count)
+        return (now or time.time()) - count * _RELATIVE_UNITS[unit.lower()]
+    return -1
+
+
+def normalize_sort(sort: str, local: bool = False) -> str:
+    """
+    规范化排序方式
+
+    Args:
+        sort: 排序方式或其别名
+        local: 是否允许仅支持本地排序的方式 (longest, shortest)
+
+    Returns:
+        规范的排序方式
+    """
+    key = (sort or "").strip().lower()
+    key = SORT_ALIASES.get(key, key)
+    options = LOCAL_SORT_OPTIONS if local else tuple(SORT_OPTIONS)
+    if key not in options:
+        raise InvalidSortOption(
+            f"不支持的排序方式: {sort}，可选: {', '.join(options)}"
+        )
+    return key
+
+
+def sort_videos(videos: Iterable["VideoInfo"], sort: str) -> List["VideoInfo"]:
+    """
+    在本地对视频列表重新排序，不发起网络请求
+
+    Args:
+        videos: VideoInfo 列表
+        sort: 排序方式 (most-viewed, newest, top-rated, longest, shortest)
+
+    Returns:
+        排序后的新列表；无法解析数值的条目排在最后
+    """
+    sort = normalize_sort(sort, local=True)
+    videos = list(videos)
+    if sort == "most-viewed":
+        videos.sort(key=lambda v: v.views_count, reverse=True)
+    elif sort == "top-rated":
+        videos.sort(key=lambda v: v.rating_percent, reverse=True)
+    elif sort == "longest":
+        videos.sort(key=lambda v: v.duration_seconds, reverse=True)
+    elif sort == "shortest":
+        videos.sort(key=lambda v: (v.duration_seconds < 0, v.duration_seconds))
+    elif sort == "newest":
+        # 排序稳定，日期无法解析的条目保持原有的相对顺序
+        now = time.time()
+        videos.sort(key=lambda v: parse_upload_date(v.upload_date, now), reverse=True)
+    return videos
+
+
+def filter_videos(
+    videos: Iterable["VideoInfo"],
+    min_duration: int = 0,
+    max_duration: int = 0,
+    min_rating: int = 0,
+    min_views: int = 0
+) -> List["VideoInfo"]:
+    """
+    在本地筛选视频列表
+
+    Args:
+        videos: VideoInfo 列表
+        min_duration: 最短时长（秒），0 表示不限
+        max_duration: 最长时长（秒），0 表示不限
+        min_rating: 最低评分百分比，0 表示不限
+        min_views: 最低观看数，0 表示不限
+
+    Returns:
+        满足条件的视频列表
+    """
+    result = []
+    for video in videos:
+        if min_duration and video.duration_seconds < min_duration:
+            continue
+        if max_duration and not 0 <= video.duration_seconds <= max_duration:
+            continue
+        if min_rating and video.rating_percent < min_rating:
+            continue
+        if min_views and video.views_count < min_views:
+            continue
+        result.append(video)
+    return result